@@ -1,39 +1,263 @@
 import os
-from PIL import Image
-from flask import Flask, jsonify, request, session, send_from_directory
+import base64
+import datetime
+import json
+import mimetypes
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import urlencode
+from flask import Flask, Request, Response, jsonify, request, session, send_from_directory, g, has_request_context, make_response
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
 import mysql.connector
 from mysql.connector import Error as DBError # Alias to avoid conflict if any
-from db_config import get_db_connection, create_admin_table, seed_initial_admins, create_businesses_table
+from db_config import db_cursor as pooled_db_cursor, get_pool, get_pool_stats, create_admin_table, seed_initial_admins, create_categories_table, create_businesses_table
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
+from count_cache import CountCache, normalize_filter
+from search_index import SearchIndex, SEARCH_INDEX_SYNC_INTERVAL
+from suggest_index import SuggestIndex, DEFAULT_SUGGESTION_LIMIT
+from fuzzy_index import FuzzyIndex
+from featured_pool import FeaturedPool, FEATURED_ROTATION_INTERVAL
+from response_cache import create_response_cache
+from data_version import DataVersion
+from event_hub import create_event_hub
+from image_pipeline import check_image, variant_urls, is_hashed_filename, IMAGE_MAX_PIXELS
+from image_store import ImageStore, create_image_store_tables, create_image_ref_triggers
+from image_queue import ImageQueue, create_image_jobs_table
+from rollups import create_daily_rollups_table, create_rollup_triggers, query_series
+from serialization import OrjsonProvider, compress, COMPRESSION_MIN_SIZE, SUPPORTED_ENCODINGS
 
 load_dotenv() # Load environment variables from .env
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'default_dev_secret_key_change_me')
-
 # File upload configuration
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'business_images')
+STAGING_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'staging')  # raw uploads waiting for the image queue
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+UPLOAD_SPOOL_MAX_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MAX_MEMORY', str(256 * 1024)))  # bytes of an upload kept in memory before spilling to STAGING_FOLDER
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+class SpooledUploadRequest(Request):
+    """
+    Parses file uploads into a SpooledTemporaryFile: small files stay in
+    memory, larger ones spill to a temporary file next to the staged uploads,
+    so a worker never holds more than UPLOAD_SPOOL_MAX_MEMORY of any upload.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY, mode='rb+', dir=STAGING_FOLDER)
+
+app = Flask(__name__)
+app.request_class = SpooledUploadRequest
+app.json = OrjsonProvider(app)  # every jsonify() goes through orjson when it is installed
+app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'default_dev_secret_key_change_me')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(STAGING_FOLDER, exist_ok=True)
+
+# Image serving: 'flask' sends files from the worker; 'x-accel' (nginx) and 'x-sendfile' (Apache, lighttpd)
+# only return headers and let the front proxy send the bytes
+IMAGE_SERVE_MODE = os.environ.get('IMAGE_SERVE_MODE', 'flask')
+IMAGE_ACCEL_PREFIX = os.environ.get('IMAGE_ACCEL_PREFIX', '/protected/business_images/')  # internal nginx location aliased to UPLOAD_FOLDER
+IMAGE_MAX_AGE = int(os.environ.get('IMAGE_MAX_AGE', '31536000'))  # content-hashed files; they never change
+IMAGE_LEGACY_MAX_AGE = int(os.environ.get('IMAGE_LEGACY_MAX_AGE', '86400'))  # older {name}_{timestamp} files
+
+# Emit X-DB-Connections / X-DB-Statements headers on every response
+DB_QUERY_STATS = os.environ.get('DB_QUERY_STATS', 'false').lower() == 'true'
+
+# Search configuration
+SEARCH_MODE = os.environ.get('SEARCH_MODE', 'fulltext')  # 'fulltext' or 'like'
+SEARCH_ENDPOINT_MODE = os.environ.get('SEARCH_ENDPOINT_MODE', 'index')  # /api/businesses/search: 'index', 'fuzzy', 'fulltext' or 'like'
+SEARCH_FUZZY_FALLBACK = os.environ.get('SEARCH_FUZZY_FALLBACK', 'true').lower() == 'true'  # retry index searches with no hits as fuzzy
+FULLTEXT_MIN_TOKEN_SIZE = int(os.environ.get('FULLTEXT_MIN_TOKEN_SIZE', '3'))  # must match innodb_ft_min_token_size
 
 # Adjust origins for your frontend development server and production domain
 CORS(app, supports_credentials=True, origins=os.environ.get('CORS_ORIGINS', 'http://localhost:5173,http://localhost:8080').split(','))
 
 bcrypt = Bcrypt(app)
+count_cache = CountCache()
+search_index = SearchIndex()
+suggest_index = SuggestIndex()
+fuzzy_index = FuzzyIndex()
+featured_pool = FeaturedPool()
+response_cache = create_response_cache(logger=app.logger)
+data_version = DataVersion()
+event_hub = create_event_hub()
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.session_protection = "strong"
 
+# --- Request-scoped Database Connection ---
+class CountingCursor:
+    """
+    Cursor proxy that counts executed statements against the current request.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        g.db_statements = g.get('db_statements', 0) + 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        g.db_statements = g.get('db_statements', 0) + 1
+        return self._cursor.executemany(*args, **kwargs)
+
+def get_request_connection():
+    """
+    Returns the connection bound to the current request, checking one out of
+    the pool on first use. It is shared by the user loader and the handler and
+    released in release_request_connection().
+    """
+    if 'db_connection' not in g:
+        g.db_connection = get_pool().acquire()
+        g.db_connections = g.get('db_connections', 0) + 1
+    return g.db_connection
+
+@contextmanager
+def db_cursor(dictionary=False):
+    """
+    Yields (connection, cursor). Inside a request the connection is the
+    request-scoped one; outside (startup, background threads) it comes
+    straight from the pool.
+    """
+    if not has_request_context():
+        with pooled_db_cursor(dictionary=dictionary) as (connection, cursor):
+            yield connection, cursor
+        return
+
+    connection = get_request_connection()
+    cursor = CountingCursor(connection.cursor(dictionary=dictionary))
+    try:
+        yield connection, cursor
+    finally:
+        cursor.close()
+
+@app.after_request
+def add_db_query_stats(response):
+    if DB_QUERY_STATS:
+        response.headers['X-DB-Connections'] = str(g.get('db_connections', 0))
+        response.headers['X-DB-Statements'] = str(g.get('db_statements', 0))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    Compresses JSON bodies of at least COMPRESSION_MIN_SIZE bytes with brotli
+    or gzip, whichever the client accepts (brotli preferred).
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.mimetype != 'application/json'
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+    if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+# --- Response Cache ---
+def cached_response(*tags, ttl=None, when=None):
+    """
+    Caches a view's JSON body under its endpoint and query string. tags name
+    the data it is built from; on_businesses_changed() invalidates them.
+    when, if given, decides per request whether the cache applies.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if when is not None and not when():
+                return view(*args, **kwargs)
+
+            # The data version (set by conditional_get) keeps entries from outliving writes made by other workers
+            key = f"{request.endpoint}@{g.get('data_version', '')}?{urlencode(sorted(request.args.items(multi=True)))}"
+            body = response_cache.get(request.endpoint, key)
+            if body is not None:
+                response = app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                response_cache.set(key, response.get_data(), tags, ttl)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def conditional_get(vary=None):
+    """
+    Adds a weak ETag and Last-Modified derived from the data version, and
+    answers a matching If-None-Match with 304 before the view runs. vary,
+    if given, returns extra state the body depends on (the featured rotation).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                version, last_modified = data_version.get(db_cursor)
+            except DBError as err:
+                app.logger.error(f"Failed to read data version, skipping conditional GET: {err}")
+                return view(*args, **kwargs)
+
+            etag = version if vary is None else f"{version}-{vary()}"
+            g.data_version = etag
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Stored by browsers and CDNs, but revalidated on every use
+            response.headers['Cache-Control'] = 'public, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def is_first_page():
+    """
+    True for an unsearched first page of /api/businesses, the only pages worth caching.
+    """
+    return (
+        not request.args.get('cursor')
+        and request.args.get('offset', 0, type=int) == 0
+        and not request.args.get('q')
+    )
+
+@app.teardown_request
+def release_request_connection(exc):
+    connection = g.pop('db_connection', None)
+    if connection is not None:
+        # Rolls back anything the handler did not commit
+        get_pool().release(connection)
+
 # --- File Upload Helper Functions ---
 def allowed_file(filename):
     """
@@ -41,50 +265,368 @@ def allowed_file(filename):
     """
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_uploaded_file(file):
+def stage_uploaded_file(file):
     """
-    Save uploaded file with compression and resizing
-    Returns relative path or None
+    Save the raw upload for the image queue, checking only that it is an image
+    within IMAGE_MAX_PIXELS. Nothing is decoded here and the upload is copied
+    from its spooled stream in chunks.
+    Returns (staged_path, filename) or None
     """
     if file and allowed_file(file.filename):
+        filename = secure_filename(file.filename)
+        ext = os.path.splitext(filename)[1]
+        staged_path = os.path.join(STAGING_FOLDER, f"{uuid.uuid4().hex}{ext}")
         try:
-            filename = secure_filename(file.filename)
-            import time
-            timestamp = str(int(time.time()))
-            name, ext = os.path.splitext(filename)
-            
-            # Open image using Pillow
-            image = Image.open(file)
-            
-            # Convert to RGB if saving as JPEG (handles RGBA/P modes)
-            if ext.lower() in ['.jpg', '.jpeg'] and image.mode in ('RGBA', 'P'):
-                image = image.convert('RGB')
-                
-            # Resize if dimensions exceed 1080px
-            max_dimension = 1080
-            if image.width > max_dimension or image.height > max_dimension:
-                image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            
-            unique_filename = f"{name}_{timestamp}{ext}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # Save with optimization based on format
-            if ext.lower() in ['.jpg', '.jpeg']:
-                image.save(filepath, optimize=True, quality=85)
-            elif ext.lower() == '.png':
-                # PNG optimization (compress_level=9 is max compression, default is 6)
-                image.save(filepath, optimize=True)
-            elif ext.lower() == '.webp':
-                image.save(filepath, quality=85)
-            else:
-                image.save(filepath)
-                
-            return f"/uploads/business_images/{unique_filename}"
+            # Header only: rejects non-images and decompression bombs before anything is written
+            check_image(file.stream)
+            file.stream.seek(0)
+            file.save(staged_path, buffer_size=UPLOAD_CHUNK_SIZE)
+            return staged_path, filename
         except Exception as e:
-            app.logger.error(f"Error processing/saving image: {e}")
+            app.logger.error(f"Rejected uploaded image {filename}: {e}")
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
             return None
     return None
 
+def process_staged_image(staged_path, filename):
+    """
+    Image queue job: write the size/format variants of a staged upload to UPLOAD_FOLDER.
+    Returns (image_url, image_variants)
+    """
+    image_url, image_variants = image_store.process(staged_path)
+    app.logger.info(f"Processed uploaded image {filename}: {len(image_variants['variants'])} variants")
+    return image_url, image_variants
+
+def on_image_processed(job):
+    """
+    Image queue hook, run after a job wrote its image_url.
+    """
+    if job['business_id']:
+        on_businesses_changed(changed_ids=[job['business_id']])
+
+image_store = ImageStore(UPLOAD_FOLDER, "/uploads/business_images/")
+image_queue = ImageQueue(process_staged_image, on_done=on_image_processed, maintenance=image_store.collect_garbage)
+
+# --- Pagination Helpers ---
+def encode_page_cursor(business):
+    """
+    Opaque keyset cursor for the last row of a page: base64 of [business_name, id].
+    """
+    raw = json.dumps([business['business_name'], business['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(token):
+    """
+    Returns (business_name, id) from a cursor, or raises ValueError.
+    """
+    try:
+        business_name, business_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(business_name, str) or not isinstance(business_id, int):
+        raise ValueError("Invalid cursor")
+    return business_name, business_id
+
+def encode_application_cursor(application):
+    """
+    Opaque keyset cursor for the last application of a page: base64 of [submitted_at, id].
+    """
+    raw = json.dumps([application['submittedAt'].isoformat(), application['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_application_cursor(token):
+    """
+    Returns (submitted_at, id) from an application cursor, or raises ValueError.
+    """
+    try:
+        submitted_at, application_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        submitted_at = datetime.datetime.fromisoformat(submitted_at)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(application_id, int):
+        raise ValueError("Invalid cursor")
+    return submitted_at, application_id
+
+def parse_bool_arg(name, default):
+    """
+    Reads a boolean query-string flag ("true"/"false", "1"/"0").
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('false', '0', 'no', '')
+
+# --- Field Projection ---
+# Columns a client may ask for with fields=; id and business_name always come back (cursors need them)
+BUSINESS_FIELDS = (
+    'id', 'business_name', 'category', 'category_id', 'location', 'contact_name', 'tel', 'email', 'website',
+    'description', 'image_url', 'image_variants', 'featured', 'date_added', 'updated_at'
+)
+# Named projections for view=
+BUSINESS_VIEWS = {
+    'card': ('id', 'business_name', 'category', 'location', 'image_url', 'image_variants', 'featured'),
+}
+
+def parse_fields_arg():
+    """
+    Reads view= or fields= (comma separated) into a tuple of columns, or None
+    for every column. Raises ValueError for an unknown view or field.
+    """
+    view = request.args.get('view')
+    fields = request.args.get('fields')
+    if view:
+        if view not in BUSINESS_VIEWS:
+            raise ValueError(f"Unknown view '{view}'; expected one of: {', '.join(BUSINESS_VIEWS)}")
+        return BUSINESS_VIEWS[view]
+    if not fields:
+        return None
+
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in BUSINESS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys(['id', 'business_name'] + requested))
+
+def decode_image_variants(rows):
+    """
+    Turns the image_variants JSON column into a structure, in place. Rows that
+    are cached (in-memory indexes, featured selections) are decoded once.
+    """
+    for row in rows:
+        variants = row.get('image_variants')
+        if isinstance(variants, (str, bytes, bytearray)):
+            row['image_variants'] = json.loads(variants)
+    return rows
+
+def project_rows(rows, columns):
+    """
+    Applies a projection to rows that were not fetched with one (in-memory indexes, cached selections).
+    """
+    decode_image_variants(rows)
+    if columns is None:
+        return rows
+    return [{column: row[column] for column in columns} for row in rows]
+
+def fetch_business_page(cursor, filter_clauses, filter_params, order_by, limit, offset=0,
+                        seek_clause=None, seek_params=(), include_total=False, count_key=None,
+                        select_extra=None, select_params=(), columns=None):
+    """
+    Fetches one page of businesses in a single round trip.
+
+    limit + 1 rows are requested so has_more needs no count. When include_total
+    is set, the total comes from count_cache; on a miss it is computed by a
+    scalar COUNT(*) subquery inside the same statement and then cached.
+    select_extra adds an internal column (named with a leading underscore) that
+    order_by can refer to; it is stripped from the returned rows.
+    columns, from parse_fields_arg(), limits the selected columns.
+    Returns (rows, has_more, total).
+    """
+    total = count_cache.get(count_key) if include_total else None
+    count_inline = include_total and total is None
+
+    filter_sql = " WHERE " + " AND ".join(filter_clauses) if filter_clauses else ""
+    page_clauses = filter_clauses + ([seek_clause] if seek_clause else [])
+    page_sql = " WHERE " + " AND ".join(page_clauses) if page_clauses else ""
+
+    params = []
+    select_sql = "SELECT " + (", ".join(columns) if columns else "*")
+    if select_extra:
+        select_sql += f", {select_extra}"
+        params.extend(select_params)
+    if count_inline:
+        select_sql += f", (SELECT COUNT(*) FROM businesses{filter_sql}) AS _total_rows"
+        params.extend(filter_params)
+    query = f"{select_sql} FROM businesses{page_sql} ORDER BY {order_by} LIMIT %s"
+    params.extend(filter_params)
+    params.extend(seek_params)
+    params.append(limit + 1)
+    if offset:
+        query += " OFFSET %s"
+        params.append(offset)
+
+    cursor.execute(query, tuple(params))
+    rows = cursor.fetchall()
+
+    if count_inline:
+        if rows:
+            total = rows[0]['_total_rows']
+        else:
+            # Past the last page there is no row to carry the count
+            cursor.execute(f"SELECT COUNT(*) as total FROM businesses{filter_sql}", tuple(filter_params))
+            total = cursor.fetchone()['total']
+        count_cache.set(count_key, total)
+
+    if select_extra or count_inline:
+        for row in rows:
+            for column in [name for name in row if name.startswith('_')]:
+                del row[column]
+
+    return decode_image_variants(rows[:limit]), len(rows) > limit, total
+
+# --- Full-text Search Helpers ---
+FULLTEXT_COLUMNS = "business_name, description, category"  # must match the FULLTEXT index column list
+FULLTEXT_OPERATORS = set('+-<>()~*"')
+# InnoDB's default stopword list; a required (+) stopword would match nothing
+INNODB_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how',
+    'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what',
+    'when', 'where', 'who', 'will', 'with', 'und', 'www'
+))
+
+_fulltext_available = None
+
+def fulltext_search_available(cursor):
+    """
+    Checks once per worker whether the FULLTEXT index from
+    migrations/add_fulltext_index.py exists, so searches keep working (via LIKE)
+    on databases that have not been migrated yet.
+    """
+    global _fulltext_available
+    if _fulltext_available is None:
+        cursor.execute("""
+            SELECT COUNT(*) as count FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND INDEX_TYPE = 'FULLTEXT'
+        """)
+        _fulltext_available = cursor.fetchone()['count'] > 0
+        if not _fulltext_available:
+            app.logger.warning("No FULLTEXT index on businesses; search falls back to LIKE")
+    return _fulltext_available
+
+def build_search_filter(search_term, like_columns, use_fulltext):
+    """
+    Translates a user search term into WHERE clauses.
+
+    With full-text enabled, every word becomes a required prefix term
+    (+word*) of a MATCH ... AGAINST boolean query. Terms that already contain
+    boolean operators are passed through untouched. Words shorter than
+    innodb_ft_min_token_size are not in the index, so each of them is matched
+    with LIKE instead; if no indexable word is left the whole term falls back
+    to LIKE.
+    Returns (clauses, params, relevance_sql, relevance_params).
+    """
+    def like_clause(value):
+        param = f"%{value}%"
+        clause = "(" + " OR ".join(f"{column} LIKE %s" for column in like_columns) + ")"
+        return clause, [param] * len(like_columns)
+
+    match_sql = f"MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)"
+
+    if use_fulltext:
+        if FULLTEXT_OPERATORS & set(search_term):
+            return [match_sql], [search_term], f"{match_sql} AS _relevance", [search_term]
+
+        words = re.findall(r"\w+", search_term.lower())
+        indexed = [word for word in words if len(word) >= FULLTEXT_MIN_TOKEN_SIZE and word not in INNODB_STOPWORDS]
+        short = [word for word in words if len(word) < FULLTEXT_MIN_TOKEN_SIZE and word not in INNODB_STOPWORDS]
+
+        if indexed:
+            against = " ".join(f"+{word}*" for word in indexed)
+            clauses, params = [match_sql], [against]
+            for word in short:
+                clause, clause_params = like_clause(word)
+                clauses.append(clause)
+                params.extend(clause_params)
+            return clauses, params, f"{match_sql} AS _relevance", [against]
+
+    clause, params = like_clause(search_term)
+    return [clause], params, None, []
+
+def build_search_indexes():
+    """
+    Loads every business into this worker's in-memory search and suggestion indexes.
+    """
+    try:
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute("SELECT NOW() as now")
+            synced_at = cursor.fetchone()['now']
+            cursor.execute("SELECT * FROM businesses")
+            rows = cursor.fetchall()
+        search_index.build(rows, synced_at=synced_at)
+        suggest_index.build(rows)
+        fuzzy_index.build(rows)
+        app.logger.info(f"Search indexes built: {search_index.stats()}, {suggest_index.stats()}, {fuzzy_index.stats()}")
+    except DBError as err:
+        app.logger.error(f"Failed to build search indexes, search falls back to SQL: {err}")
+
+def sync_search_indexes():
+    """
+    Applies writes made by other workers to the in-memory indexes when a sync
+    is due. Runs on the index sync thread, never on a request thread.
+    """
+    if not search_index.sync_due():
+        return
+    try:
+        with db_cursor(dictionary=True) as (connection, cursor):
+            changed, removed_ids = search_index.sync(cursor)
+        for row in changed:
+            suggest_index.upsert(row)
+            fuzzy_index.upsert(row)
+        for business_id in removed_ids:
+            suggest_index.remove(business_id)
+            fuzzy_index.remove(business_id)
+    except DBError as err:
+        app.logger.error(f"Search index sync failed, serving possibly stale results: {err}")
+
+def run_search_index_sync():
+    while True:
+        time.sleep(SEARCH_INDEX_SYNC_INTERVAL)
+        try:
+            sync_search_indexes()
+        except Exception as err:
+            app.logger.error(f"Search index sync failed: {err}")
+
+_index_sync_pid = None
+_index_sync_lock = threading.Lock()
+
+def start_search_index_sync():
+    """
+    Starts the index sync thread once per process, from the first request so
+    the thread belongs to the gunicorn worker, not the master.
+    """
+    global _index_sync_pid
+    if _index_sync_pid == os.getpid():
+        return
+    with _index_sync_lock:
+        if _index_sync_pid == os.getpid():
+            return
+        _index_sync_pid = os.getpid()
+        threading.Thread(target=run_search_index_sync, name="search-index-sync", daemon=True).start()
+
+def on_businesses_changed(changed_ids=(), deleted_ids=()):
+    """
+    Called after every committed write to the businesses table so derived
+    data (cached counts and responses, the search indexes) is refreshed. changed_ids are
+    re-read and re-indexed; deleted_ids are dropped from the index.
+    """
+    count_cache.invalidate()
+    featured_pool.invalidate()
+    response_cache.invalidate('businesses')
+    data_version.invalidate()
+    event_hub.publish('businesses_changed', {
+        'changed': [business_id for business_id in changed_ids if business_id],
+        'deleted': list(deleted_ids),
+    })
+
+    for business_id in deleted_ids:
+        search_index.remove(business_id)
+        suggest_index.remove(business_id)
+        fuzzy_index.remove(business_id)
+
+    changed_ids = [business_id for business_id in changed_ids if business_id]
+    if changed_ids and search_index.ready:
+        try:
+            placeholders = ", ".join(["%s"] * len(changed_ids))
+            with db_cursor(dictionary=True) as (connection, cursor):
+                cursor.execute(f"SELECT * FROM businesses WHERE id IN ({placeholders})", tuple(changed_ids))
+                for row in cursor.fetchall():
+                    search_index.upsert(row)
+                    suggest_index.upsert(row)
+                    fuzzy_index.upsert(row)
+        except DBError as err:
+            # The periodic sync will pick the change up
+            app.logger.error(f"Failed to update search index: {err}")
+
 # --- Admin User Model (Database-backed) ---
 class Admin(UserMixin):
     def __init__(self, id, username):
@@ -93,33 +635,23 @@ class Admin(UserMixin):
 
     @staticmethod
     def get_by_id(user_id):
-        connection = get_db_connection()
-        if not connection:
-            return None
         try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT id, username FROM admins WHERE id = %s", (user_id,))
-            user_data = cursor.fetchone()
+            with db_cursor(dictionary=True) as (connection, cursor):
+                cursor.execute("SELECT id, username FROM admins WHERE id = %s", (user_id,))
+                user_data = cursor.fetchone()
             if user_data:
                 return Admin(id=user_data['id'], username=user_data['username'])
             return None
         except DBError as err:
             app.logger.error(f"Error fetching admin by ID: {err}")
             return None
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
 
     @staticmethod
     def get_by_username(username):
-        connection = get_db_connection()
-        if not connection:
-            return None
         try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT id, username, password_hash FROM admins WHERE username = %s", (username,))
-            user_data = cursor.fetchone()
+            with db_cursor(dictionary=True) as (connection, cursor):
+                cursor.execute("SELECT id, username, password_hash FROM admins WHERE username = %s", (username,))
+                user_data = cursor.fetchone()
             if user_data:
                 # Return full data including hash for login check
                 return user_data
@@ -127,10 +659,6 @@ class Admin(UserMixin):
         except DBError as err:
             app.logger.error(f"Error fetching admin by username: {err}")
             return None
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -145,50 +673,70 @@ def unauthorized():
 with app.app_context():
     print("Initializing database for admin users...")
     create_admin_table()
+    create_categories_table()
     create_businesses_table() # Create businesses table
+    create_daily_rollups_table()
+    create_image_jobs_table()
+    create_image_store_tables()
     seed_initial_admins(bcrypt) # Pass the bcrypt instance
     print("Admin database initialization complete.")
+    build_search_indexes()
 
-# Variable to ensure table creation happens only once
+@app.before_request
+def start_background_threads():
+    # No-op after the first request in each worker process
+    image_queue.start()
+    start_search_index_sync()
+
+# Variable to ensure table creation is attempted only once per worker
 _tables_created = False
 
 @app.before_request
 def create_tables():
     global _tables_created
     if not _tables_created:
-        connection = get_db_connection()
-        if not connection:
-            app.logger.error("Database connection failed during table creation")
-            return
+        # Set before trying: a failure (e.g. no TRIGGER privilege) is logged once, not on every request
+        _tables_created = True
         try:
-            cursor = connection.cursor()
-            query = """
-                CREATE TABLE IF NOT EXISTS business_applications (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    business_name VARCHAR(255) NOT NULL,
-                    location VARCHAR(255) NOT NULL,
-                    category VARCHAR(100) NOT NULL,
-                    contact_name VARCHAR(100),
-                    tel VARCHAR(20) NOT NULL,
-                    email VARCHAR(255) NOT NULL,
-                    website VARCHAR(255),
-                    description TEXT,
-                    image_url VARCHAR(255),
-                    application_type ENUM('new', 'edit') DEFAULT 'new',
-                    business_id INT NULL,
-                    status ENUM('pending', 'approved', 'rejected') DEFAULT 'pending',
-                    submitted_at DATETIME NOT NULL
-                )
-            """
-            cursor.execute(query)
-            connection.commit()
+            with db_cursor() as (connection, cursor):
+                query = """
+                    CREATE TABLE IF NOT EXISTS business_applications (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        business_name VARCHAR(255) NOT NULL,
+                        location VARCHAR(255) NOT NULL,
+                        category VARCHAR(100) NOT NULL,
+                        contact_name VARCHAR(100),
+                        tel VARCHAR(20) NOT NULL,
+                        email VARCHAR(255) NOT NULL,
+                        website VARCHAR(255),
+                        description TEXT,
+                        image_url VARCHAR(255),
+                        image_variants JSON NULL,
+                        application_type ENUM('new', 'edit') DEFAULT 'new',
+                        business_id INT NULL,
+                        status ENUM('pending', 'approved', 'rejected') DEFAULT 'pending',
+                        submitted_at DATETIME NOT NULL,
+                        INDEX idx_applications_status_submitted (status, submitted_at),
+                        INDEX idx_applications_submitted (submitted_at)
+                    )
+                """
+                cursor.execute(query)
+                connection.commit()
             app.logger.info("business_applications table created or already exists")
-            _tables_created = True
         except DBError as err:
-            app.logger.error(f"Database error when creating tables: {err}")
-        finally:
-            cursor.close()
-            connection.close()
+            # raise_on_warnings also raises the 'already exists' note (1050), which is no error
+            if err.errno == 1050:
+                app.logger.info("business_applications table already exists")
+            else:
+                app.logger.error(f"Database error when creating tables: {err}")
+        # The applications rollup and image reference triggers can only be created once the table exists
+        try:
+            with db_cursor() as (connection, cursor):
+                create_rollup_triggers(cursor)
+                create_image_ref_triggers(cursor)
+                connection.commit()
+        except DBError as err:
+            app.logger.error(f"Database error when creating triggers, restart the worker once fixed: {err}")
 
 # --- Admin API Endpoints ---
 @app.route('/api/admin/login', methods=['POST'])
@@ -240,97 +788,153 @@ def update_admin_password():
     if len(new_password) < 8:
         return jsonify({"error": "New password must be at least 8 characters"}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get current admin's password hash
-        cursor.execute("SELECT password_hash FROM admins WHERE id = %s", (current_user.id,))
-        admin_data = cursor.fetchone()
-        
-        if not admin_data:
-            return jsonify({"error": "Admin not found"}), 404
-        
-        # Verify current password
-        if not bcrypt.check_password_hash(admin_data['password_hash'], current_password):
-            return jsonify({"error": "Current password is incorrect"}), 401
-        
-        # Hash new password and update
-        new_password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
-        cursor.execute("UPDATE admins SET password_hash = %s WHERE id = %s", (new_password_hash, current_user.id))
-        connection.commit()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Get current admin's password hash
+            cursor.execute("SELECT password_hash FROM admins WHERE id = %s", (current_user.id,))
+            admin_data = cursor.fetchone()
+
+            if not admin_data:
+                return jsonify({"error": "Admin not found"}), 404
+
+            # Verify current password
+            if not bcrypt.check_password_hash(admin_data['password_hash'], current_password):
+                return jsonify({"error": "Current password is incorrect"}), 401
+
+            # Hash new password and update
+            new_password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+            cursor.execute("UPDATE admins SET password_hash = %s WHERE id = %s", (new_password_hash, current_user.id))
+            connection.commit()
+
         return jsonify({"message": "Password updated successfully"}), 200
-        
+
     except DBError as err:
         app.logger.error(f"Database error when updating password: {err}")
         return jsonify({"error": "Failed to update password"}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@login_required
+def get_admin_metrics():
+    """
+    Live runtime metrics for this worker (database pool usage).
+    """
+    # Queue depth and stored images are read on the request's own connection
+    with db_cursor() as (connection, cursor):
+        image_queue_stats = image_queue.stats(cursor)
+        image_store_stats = image_store.stats(cursor)
+    return jsonify({
+        "pid": os.getpid(),
+        "db_pool": get_pool_stats(),
+        "count_cache": count_cache.stats(),
+        "search_index": search_index.stats(),
+        "suggest_index": suggest_index.stats(),
+        "fuzzy_index": fuzzy_index.stats(),
+        "featured_pool": featured_pool.stats(),
+        "response_cache": response_cache.stats(),
+        "data_version": data_version.stats(),
+        "event_hub": event_hub.stats(),
+        "image_queue": image_queue_stats,
+        "image_store": image_store_stats
+    }), 200
+
+
+@app.route('/api/events', methods=['GET'])
+@login_required
+def stream_events():
+    """
+    Server-sent events for admin pages: application_submitted,
+    application_updated and businesses_changed. Needs a threaded or async
+    gunicorn worker class, since every open stream holds a worker thread.
+    """
+    subscription = event_hub.subscribe()
+    if subscription is None:
+        return jsonify({"error": "Too many open event streams, try again later"}), 503
+
+    # The login check used the request's database connection; the stream must not hold it
+    release_request_connection(None)
+
+    response = Response(event_hub.stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx must not buffer the stream
+    return response
 
 
 @app.route('/api/businesses', methods=['GET'])
+@conditional_get()
+@cached_response('businesses', when=is_first_page)
 def get_businesses():
     """
     Get all businesses, optionally filtered by category and/or a search term.
+
+    Pagination is either offset based (?offset=N) or keyset based (?cursor=...).
+    Pass an empty cursor for the first page, then the returned next_cursor;
+    a cursor page seeks straight past the previous page's last row instead of
+    scanning and discarding every earlier row.
+
+    include_total=false skips the total count; has_more tells whether another
+    page exists either way.
+
+    view=card or fields=a,b,c selects only those columns.
+
+    q is matched through the FULLTEXT index (mode=like forces the old LIKE scan).
+    Results stay in name order so cursors remain stable.
     """
     category = request.args.get('category', '')
     search_term = request.args.get('q', '')  # New search term parameter
     limit = request.args.get('limit', 20, type=int)
     offset = request.args.get('offset', 0, type=int)
+    page_cursor = request.args.get('cursor')
+    include_total = parse_bool_arg('include_total', True)
+    search_mode = request.args.get('mode', SEARCH_MODE)
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
+    seek_after = None
     try:
-        cursor = connection.cursor(dictionary=True)
+        columns = parse_fields_arg()
+        if page_cursor:
+            seek_after = decode_page_cursor(page_cursor)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
 
-        query_parts = ["SELECT * FROM businesses"]
+    try:
         where_clauses = []
-        params_for_data = [] # Parameters for the main data query
-        params_for_count = [] # Parameters for the count query
+        params = []
 
         if category:
-            where_clauses.append("category = %s")
-            params_for_data.append(category)
-            params_for_count.append(category)
-
-        if search_term:
-            search_param = f"%{search_term}%"
-            where_clauses.append("(business_name LIKE %s OR description LIKE %s)")
-            params_for_data.extend([search_param, search_param])
-            params_for_count.extend([search_param, search_param])
-
-        if where_clauses:
-            query_parts.append("WHERE " + " AND ".join(where_clauses))
-
-        # Construct and execute the count query first
-        count_query_sql = "SELECT COUNT(*) as total FROM businesses"
-        if where_clauses:
-            count_query_sql += " WHERE " + " AND ".join(where_clauses)
-
-        cursor.execute(count_query_sql, tuple(params_for_count))
-        total = cursor.fetchone()['total']
+            # Integer lookup on category_id; the subquery is a single unique-key read
+            where_clauses.append("category_id = (SELECT id FROM categories WHERE name = %s)")
+            params.append(category)
+
+        # Keyset seek, served by the (business_name, id) / (category_id, business_name, id) indexes
+        seek_clause = "(business_name, id) > (%s, %s)" if seek_after else None
+
+        with db_cursor(dictionary=True) as (connection, cursor):
+            if search_term:
+                use_fulltext = search_mode == 'fulltext' and fulltext_search_available(cursor)
+                search_clauses, search_params, _, _ = build_search_filter(
+                    search_term, ["business_name", "description"], use_fulltext
+                )
+                where_clauses.extend(search_clauses)
+                params.extend(search_params)
 
-        # Construct and execute the main data query
-        query_parts.append("ORDER BY business_name LIMIT %s OFFSET %s")
-        params_for_data.extend([limit, offset])
+            # id breaks ties between equal names so pages never overlap
+            businesses, has_more, total = fetch_business_page(
+                cursor, where_clauses, params, "business_name, id", limit,
+                offset=0 if page_cursor is not None else offset,
+                seek_clause=seek_clause, seek_params=seek_after or (),
+                include_total=include_total,
+                count_key=normalize_filter(endpoint='list', category=category, q=search_term, mode=search_mode),
+                columns=columns
+            )
 
-        main_query_sql = " ".join(query_parts)
-        cursor.execute(main_query_sql, tuple(params_for_data))
-        businesses = cursor.fetchall()
+        next_cursor = encode_page_cursor(businesses[-1]) if has_more else None
 
         return jsonify({
             "businesses": businesses,
             "total": total,
+            "has_more": has_more,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "category_filter": category,
             "search_term": search_term
         })
@@ -338,10 +942,6 @@ def get_businesses():
     except DBError as err:
         app.logger.error(f"Database error: {err}") # Added logging
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses', methods=['POST'])
 @login_required
@@ -364,19 +964,15 @@ def create_business():
         if field not in data or not data[field]:
             return jsonify({"error": f"{field} is required"}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        # Process image if provided
+        # Stage image if provided; image_url is filled in once the image queue has processed it
         image_url = None
+        staged = None
         if image_file:
-            image_url = save_uploaded_file(image_file)
+            staged = stage_uploaded_file(image_file)
         elif 'image_url' in data: # Fallback if image_url is sent directly
              image_url = data['image_url']
 
-        cursor = connection.cursor()
         query = """
             INSERT INTO businesses
             (business_name, category, location, contact_name, tel, email, website, description, image_url, featured)
@@ -394,107 +990,94 @@ def create_business():
             image_url,
             data.get('featured', False)
         )
-        cursor.execute(query, values)
-        connection.commit()
+        with db_cursor() as (connection, cursor):
+            cursor.execute(query, values)
+            business_id = cursor.lastrowid
+            if staged:
+                image_queue.enqueue(cursor, *staged, business_id=business_id)
+            connection.commit()
+        if staged:
+            image_queue.notify()
+        on_businesses_changed(changed_ids=[business_id])
 
-        business_id = cursor.lastrowid
         return jsonify({
             "success": True,
             "message": "Business created successfully",
             "business_id": business_id,
-            "image_url": image_url
+            "image_url": image_url,
+            "image_status": "processing" if staged else None
         }), 201
 
     except DBError as err:
         app.logger.error(f"Database error when creating business: {err}")
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses/featured', methods=['GET'])
+@conditional_get(vary=featured_pool.window)
+@cached_response('businesses', ttl=FEATURED_ROTATION_INTERVAL)
 def get_featured_businesses():
     """
-    Get featured businesses
+    Get featured businesses by name, or a random selection when none is
+    featured. The selection is cached and rotated every
+    FEATURED_ROTATION_INTERVAL seconds.
+    view=card or fields=a,b,c trims the returned columns.
     """
     limit = request.args.get('limit', 6, type=int)
-
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
+        columns = parse_fields_arg()
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
 
-        # Query for featured businesses
-        query = "SELECT * FROM businesses WHERE featured = TRUE ORDER BY business_name LIMIT %s"
-        cursor.execute(query, (limit,))
-        featured = cursor.fetchall()
+    featured = featured_pool.get_cached(limit)
+    if featured is not None:
+        return jsonify(project_rows(featured, columns))
 
-        # If no featured businesses are set, return some random ones
-        if not featured:
-            query = "SELECT * FROM businesses ORDER BY RAND() LIMIT %s"
-            cursor.execute(query, (limit,))
-            featured = cursor.fetchall()
+    try:
+        with db_cursor(dictionary=True) as (connection, cursor):
+            featured = featured_pool.rotate(cursor, limit)
 
-        return jsonify(featured)
+        return jsonify(project_rows(featured, columns))
 
     except DBError as err:
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/categories', methods=['GET'])
+@conditional_get()
+@cached_response('categories', 'businesses')
 def get_categories():
     """
     Get all business categories
     """
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM categories ORDER BY name")
-        categories = cursor.fetchall()
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute("SELECT * FROM categories ORDER BY name")
+            categories = cursor.fetchall()
         return jsonify(categories)
 
     except DBError as err:
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/categories/top', methods=['GET'])
+@conditional_get()
+@cached_response('categories', 'businesses')
 def get_top_categories():
     """
-    Get top categories by business count
+    Get top categories by business count. The counts are maintained by
+    triggers on businesses, so this is an index read on business_count.
     """
     limit = request.args.get('limit', 6, type=int)
 
-    connection = get_db_connection()
-    if not connection:
-        app.logger.error("Database connection failed for top categories")
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Simple query without status filtering since your table doesn't have status column
         query = """
-        SELECT category, COUNT(*) as business_count
-        FROM businesses
-        WHERE category IS NOT NULL AND category != '' AND category != 'NULL'
-        GROUP BY category
+        SELECT name as category, business_count
+        FROM categories
+        WHERE business_count > 0
         ORDER BY business_count DESC
         LIMIT %s
         """
-        cursor.execute(query, (limit,))
-        top_categories = cursor.fetchall()
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute(query, (limit,))
+            top_categories = cursor.fetchall()
 
         # Log the results for debugging
         app.logger.info(f"Found {len(top_categories)} top categories")
@@ -506,117 +1089,140 @@ def get_top_categories():
     except Exception as err:
         app.logger.error(f"Error in get_top_categories: {str(err)}")
         return jsonify({"error": f"Internal server error: {str(err)}"}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/debug/categories', methods=['GET'])
 def debug_categories():
     """
     Debug endpoint to check database structure and category data
     """
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-        debug_info = {}
-
-        # Check table structure
-        cursor.execute("SHOW COLUMNS FROM businesses")
-        columns = cursor.fetchall()
-        debug_info['table_structure'] = columns
-
-        # Check total businesses
-        cursor.execute("SELECT COUNT(*) as total FROM businesses")
-        total = cursor.fetchone()
-        debug_info['total_businesses'] = total['total']
-
-        # Check businesses with categories
-        cursor.execute("SELECT COUNT(*) as count FROM businesses WHERE category IS NOT NULL AND category != '' AND category != 'NULL'")
-        with_categories = cursor.fetchone()
-        debug_info['businesses_with_categories'] = with_categories['count']
-
-        # Sample categories
-        cursor.execute("SELECT DISTINCT category FROM businesses WHERE category IS NOT NULL AND category != '' AND category != 'NULL' LIMIT 10")
-        sample_categories = cursor.fetchall()
-        debug_info['sample_categories'] = sample_categories
-
-        # Check if status column exists and sample values
-        column_names = [col['Field'] for col in columns]
-        if 'status' in column_names:
-            cursor.execute("SELECT DISTINCT status FROM businesses LIMIT 10")
-            statuses = cursor.fetchall()
-            debug_info['available_statuses'] = statuses
-        else:
-            debug_info['available_statuses'] = "No status column found"
+        with db_cursor(dictionary=True) as (connection, cursor):
+            debug_info = {}
+
+            # Check table structure
+            cursor.execute("SHOW COLUMNS FROM businesses")
+            columns = cursor.fetchall()
+            debug_info['table_structure'] = columns
+
+            # Check total businesses
+            cursor.execute("SELECT COUNT(*) as total FROM businesses")
+            total = cursor.fetchone()
+            debug_info['total_businesses'] = total['total']
+
+            # Check businesses with categories
+            cursor.execute("SELECT COUNT(*) as count FROM businesses WHERE category IS NOT NULL AND category != '' AND category != 'NULL'")
+            with_categories = cursor.fetchone()
+            debug_info['businesses_with_categories'] = with_categories['count']
+
+            # Sample categories
+            cursor.execute("SELECT DISTINCT category FROM businesses WHERE category IS NOT NULL AND category != '' AND category != 'NULL' LIMIT 10")
+            sample_categories = cursor.fetchall()
+            debug_info['sample_categories'] = sample_categories
+
+            # Check if status column exists and sample values
+            column_names = [col['Field'] for col in columns]
+            if 'status' in column_names:
+                cursor.execute("SELECT DISTINCT status FROM businesses LIMIT 10")
+                statuses = cursor.fetchall()
+                debug_info['available_statuses'] = statuses
+            else:
+                debug_info['available_statuses'] = "No status column found"
 
         return jsonify(debug_info)
 
     except Exception as err:
         return jsonify({"error": f"Debug error: {str(err)}"}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+@app.route('/api/businesses/suggest', methods=['GET'])
+def suggest_businesses():
+    """
+    Typeahead completions over business names, categories and cities,
+    served from memory and ranked by popularity.
+    """
+    prefix = request.args.get('prefix', '')
+    limit = min(request.args.get('limit', DEFAULT_SUGGESTION_LIMIT, type=int), 25)
+
+    return jsonify({
+        "prefix": prefix,
+        "suggestions": suggest_index.suggest(prefix, limit=limit)
+    })
+
+def search_from_index(search_term, limit, offset, include_total, fuzzy=False, columns=None):
+    """
+    Answers a search from this worker's in-memory indexes. With fuzzy, or
+    when an exact search finds nothing and SEARCH_FUZZY_FALLBACK is on, the
+    trigram index matches misspelled words; "fuzzy" in the response says so.
+    """
+    if not fuzzy:
+        total, results = search_index.search(search_term, limit=limit, offset=offset)
+        fuzzy = total == 0 and offset == 0 and SEARCH_FUZZY_FALLBACK
+    if fuzzy:
+        total, results = fuzzy_index.search(search_term, limit=limit, offset=offset)
+    return jsonify({
+        "businesses": project_rows(results, columns),
+        "total": total if include_total else None,
+        "has_more": offset + len(results) < total,
+        "limit": limit,
+        "offset": offset,
+        "fuzzy": fuzzy
+    })
 
 @app.route('/api/businesses/search', methods=['GET'])
 def search_businesses():
     """
-    Search businesses by name, description, or category
+    Search businesses by name, description, or category.
+
+    Served from the in-memory BM25 index by default (mode=index); the last
+    word is treated as a prefix so results follow the user's typing.
+    mode=fulltext uses the MySQL FULLTEXT index with relevance ordering and
+    boolean operators (+required -excluded "exact phrase" prefix*);
+    mode=like forces the old LIKE scan in name order.
+    mode=fuzzy tolerates typos ('plumbng', 'resturant') by matching words
+    through a trigram index and ranking them by edit distance.
+    view=card or fields=a,b,c selects only those columns.
     """
     search_term = request.args.get('q', '')
     limit = request.args.get('limit', 20, type=int)
     offset = request.args.get('offset', 0, type=int)
+    include_total = parse_bool_arg('include_total', True)
+    search_mode = request.args.get('mode', SEARCH_ENDPOINT_MODE)
 
     if not search_term:
         return jsonify({"error": "Search term is required"}), 400
+    try:
+        columns = parse_fields_arg()
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
+    if search_mode in ('index', 'fuzzy'):
+        if search_index.ready:
+            return search_from_index(search_term, limit, offset, include_total, fuzzy=search_mode == 'fuzzy', columns=columns)
+        search_mode = SEARCH_MODE
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Search query with LIKE for partial matches
-        search_param = f"%{search_term}%"
-        query = """
-        SELECT * FROM businesses
-        WHERE business_name LIKE %s
-        OR description LIKE %s
-        OR category LIKE %s
-        ORDER BY business_name
-        LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (search_param, search_param, search_param, limit, offset))
-        results = cursor.fetchall()
-
-        # Get total count for pagination
-        count_query = """
-        SELECT COUNT(*) as total FROM businesses
-        WHERE business_name LIKE %s
-        OR description LIKE %s
-        OR category LIKE %s
-        """
-        cursor.execute(count_query, (search_param, search_param, search_param))
-        total = cursor.fetchone()['total']
+        with db_cursor(dictionary=True) as (connection, cursor):
+            use_fulltext = search_mode == 'fulltext' and fulltext_search_available(cursor)
+            clauses, params, relevance_sql, relevance_params = build_search_filter(
+                search_term, ["business_name", "description", "category"], use_fulltext
+            )
+            order_by = "_relevance DESC, business_name, id" if relevance_sql else "business_name, id"
+            results, has_more, total = fetch_business_page(
+                cursor, clauses, params, order_by, limit, offset=offset,
+                include_total=include_total,
+                count_key=normalize_filter(endpoint='search', q=search_term, mode=search_mode),
+                select_extra=relevance_sql, select_params=relevance_params, columns=columns
+            )
 
         return jsonify({
             "businesses": results,
             "total": total,
+            "has_more": has_more,
             "limit": limit,
             "offset": offset
         })
 
     except DBError as err:
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses/set-featured', methods=['POST'])
 def set_featured_business():
@@ -630,106 +1236,127 @@ def set_featured_business():
     if not business_id:
         return jsonify({"error": "Business ID is required"}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor()
-        query = "UPDATE businesses SET featured = %s WHERE id = %s"
-        cursor.execute(query, (featured, business_id))
-        connection.commit()
+        with db_cursor() as (connection, cursor):
+            query = "UPDATE businesses SET featured = %s WHERE id = %s"
+            cursor.execute(query, (featured, business_id))
+            connection.commit()
+        on_businesses_changed(changed_ids=[business_id])
 
         return jsonify({"success": True, "message": "Featured status updated"})
 
     except DBError as err:
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+
+def parse_date_arg(name, default):
+    """
+    Reads a YYYY-MM-DD query-string date, or raises ValueError.
+    """
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+
+def format_period(period, granularity):
+    if granularity == 'month':
+        return period.strftime('%b')
+    return period.strftime('%b %d')
+
+def growth_series(default_days, default_granularity):
+    """
+    Shared by the analytics endpoints: reads start, end, granularity and
+    category from the query string and returns the rollup series, formatted
+    for the dashboard charts.
+    """
+    today = datetime.date.today()
+    start = parse_date_arg('start', today - datetime.timedelta(days=default_days))
+    end = parse_date_arg('end', today)
+    granularity = request.args.get('granularity', default_granularity)
+    category = request.args.get('category')
+
+    with db_cursor() as (connection, cursor):
+        category_id = None
+        if category:
+            cursor.execute("SELECT id FROM categories WHERE name = %s", (category,))
+            row = cursor.fetchone()
+            category_id = row[0] if row else -1
+        series = query_series(cursor, start, end, granularity, category_id)
+
+    return [{
+        'name': format_period(bucket['period'], granularity),
+        'period': bucket['period'].isoformat(),
+        'count': bucket['businesses_added'],
+        'applications': bucket['applications_received'],
+    } for bucket in series]
 
 @app.route('/api/businesses/new-count', methods=['GET'])
 @login_required
 def get_new_businesses_count():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-
+    """
+    Businesses added in the last `days` days (default 30), from the daily rollups.
+    """
+    days = min(max(request.args.get('days', 30, type=int), 1), 3660)
     try:
-        cursor = connection.cursor()
-        query = """
-            SELECT COUNT(*) as count
-            FROM businesses
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-        """
-        cursor.execute(query)
-        result = cursor.fetchone()
-        return jsonify({'count': result[0]}), 200
+        with db_cursor() as (connection, cursor):
+            cursor.execute(
+                "SELECT COALESCE(SUM(businesses_added), 0) FROM daily_rollups WHERE day > DATE_SUB(CURDATE(), INTERVAL %s DAY)",
+                (days,)
+            )
+            count = int(cursor.fetchone()[0])
+        return jsonify({'count': count}), 200
     except DBError as err:
-        print(f"Database error: {err}")
+        app.logger.error(f"Database error: {err}")
         return jsonify({'error': 'Database error'}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/analytics/monthly-growth', methods=['GET'])
 @login_required
 def get_monthly_growth():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """
+    Businesses added per month over the last six months (the same start,
+    end, granularity and category parameters as /api/analytics/growth apply).
+    """
+    try:
+        return jsonify(growth_series(default_days=183, default_granularity='month'))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    except DBError as err:
+        return jsonify({'error': str(err)}), 500
 
+@app.route('/api/analytics/growth', methods=['GET'])
+@login_required
+def get_growth():
+    """
+    Businesses added and applications received per day, week or month.
+
+    Query parameters: start and end (YYYY-MM-DD, default the last 30 days),
+    granularity ('day', 'week' or 'month', default 'day') and category (name).
+    Read from the daily_rollups table, so the cost depends on the number of
+    days in the range rather than the number of businesses.
+    """
     try:
-        cursor = connection.cursor(dictionary=True)
-        # Get data for the last 6 months using date_added
-        query = """
-            SELECT 
-                DATE_FORMAT(date_added, '%b') as name,
-                COUNT(*) as count,
-                YEAR(date_added) as year,
-                MONTH(date_added) as month
-            FROM businesses 
-            WHERE date_added >= DATE_SUB(NOW(), INTERVAL 6 MONTH)
-            GROUP BY year, month, name
-            ORDER BY year, month
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # Format for frontend
-        data = [{'name': row['name'], 'count': row['count']} for row in results]
-        
-        return jsonify(data)
+        return jsonify(growth_series(default_days=30, default_granularity='day'))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     except DBError as err:
         return jsonify({'error': str(err)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses/<int:id>', methods=['GET'])
 @login_required
 def get_business(id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     try:
-        cursor = connection.cursor(dictionary=True)
-        query = "SELECT * FROM businesses WHERE id = %s"
-        cursor.execute(query, (id,))
-        business = cursor.fetchone()
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = "SELECT * FROM businesses WHERE id = %s"
+            cursor.execute(query, (id,))
+            business = cursor.fetchone()
         if not business:
             return jsonify({"error": "Business not found"}), 404
-        return jsonify(business)
+        return jsonify(decode_image_variants([business])[0])
     except DBError as err:
         app.logger.error(f"Database error when fetching business: {err}")
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses/<int:id>', methods=['PUT'])
 @login_required
@@ -742,96 +1369,93 @@ def update_business(id):
         data = request.get_json() or {}
         file = None
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Fetch existing business to preserve image_url if not updating
-        cursor.execute("SELECT image_url FROM businesses WHERE id = %s", (id,))
-        existing_business = cursor.fetchone()
-        
-        if not existing_business:
-            return jsonify({"error": "Business not found"}), 404
-            
-        new_image_url = existing_business['image_url']
-        
-        # If a new file is uploaded, save it and update the URL
-        if file:
-            saved_path = save_uploaded_file(file)
-            if saved_path:
-                new_image_url = saved_path
-        
-        # Handle featured flag
-        featured = data.get('featured')
-        if isinstance(featured, str):
-            featured = featured.lower() == 'true'
-        elif featured is None:
-            featured = False
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Fetch existing business to preserve image_url if not updating
+            cursor.execute("SELECT image_url FROM businesses WHERE id = %s", (id,))
+            existing_business = cursor.fetchone()
+
+            if not existing_business:
+                return jsonify({"error": "Business not found"}), 404
+
+            new_image_url = existing_business['image_url']
+
+            # A new file replaces the current image once the image queue has processed it
+            staged = stage_uploaded_file(file) if file else None
+
+            # Handle featured flag
+            featured = data.get('featured')
+            if isinstance(featured, str):
+                featured = featured.lower() == 'true'
+            elif featured is None:
+                featured = False
+
+            query = """
+                UPDATE businesses
+                SET business_name = %s, category = %s, location = %s,
+                    contact_name = %s, tel = %s, email = %s,
+                    website = %s, description = %s, image_url = %s, featured = %s,
+                    import_owned = FALSE
+                WHERE id = %s
+            """
+            values = (
+                data.get('business_name'),
+                data.get('category'),
+                data.get('location'),
+                data.get('contact_name', ''),
+                data.get('tel', ''),
+                data.get('email', ''),
+                data.get('website', ''),
+                data.get('description', ''),
+                new_image_url,
+                featured,
+                id
+            )
+            cursor.execute(query, values)
+            if staged:
+                image_queue.enqueue(cursor, *staged, business_id=id)
+            connection.commit()
+        if staged:
+            image_queue.notify()
+        on_businesses_changed(changed_ids=[id])
 
-        query = """
-            UPDATE businesses
-            SET business_name = %s, category = %s, location = %s,
-                contact_name = %s, tel = %s, email = %s,
-                website = %s, description = %s, image_url = %s, featured = %s
-            WHERE id = %s
-        """
-        values = (
-            data.get('business_name'),
-            data.get('category'),
-            data.get('location'),
-            data.get('contact_name', ''),
-            data.get('tel', ''),
-            data.get('email', ''),
-            data.get('website', ''),
-            data.get('description', ''),
-            new_image_url,
-            featured,
-            id
-        )
-        cursor.execute(query, values)
-        connection.commit()
-        
         return jsonify({
             "success": True, 
             "message": "Business updated successfully",
             "image_url": new_image_url,
+            "image_status": "processing" if staged else None,
             "business_id": id
         })
     except DBError as err:
         app.logger.error(f"Database error when updating business: {err}")
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/businesses/<int:id>', methods=['DELETE'])
 @login_required
 def delete_business(id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Step 1: Get the image URL before deleting the record
-        cursor.execute("SELECT image_url FROM businesses WHERE id = %s", (id,))
-        business = cursor.fetchone()
-        
-        if not business:
-            return jsonify({"error": "Business not found"}), 404
-            
-        # Step 2: Delete the record from database
-        cursor.execute("DELETE FROM businesses WHERE id = %s", (id,))
-        connection.commit()
-        
-        # Step 3: Delete the image file if it exists
-        if business['image_url']:
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Step 1: Get the image URL before deleting the record
+            cursor.execute("SELECT image_url, image_variants FROM businesses WHERE id = %s", (id,))
+            business = cursor.fetchone()
+
+            if not business:
+                return jsonify({"error": "Business not found"}), 404
+
+            # Step 2: Delete the record from database
+            cursor.execute("DELETE FROM businesses WHERE id = %s", (id,))
+            connection.commit()
+        on_businesses_changed(deleted_ids=[id])
+
+        # Step 3: Delete the image file if it exists. Content-hashed variants may be shared with other
+        # rows; the delete released this row's references and the image store removes them once unused
+        decode_image_variants([business])
+        for image_url in variant_urls(business['image_url'], business['image_variants']):
+            if is_hashed_filename(os.path.basename(image_url)):
+                continue
             try:
                 # Extract filename from URL (e.g., /uploads/business_images/file.jpg -> file.jpg)
-                filename = os.path.basename(business['image_url'])
+                filename = os.path.basename(image_url)
                 file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 
                 if os.path.exists(file_path):
@@ -850,10 +1474,6 @@ def delete_business(id):
     except DBError as err:
         app.logger.error(f"Database error when deleting business: {err}")
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/business-applications', methods=['POST'])
 def submit_business_application():
@@ -863,16 +1483,17 @@ def submit_business_application():
         data = request.form.to_dict()
         file = request.files.get('business_image')
         
-        # Save uploaded image if present
-        image_url = None
+        # Stage uploaded image if present; the image queue processes it and fills in image_url
+        staged = None
         if file and file.filename:
-            image_url = save_uploaded_file(file)
-            if not image_url:
-                return jsonify({"error": "Invalid file type. Allowed types: png, jpg, jpeg, gif, webp"}), 400
+            staged = stage_uploaded_file(file)
+            if not staged:
+                return jsonify({"error": f"Invalid image. Allowed types: png, jpg, jpeg, gif, webp, up to {IMAGE_MAX_PIXELS // 1000000} megapixels"}), 400
     else:
         # Handle JSON data (backward compatibility)
         data = request.get_json()
-        image_url = None
+        staged = None
+    image_url = None
     
     # Validate required fields
     required_fields = ['businessName', 'location', 'category', 'tel', 'email']
@@ -880,12 +1501,7 @@ def submit_business_application():
         if field not in data or not data[field]:
             return jsonify({"error": f"{field} is required"}), 400
     
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
     try:
-        cursor = connection.cursor()
         query = """
             INSERT INTO business_applications
             (business_name, location, category, contact_name, tel, email, website, description, image_url, application_type, business_id, status, submitted_at)
@@ -905,32 +1521,59 @@ def submit_business_application():
             data.get('businessId'),
             'pending'
         )
-        cursor.execute(query, values)
-        connection.commit()
-        application_id = cursor.lastrowid
+        with db_cursor() as (connection, cursor):
+            cursor.execute(query, values)
+            application_id = cursor.lastrowid
+            if staged:
+                image_queue.enqueue(cursor, *staged, application_id=application_id)
+            connection.commit()
+        if staged:
+            image_queue.notify()
+        event_hub.publish('application_submitted', {
+            'id': application_id,
+            'businessName': data.get('businessName'),
+            'applicationType': data.get('applicationType', 'new'),
+        })
         return jsonify({
             "success": True,
             "message": "Business application submitted successfully",
             "application_id": application_id,
-            "image_url": image_url
+            "image_url": image_url,
+            "image_status": "processing" if staged else None
         }), 201
     except DBError as err:
         app.logger.error(f"Database error when submitting business application: {err}")
         return jsonify({"error": "Database error occurred"}), 500
-    finally:
-        connection.close()
 
 
 @app.route('/api/business-applications', methods=['GET'])
 @login_required
 def get_business_applications():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    try:
-        cursor = connection.cursor(dictionary=True)
-        requested_status = request.args.get('status')
+    """
+    Applications, newest first, optionally filtered by status.
+
+    With limit and/or cursor the response is a page:
+    {"applications": [...], "has_more": bool, "next_cursor": str|null};
+    pass the returned next_cursor to continue. The seek on
+    (submitted_at, id) is served by the (status, submitted_at) and
+    (submitted_at) indexes, so a page costs the same however many
+    applications exist. Without either parameter every matching
+    application is returned as a bare list, as before.
+    """
+    requested_status = request.args.get('status')
+    page_cursor = request.args.get('cursor')
+    paginated = 'limit' in request.args or page_cursor is not None
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+
+    seek_after = None
+    if page_cursor:
+        try:
+            seek_after = decode_application_cursor(page_cursor)
+        except ValueError as err:
+            return jsonify({"error": str(err)}), 400
 
+    try:
+        where_clauses = []
         query_params = []
         base_query = """
             SELECT id, business_name as businessName, location, category, contact_name as contactName, tel, email,
@@ -939,22 +1582,56 @@ def get_business_applications():
         """
 
         if requested_status:
-            base_query += " WHERE status = %s"
+            where_clauses.append("status = %s")
             query_params.append(requested_status)
+        if seek_after:
+            where_clauses.append("(submitted_at, id) < (%s, %s)")
+            query_params.extend(seek_after)
+        if where_clauses:
+            base_query += " WHERE " + " AND ".join(where_clauses)
+
+        # id breaks ties between applications submitted in the same second
+        base_query += " ORDER BY submitted_at DESC, id DESC"
+        if paginated:
+            base_query += " LIMIT %s"
+            query_params.append(limit + 1)
 
-        base_query += " ORDER BY submitted_at DESC"
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute(base_query, tuple(query_params))
+            applications = cursor.fetchall()
 
-        cursor.execute(base_query, tuple(query_params))
-        applications = cursor.fetchall()
-        return jsonify(applications), 200
+        if not paginated:
+            return jsonify(applications), 200
+
+        has_more = len(applications) > limit
+        applications = applications[:limit]
+        return jsonify({
+            "applications": applications,
+            "has_more": has_more,
+            "next_cursor": encode_application_cursor(applications[-1]) if has_more else None
+        }), 200
     except DBError as err:
         app.logger.error(f"Database error when fetching business applications: {err}")
         return jsonify({"error": "Database error occurred"}), 500
-    finally:
-        if connection and connection.is_connected():
-            if cursor: # Ensure cursor exists before trying to close
-                cursor.close()
-            connection.close()
+
+@app.route('/api/business-applications/counts', methods=['GET'])
+@login_required
+def get_business_application_counts():
+    """
+    Number of applications per status, for the admin badges that poll it.
+    A covering aggregate over the (status, submitted_at) index; no rows are read.
+    """
+    try:
+        with db_cursor() as (connection, cursor):
+            cursor.execute("SELECT status, COUNT(*) FROM business_applications GROUP BY status")
+            counts = {"pending": 0, "approved": 0, "rejected": 0}
+            for status, count in cursor.fetchall():
+                counts[status] = count
+        counts["total"] = sum(counts.values())
+        return jsonify(counts), 200
+    except DBError as err:
+        app.logger.error(f"Database error when counting business applications: {err}")
+        return jsonify({"error": "Database error occurred"}), 500
 
 @app.route('/api/business-applications/<int:id>/status', methods=['PUT'])
 @login_required
@@ -965,95 +1642,129 @@ def update_business_application_status(id):
     if not new_status or new_status not in ['approved', 'rejected', 'pending']:
         return jsonify({"error": "Invalid status provided. Must be 'approved', 'rejected', or 'pending'."}), 400
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    cursor = None
+    approved_business_id = None
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Fetch the full application data
-        cursor.execute("SELECT * FROM business_applications WHERE id = %s", (id,))
-        application = cursor.fetchone()
-        if not application:
-            return jsonify({"error": "Application not found"}), 404
-
-        # If approving, create or update a business entry
-        if new_status == 'approved':
-            if application.get('application_type') == 'edit' and application.get('business_id'):
-                # Update existing business
-                update_query = """
-                    UPDATE businesses
-                    SET business_name = %s, category = %s, location = %s,
-                        contact_name = %s, tel = %s, email = %s,
-                        website = %s, description = %s, image_url = COALESCE(%s, image_url)
-                    WHERE id = %s
-                """
-                # For edits, only update image_url if a new one was provided
-                update_values = (
-                    application.get('business_name'),
-                    application.get('category'),
-                    application.get('location'),
-                    application.get('contact_name', ''),
-                    application.get('tel', ''),
-                    application.get('email', ''),
-                    application.get('website', ''),
-                    application.get('description', ''),
-                    application.get('image_url'),
-                    application.get('business_id')
-                )
-                cursor.execute(update_query, update_values)
-                app.logger.info(f"Business {application.get('business_id')} updated from application {id}")
-            else:
-                # Insert into businesses table with all fields including image_url
-                insert_query = """
-                    INSERT INTO businesses
-                    (business_name, category, location, contact_name, tel, email, website, description, image_url, featured)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                business_values = (
-                    application.get('business_name'),
-                    application.get('category'),
-                    application.get('location'),
-                    application.get('contact_name', ''),
-                    application.get('tel', ''),
-                    application.get('email', ''),
-                    application.get('website', ''),
-                    application.get('description', ''),
-                    application.get('image_url', None),  # Include the image_url
-                    False  # featured defaults to False
-                )
-                cursor.execute(insert_query, business_values)
-                app.logger.info(f"Business created from application {id} with image_url: {application.get('image_url')}")
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Fetch the full application data
+            cursor.execute("SELECT * FROM business_applications WHERE id = %s", (id,))
+            application = cursor.fetchone()
+            if not application:
+                return jsonify({"error": "Application not found"}), 404
+
+            # If approving, create or update a business entry
+            if new_status == 'approved':
+                # An image still in the image queue is attached to the business when its job completes
+                image_job = image_queue.lock_latest_job(cursor, id)
+                if image_job and image_job['status'] == 'done':
+                    application['image_url'] = image_job['image_url']
+                    application['image_variants'] = image_job['image_variants']
+                if application.get('application_type') == 'edit' and application.get('business_id'):
+                    # Update existing business
+                    update_query = """
+                        UPDATE businesses
+                        SET business_name = %s, category = %s, location = %s,
+                            contact_name = %s, tel = %s, email = %s,
+                            website = %s, description = %s, image_url = COALESCE(%s, image_url),
+                            image_variants = IF(%s IS NULL, image_variants, %s),
+                            import_owned = FALSE
+                        WHERE id = %s
+                    """
+                    # For edits, only update image_url if a new one was provided
+                    update_values = (
+                        application.get('business_name'),
+                        application.get('category'),
+                        application.get('location'),
+                        application.get('contact_name', ''),
+                        application.get('tel', ''),
+                        application.get('email', ''),
+                        application.get('website', ''),
+                        application.get('description', ''),
+                        application.get('image_url'),
+                        application.get('image_url'),
+                        application.get('image_variants'),
+                        application.get('business_id')
+                    )
+                    cursor.execute(update_query, update_values)
+                    approved_business_id = application.get('business_id')
+                    app.logger.info(f"Business {application.get('business_id')} updated from application {id}")
+                else:
+                    # Insert into businesses table with all fields including image_url
+                    insert_query = """
+                        INSERT INTO businesses
+                        (business_name, category, location, contact_name, tel, email, website, description, image_url, image_variants, featured)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                    business_values = (
+                        application.get('business_name'),
+                        application.get('category'),
+                        application.get('location'),
+                        application.get('contact_name', ''),
+                        application.get('tel', ''),
+                        application.get('email', ''),
+                        application.get('website', ''),
+                        application.get('description', ''),
+                        application.get('image_url', None),  # Include the image_url
+                        application.get('image_variants'),
+                        False  # featured defaults to False
+                    )
+                    cursor.execute(insert_query, business_values)
+                    approved_business_id = cursor.lastrowid
+                    app.logger.info(f"Business created from application {id} with image_url: {application.get('image_url')}")
+
+                if image_job and image_job['status'] in ('pending', 'processing'):
+                    image_queue.attach_business(cursor, image_job['id'], approved_business_id)
+
+            # Update the application status
+            query = "UPDATE business_applications SET status = %s WHERE id = %s"
+            cursor.execute(query, (new_status, id))
+            connection.commit()
 
-        # Update the application status
-        query = "UPDATE business_applications SET status = %s WHERE id = %s"
-        cursor.execute(query, (new_status, id))
-        connection.commit()
+            if cursor.rowcount == 0:
+                return jsonify({"error": "Application not found or status not changed"}), 404
 
-        if cursor.rowcount == 0:
-            return jsonify({"error": "Application not found or status not changed"}), 404
+        if new_status == 'approved':
+            on_businesses_changed(changed_ids=[approved_business_id])
+        event_hub.publish('application_updated', {'id': id, 'status': new_status})
 
         return jsonify({"success": True, "message": f"Application {id} status updated to {new_status}"}), 200
 
     except DBError as err:
+        # The pool rolls back any uncommitted transaction when the connection is returned
         app.logger.error(f"Database error when updating application status: {err}")
-        connection.rollback()
         return jsonify({"error": str(err)}), 500
-    finally:
-        if connection and connection.is_connected():
-            if cursor:
-                cursor.close()
-            connection.close()
 
 # --- Serve Uploaded Images ---
 @app.route('/uploads/business_images/<filename>')
 def serve_business_image(filename):
     """
-    Serve uploaded business images
+    Serve uploaded business images.
+
+    Content-hashed names are cached as immutable for IMAGE_MAX_AGE. In the
+    default 'flask' mode send_from_directory answers If-None-Match and Range
+    requests itself; in 'x-accel' / 'x-sendfile' mode the response only names
+    the file and the front proxy sends it (with its own ETag and Range
+    handling), so no worker streams image bytes.
     """
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    filename = secure_filename(filename)
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not filename or not os.path.isfile(file_path):
+        return jsonify({"error": "Image not found"}), 404
+
+    if is_hashed_filename(filename):
+        cache_control = f"public, max-age={IMAGE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"public, max-age={IMAGE_LEGACY_MAX_AGE}"
+
+    if IMAGE_SERVE_MODE == 'x-accel':
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{IMAGE_ACCEL_PREFIX}{filename}"
+    elif IMAGE_SERVE_MODE == 'x-sendfile':
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Sendfile'] = file_path
+    else:
+        response = send_from_directory(app.config['UPLOAD_FOLDER'], filename, conditional=True, etag=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,199 @@
+"""
+Benchmark: peak memory and milliseconds per uploaded image, for the original
+single-file save_uploaded_file, the first variant pipeline (full decode,
+then copy and thumbnail per width) and the bounded pipeline in
+image_pipeline.py (pixel budget, JPEG draft decoding, full-size bitmap freed
+after the first resize).
+
+Synthetic uploads are generated into a temporary directory: camera-sized
+JPEGs, a large transparent PNG and a small PNG over IMAGE_MAX_PIXELS
+(a decompression bomb in miniature). Each upload is processed in a fresh
+subprocess so its peak RSS (VmHWM, minus the RSS after imports) belongs to
+that upload alone. Encoded files are discarded, nothing is written to
+uploads/.
+
+Usage: python benchmarks/image_ingest_benchmark.py [--keep DIR]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PATHS = ('legacy', 'variants', 'bounded')
+
+
+def make_uploads(directory):
+    """
+    Writes the synthetic uploads and returns their paths.
+    """
+    uploads = []
+
+    def photo(width, height):
+        # Gradient plus noise compresses like a photo, not like a flat test card
+        base = Image.linear_gradient('L').resize((width, height))
+        noise = Image.effect_noise((width, height), 40)
+        return Image.merge('RGB', (base, noise, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+    for name, (width, height) in (('photo_12mp.jpg', (4000, 3000)), ('photo_24mp.jpg', (6000, 4000))):
+        path = os.path.join(directory, name)
+        photo(width, height).save(path, 'JPEG', quality=92)
+        uploads.append(path)
+
+    path = os.path.join(directory, 'graphic_6mp.png')
+    graphic = photo(3000, 2000).convert('RGBA')
+    graphic.putalpha(Image.linear_gradient('L').resize((3000, 2000)))
+    graphic.save(path, 'PNG')
+    uploads.append(path)
+
+    path = os.path.join(directory, 'bomb_64mp.png')
+    Image.new('L', (8000, 8000)).save(path, 'PNG', optimize=True)
+    uploads.append(path)
+    return uploads
+
+
+def discard(data, ext):
+    return f"{len(data)}{ext}"
+
+
+def ingest_legacy(path):
+    """
+    save_uploaded_file as it was before the image queue: one file, at most 1080px.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    image = Image.open(path)
+    if ext in ['.jpg', '.jpeg'] and image.mode in ('RGBA', 'P'):
+        image = image.convert('RGB')
+    if image.width > 1080 or image.height > 1080:
+        image.thumbnail((1080, 1080), Image.Resampling.LANCZOS)
+    image.save(io.BytesIO(), image.format or 'PNG', optimize=True, quality=85)
+
+
+def ingest_variants(path):
+    """
+    The first variant pipeline: full decode and convert, then copy() and
+    thumbnail() per width, WebP plus a JPEG/PNG fallback for each.
+    """
+    import image_pipeline
+    with Image.open(path) as image:
+        image.seek(0)
+        alpha = image_pipeline.has_alpha(image)
+        image = image.convert('RGBA' if alpha else 'RGB')
+        formats = image_pipeline.modern_formats() + ['png' if alpha else 'jpeg']
+        current = image
+        for width in reversed(image_pipeline.IMAGE_VARIANT_WIDTHS):
+            current = current.copy()
+            current.thumbnail((width, image_pipeline.IMAGE_MAX_DIMENSION), Image.Resampling.LANCZOS)
+            for format_name in formats:
+                pil_format, ext, mime_type, options = image_pipeline.ENCODINGS[format_name]
+                current.save(io.BytesIO(), pil_format, **options)
+
+
+def ingest_bounded(path):
+    import image_pipeline
+    image_pipeline.check_image(path)
+    image_pipeline.process_image(path, discard, '/')
+
+
+def memory_kib(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return None
+
+
+def reset_peak():
+    """
+    Resets VmHWM to the current RSS (Linux 4.0+). ru_maxrss cannot be used:
+    it carries over the parent's peak across fork and exec.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def run_child(path_name, upload):
+    """
+    Processes one upload and prints {peak_mb, ms, error} as JSON.
+    """
+    import image_pipeline  # noqa: F401  imported before the baseline, like in a worker
+    if reset_peak():
+        baseline = memory_kib('VmRSS')
+    else:
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    error = None
+    try:
+        globals()[f"ingest_{path_name}"](upload)
+    except Exception as err:
+        error = f"{type(err).__name__}: {err}"
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = (memory_kib('VmHWM') or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) - baseline  # KiB
+    print(json.dumps({'peak_mb': peak / 1024, 'ms': elapsed, 'error': error}))
+
+
+def measure(path_name, upload):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', path_name, upload],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--keep', help="write the synthetic uploads to this directory and keep them")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if Image is None:
+        print("❌ Pillow is not installed (pip install -r requirements.txt)")
+        return 1
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.keep or scratch
+        os.makedirs(directory, exist_ok=True)
+        uploads = make_uploads(directory)
+
+        print("Peak RSS above the post-import baseline, one subprocess per upload\n")
+        print(f"{'upload':<16} {'file MB':>7} {'pixels':>10} | " + " | ".join(f"{name:>8} MB {'ms':>6}" for name in PATHS))
+        print("-" * 88)
+        for upload in uploads:
+            with Image.open(upload) as image:
+                size = f"{image.width}x{image.height}"
+            columns = []
+            notes = []
+            for path_name in PATHS:
+                result = measure(path_name, upload)
+                columns.append(f"{result['peak_mb']:>11.1f} {result['ms']:>6.0f}")
+                if result['error']:
+                    notes.append(f"{path_name}: {result['error']}")
+            print(f"{os.path.basename(upload):<16} {os.path.getsize(upload) / 1048576:>7.2f} {size:>10} | " + " | ".join(columns))
+            for note in notes:
+                print(f"{'':<16} ↳ {note}")
+
+    print("\nlegacy writes one 1080px file; variants and bounded write every width in every format.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
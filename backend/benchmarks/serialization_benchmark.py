@@ -0,0 +1,160 @@
+"""
+Benchmark: bytes and milliseconds per listing page, before and after the
+orjson provider and response compression (see serialization.py).
+
+"before" reproduces Flask's default provider (json.dumps with sorted keys,
+ASCII escaping and HTTP dates); "after" uses the orjson options the app uses,
+which keep the HTTP dates, then gzip and, when the brotli package is installed, brotli.
+
+Rows are built from parsed_businesses/*.json shaped like SELECT * FROM businesses.
+
+Usage: python benchmarks/serialization_benchmark.py [--repeat N]
+"""
+import argparse
+import datetime
+import decimal
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from email.utils import format_datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGE_SIZES = (20, 100, 500)
+# Same settings as serialization.py, read here so the benchmark runs without Flask
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+
+def load_rows():
+    json_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'parsed_businesses')
+    rows = []
+    added = datetime.datetime(2024, 1, 1, 9, 30)
+    for filename in sorted(os.listdir(json_dir)):
+        if not filename.endswith('.json') or os.path.getsize(os.path.join(json_dir, filename)) <= 4:
+            continue
+        try:
+            with open(os.path.join(json_dir, filename), 'r', encoding='utf-8') as file:
+                businesses = json.load(file)
+        except ValueError:
+            continue
+        for business in businesses if isinstance(businesses, list) else []:
+            rows.append({
+                'id': len(rows) + 1,
+                'business_name': business.get('business_name', ''),
+                'category': business.get('category', ''),
+                'location': business.get('location', ''),
+                'contact_name': business.get('contact_name', ''),
+                'tel': business.get('tel', ''),
+                'email': business.get('email', ''),
+                'website': business.get('website', ''),
+                'description': business.get('description', ''),
+                'image_url': None,
+                'featured': 0,
+                'date_added': added + datetime.timedelta(hours=len(rows)),
+                'updated_at': added + datetime.timedelta(hours=len(rows)),
+            })
+    return rows
+
+
+def flask_default(value):
+    """
+    Flask's DefaultJSONProvider conversions.
+    """
+    if isinstance(value, datetime.date):
+        if not isinstance(value, datetime.datetime) or value.tzinfo is None:
+            value = datetime.datetime(value.year, value.month, value.day, *(value.timetuple()[3:6]), tzinfo=datetime.timezone.utc)
+        return format_datetime(value, usegmt=True)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(type(value).__name__)
+
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def app_default(value):
+    """
+    serialization._default with its http_date, copied so the benchmark runs without Flask.
+    """
+    if isinstance(value, datetime.date):
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime(value.year, value.month, value.day)
+        elif value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return (
+            f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+        )
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(type(value).__name__)
+
+
+def encode_before(payload):
+    return (json.dumps(payload, default=flask_default, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode('utf-8')
+
+
+def encode_after(payload):
+    return orjson.dumps(payload, default=app_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) + b"\n"
+
+
+def measure(function, argument, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("❌ orjson is not installed (pip install orjson)")
+        return 1
+
+    rows = load_rows()
+    print(f"{len(rows)} rows, median of {args.repeat} runs\n")
+    print(f"{'page':>5} | {'before bytes':>12} {'ms':>6} | {'after bytes':>11} {'ms':>6} | {'gzip bytes':>10} {'ms':>6} | {'br bytes':>9} {'ms':>6}")
+    print("-" * 92)
+
+    for size in PAGE_SIZES:
+        page = rows[:size]
+        payload = {"businesses": page, "total": len(rows), "has_more": size < len(rows), "limit": size, "offset": 0}
+
+        before, before_ms = measure(encode_before, payload, args.repeat)
+        after, after_ms = measure(encode_after, payload, args.repeat)
+        gzipped, gzip_ms = measure(lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL), after, args.repeat)
+        if brotli is not None:
+            brotlied, br_ms = measure(lambda body: brotli.compress(body, quality=BROTLI_QUALITY), after, args.repeat)
+            br_columns = f"{len(brotlied):>9} {br_ms + after_ms:>6.2f}"
+        else:
+            br_columns = f"{'n/a':>9} {'':>6}"
+
+        print(
+            f"{len(page):>5} | {len(before):>12} {before_ms:>6.2f} | {len(after):>11} {after_ms:>6.2f} | "
+            f"{len(gzipped):>10} {gzip_ms + after_ms:>6.2f} | {br_columns}"
+        )
+
+    print("\ngzip/br ms include encoding; compression runs only for bodies of at least COMPRESSION_MIN_SIZE bytes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Script to check the query plans of the statements app.py issues.
+
+Every read endpoint is called through Flask's test client against the
+configured database; each SELECT it runs is captured and EXPLAINed with the
+same parameters. The check fails if a plan scans a whole table or index
+(type ALL / index) or sorts with a filesort over more than --threshold
+estimated rows, unless the statement is listed in ACCEPTED_PLANS with the
+reason it is acceptable.
+
+Write endpoints are not called; their statements address rows by primary key.
+
+Usage: python check_query_plans.py [--threshold ROWS] [--verbose]
+Exit status is 1 when a plan fails the check.
+"""
+import argparse
+import os
+import re
+import sys
+
+# Responses must come from the database, not from the caches in front of it
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+os.environ['SEARCH_ENDPOINT_MODE'] = 'fulltext'
+os.environ['DATA_VERSION_TTL'] = '0'
+os.environ['IMAGE_WORKERS'] = '0'  # no background image jobs while checking
+
+import app as app_module  # noqa: E402
+from db_config import db_cursor  # noqa: E402
+
+EXPLAIN_ROW_THRESHOLD = int(os.getenv('EXPLAIN_ROW_THRESHOLD', '100'))
+
+# Statements (regex on the normalized SQL) whose scan or sort is expected, and why
+ACCEPTED_PLANS = {
+    r"^SELECT \* FROM businesses WHERE updated_at >=": "range on idx_businesses_updated_at; reads every row only on the first sync",
+    r"^SELECT id FROM businesses( ORDER BY id)?$": "live id set for the search index sync / featured pool; covered by an index, run at most once per sync interval",
+    r"^SELECT COUNT\(\*\)": "row counts read the smallest index; results are cached (count cache, data version)",
+    r"\(SELECT COUNT\(\*\) FROM businesses": "inline total on a count-cache miss; cached afterwards",
+    r"^SELECT UNIX_TIMESTAMP\(MAX\(updated_at\)\), COUNT\(\*\)": "data version; MAX() is read from idx_businesses_updated_at, COUNT(*) from the smallest index",
+    r"^SELECT \* FROM categories ORDER BY name$": "categories is a small lookup table",
+    r"^SELECT status, COUNT\(\*\) FROM business_applications GROUP BY status$": "covering scan of idx_applications_status_submitted; reads no rows",
+    r"^SELECT id, business_name as businessName.* FROM business_applications( WHERE status = %s)? ORDER BY submitted_at DESC, id DESC$": "unpaginated legacy list; pass limit= to page through it",
+}
+
+# (path, query string) of every read endpoint worth checking
+ENDPOINTS = [
+    ('/api/businesses', {}),
+    ('/api/businesses', {'include_total': 'false'}),
+    ('/api/businesses', {'cursor': ''}),
+    ('/api/businesses', {'category': '{category}'}),
+    ('/api/businesses', {'category': '{category}', 'cursor': '{cursor}'}),
+    ('/api/businesses', {'q': '{word}'}),
+    ('/api/businesses', {'view': 'card', 'offset': '20'}),
+    ('/api/businesses/search', {'q': '{word}', 'mode': 'fulltext'}),
+    ('/api/businesses/featured', {}),
+    ('/api/categories', {}),
+    ('/api/categories/top', {}),
+    ('/api/businesses/new-count', {}),
+    ('/api/analytics/monthly-growth', {}),
+    ('/api/analytics/growth', {'granularity': 'week', 'category': '{category}'}),
+    ('/api/businesses/{business_id}', {}),
+    ('/api/business-applications', {}),
+    ('/api/business-applications', {'status': 'pending'}),
+    ('/api/business-applications', {'status': 'pending', 'limit': '20'}),
+    ('/api/business-applications/counts', {}),
+]
+
+
+def normalize_sql(statement):
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def capture_statements():
+    """
+    Wraps the request cursor so every executed statement is recorded.
+    """
+    statements = []
+    original_execute = app_module.CountingCursor.execute
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        statements.append((operation, params))
+        return original_execute(self, operation, params, *args, **kwargs)
+
+    app_module.CountingCursor.execute = execute
+    return statements
+
+
+def sample_values():
+    """
+    Real values to fill the endpoint templates with.
+    """
+    with db_cursor(dictionary=True) as (connection, cursor):
+        cursor.execute("SELECT id, business_name, category FROM businesses WHERE category IS NOT NULL ORDER BY id LIMIT 1")
+        row = cursor.fetchone() or {'id': 1, 'business_name': 'A', 'category': 'A'}
+    word = (re.findall(r"[A-Za-z]{4,}", row['business_name']) or ['shop'])[0]
+    return {
+        'business_id': row['id'],
+        'category': row['category'],
+        'cursor': app_module.encode_page_cursor(row),
+        'word': word,
+    }
+
+
+def explain(statement, params):
+    with db_cursor(dictionary=True) as (connection, cursor):
+        cursor.execute(f"EXPLAIN {statement}", params)
+        return cursor.fetchall()
+
+
+def plan_problems(plan, threshold):
+    problems = []
+    for step in plan:
+        rows = step.get('rows') or 0
+        extra = step.get('Extra') or ''
+        if rows <= threshold:
+            continue
+        if step.get('type') in ('ALL', 'index'):
+            problems.append(f"full {'table' if step['type'] == 'ALL' else 'index'} scan of {step.get('table')} (~{rows} rows)")
+        if 'Using filesort' in extra:
+            problems.append(f"filesort on {step.get('table')} (~{rows} rows)")
+    return problems
+
+
+def accepted_reason(statement):
+    for pattern, reason in ACCEPTED_PLANS.items():
+        if re.search(pattern, statement):
+            return reason
+    return None
+
+
+def check_query_plans(threshold, verbose=False):
+    flask_app = app_module.app
+    flask_app.config['LOGIN_DISABLED'] = True
+    statements = capture_statements()
+    values = sample_values()
+    client = flask_app.test_client()
+
+    for path, query in ENDPOINTS:
+        path = path.format(**values)
+        query = {name: value.format(**values) for name, value in query.items()}
+        response = client.get(path, query_string=query)
+        if verbose or response.status_code != 200:
+            print(f"GET {path} {query} -> {response.status_code}")
+
+    failures = 0
+    seen = set()
+    for statement, params in statements:
+        sql = normalize_sql(statement)
+        if not sql.upper().startswith('SELECT') or (sql, repr(params)) in seen:
+            continue
+        seen.add((sql, repr(params)))
+
+        problems = plan_problems(explain(statement, params), threshold)
+        reason = accepted_reason(sql)
+        if problems and reason is None:
+            failures += 1
+            print(f"❌ {sql[:120]}")
+            for problem in problems:
+                print(f"     {problem}")
+        elif verbose:
+            status = f"accepted: {reason}" if problems else "ok"
+            print(f"✅ {sql[:120]} ({status})")
+
+    print(f"\nChecked {len(seen)} distinct statements, {failures} failing (threshold {threshold} rows)")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN every query app.py issues")
+    parser.add_argument('--threshold', type=int, default=EXPLAIN_ROW_THRESHOLD, help="estimated rows above which scans and filesorts fail")
+    parser.add_argument('--verbose', action='store_true', help="print every endpoint and statement")
+    args = parser.parse_args()
+    sys.exit(0 if check_query_plans(args.threshold, args.verbose) else 1)
@@ -0,0 +1,56 @@
+"""
+In-process cache of filtered row counts for the listing and search endpoints
+"""
+import os
+import threading
+import time
+
+COUNT_CACHE_TTL = float(os.getenv('COUNT_CACHE_TTL', '60'))  # seconds
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv('COUNT_CACHE_MAX_ENTRIES', '1024'))
+
+
+def normalize_filter(**filters):
+    """
+    Builds a cache key from filter values. Values are trimmed and case-folded
+    because MySQL's default collation compares them case-insensitively.
+    """
+    return tuple(sorted((name, (value or '').strip().casefold()) for name, value in filters.items()))
+
+
+class CountCache:
+    """
+    Maps a normalized filter to its total row count. Entries expire after a TTL
+    so that writes made in other gunicorn workers show up eventually; writes in
+    this worker call invalidate() and show up immediately.
+    """
+
+    def __init__(self, ttl=COUNT_CACHE_TTL, max_entries=COUNT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, key, total):
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.clear()
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
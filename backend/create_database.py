@@ -64,7 +64,9 @@ def create_database():
         create_categories_table = """
         CREATE TABLE IF NOT EXISTS categories (
             id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) UNIQUE NOT NULL
+            name VARCHAR(100) UNIQUE NOT NULL,
+            business_count INT NOT NULL DEFAULT 0,
+            INDEX idx_categories_business_count (business_count)
         )
         """
         try:
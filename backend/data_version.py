@@ -0,0 +1,61 @@
+"""
+Cheap validator for the public directory data, used for ETag/Last-Modified.
+
+The version is derived from MAX(updated_at) and the row counts of businesses
+and categories: an insert or update moves updated_at, a delete changes the
+count. It is cached briefly per worker so most conditional requests are
+answered without touching MySQL, and writes in this worker drop it at once.
+"""
+import os
+import threading
+import time
+
+DATA_VERSION_TTL = float(os.getenv('DATA_VERSION_TTL', '5'))  # seconds; bounds how late other workers' writes show up
+
+
+class DataVersion:
+    """
+    Holds (version, last_modified) where version is an opaque string and
+    last_modified a Unix timestamp, or None for an empty table.
+    """
+
+    def __init__(self, ttl=DATA_VERSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._current = None
+        self._expires = 0.0
+        self.loads = 0
+
+    def get(self, cursor_factory):
+        """
+        Returns the current (version, last_modified). cursor_factory is a
+        context manager yielding (connection, cursor), used only when the
+        cached version has expired.
+        """
+        with self._lock:
+            if self._current is not None and self._expires > time.monotonic():
+                return self._current
+
+        with cursor_factory() as (connection, cursor):
+            cursor.execute("""
+                SELECT UNIX_TIMESTAMP(MAX(updated_at)), COUNT(*),
+                       (SELECT COUNT(*) FROM categories)
+                FROM businesses
+            """)
+            last_modified, business_count, category_count = cursor.fetchone()
+
+        last_modified = int(last_modified) if last_modified is not None else None
+        current = (f"{business_count}-{category_count}-{last_modified or 0}", last_modified)
+        with self._lock:
+            self._current = current
+            self._expires = time.monotonic() + self.ttl
+            self.loads += 1
+        return current
+
+    def invalidate(self):
+        with self._lock:
+            self._current = None
+
+    def stats(self):
+        with self._lock:
+            return {'version': self._current[0] if self._current else None, 'loads': self.loads}
@@ -1,6 +1,10 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error # Added Error for more specific exception handling
+from mysql.connector.errors import PoolError
 from dotenv import load_dotenv
 # We will import and use flask_bcrypt in app.py and pass the bcrypt object
 # or directly use it here if this script is run standalone for setup.
@@ -18,15 +22,261 @@ config = {
     'raise_on_warnings': True
 }
 
+# Connection pool configuration. Every gunicorn worker builds its own pool,
+# so the total number of MySQL connections is workers * DB_POOL_SIZE.
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '5'))  # seconds to wait for a free connection
+CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))  # seconds
+READ_TIMEOUT_MS = int(os.getenv('DB_READ_TIMEOUT_MS', '10000'))  # per-statement limit for SELECTs, 0 disables
+POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+
+def _open_connection():
+    """
+    Opens a new raw connection with the configured connect and read timeouts.
+    """
+    connection = mysql.connector.connect(connection_timeout=CONNECT_TIMEOUT, **config)
+    if READ_TIMEOUT_MS:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SET SESSION max_execution_time = %s", (READ_TIMEOUT_MS,))
+        finally:
+            cursor.close()
+    return connection
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled connection. close() returns the connection to
+    the pool instead of tearing down the socket, so scripts written against
+    the old get_db_connection() keep working unchanged.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise PoolError("Connection has already been returned to the pool")
+        return getattr(self._connection, name)
+
+    def close(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe MySQL connection pool with pre-ping validation on
+    checkout and live usage statistics.
+    """
+
+    def __init__(self, size=POOL_SIZE, checkout_timeout=POOL_CHECKOUT_TIMEOUT, pre_ping=POOL_PRE_PING):
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.pre_ping = pre_ping
+        self._idle = []
+        self._opened = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'checkout_failures': 0,
+            'validation_failures': 0,
+            'connections_opened': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def acquire(self):
+        """
+        Checks out a connection, waiting up to checkout_timeout seconds for one
+        to become free. Raises PoolError if the pool stays exhausted.
+        """
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._opened < self.size:
+                    # Reserve the slot now, open the socket outside the lock
+                    self._opened += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['checkout_failures'] += 1
+                    raise PoolError(f"Timed out after {self.checkout_timeout}s waiting for a database connection")
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if connection is not None and self.pre_ping:
+                connection = self._validate(connection)
+            if connection is None:
+                connection = _open_connection()
+                with self._cond:
+                    self._stats['connections_opened'] += 1
+        except Error:
+            with self._cond:
+                self._in_use -= 1
+                self._opened -= 1
+                self._stats['checkout_failures'] += 1
+                self._cond.notify()
+            raise
+
+        waited_ms = (time.monotonic() - started) * 1000
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_ms'] += waited_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], waited_ms)
+        return connection
+
+    def _validate(self, connection):
+        """
+        Pings an idle connection. Returns it if alive, otherwise discards it and
+        returns None so the caller opens a replacement in the same slot.
+        """
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except Error:
+            with self._cond:
+                self._stats['validation_failures'] += 1
+            try:
+                connection.close()
+            except Error:
+                pass
+            return None
+
+    def release(self, connection):
+        """
+        Returns a connection to the pool. Any open transaction is rolled back so
+        the next borrower starts clean; broken connections, and any connection
+        released after close_all(), are closed instead.
+        """
+        healthy = True
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            keep = healthy and not self._closed
+            if keep:
+                self._idle.append(connection)
+            else:
+                self._opened -= 1
+            self._cond.notify()
+        if not keep:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def close_all(self):
+        """
+        Closes every idle connection. Connections still checked out are closed
+        when they come back.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+        for connection in idle:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'size': self.size,
+                'open': self._opened,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': checkouts,
+                'checkout_failures': self._stats['checkout_failures'],
+                'validation_failures': self._stats['validation_failures'],
+                'connections_opened': self._stats['connections_opened'],
+                'avg_wait_ms': round(self._stats['total_wait_ms'] / checkouts, 3) if checkouts else 0.0,
+                'max_wait_ms': round(self._stats['max_wait_ms'], 3),
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns this process's connection pool, creating it on first use. The pid
+    check makes the pool fork-safe: a gunicorn worker never reuses sockets
+    inherited from the master process.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool()
+                _pool_pid = pid
+    return _pool
+
+def get_pool_stats():
+    """
+    Live statistics for this worker's pool.
+    """
+    return get_pool().stats()
+
+@contextmanager
+def db_connection():
+    """
+    Checks out a pooled connection and guarantees it is returned.
+    """
+    pool = get_pool()
+    connection = pool.acquire()
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+@contextmanager
+def db_cursor(dictionary=False):
+    """
+    Yields (connection, cursor) from the pool. The cursor is closed and the
+    connection returned even if the block raises.
+    """
+    with db_connection() as connection:
+        cursor = connection.cursor(dictionary=dictionary)
+        try:
+            yield connection, cursor
+        finally:
+            cursor.close()
+
 def get_db_connection():
     """
-    Creates and returns a connection to the MySQL database
+    Checks out a connection from the pool for callers that manage it by hand.
+    Calling close() on the returned connection gives it back to the pool.
     """
+    pool = get_pool()
     try:
-        print("Attempting to connect to MySQL database...")
-        connection = mysql.connector.connect(**config)
-        print("Successfully connected to the database!")
-        return connection
+        return PooledConnection(pool, pool.acquire())
     except mysql.connector.Error as err:
         print(f"Error connecting to the database: {err}")
         return None
@@ -59,22 +309,174 @@ def create_admin_table():
             cursor.close()
             connection.close()
 
+# businesses.category keeps the display name; these triggers keep category_id
+# and categories.business_count in step with it for every writer (the app,
+# import scripts and migrations alike). New category names are added to
+# categories on first use; the NOT EXISTS check keeps that from using up an
+# AUTO_INCREMENT value on every write, and ON DUPLICATE KEY UPDATE (instead of
+# INSERT IGNORE, whose duplicate-key warning raise_on_warnings turns into an
+# error for the whole statement) covers a concurrent first use.
+CATEGORY_TRIGGERS = {
+    'trg_businesses_category_before_insert': """
+        CREATE TRIGGER trg_businesses_category_before_insert BEFORE INSERT ON businesses
+        FOR EACH ROW
+        BEGIN
+            IF NEW.category IS NOT NULL AND NEW.category NOT IN ('', 'NULL') THEN
+                IF NOT EXISTS (SELECT 1 FROM categories WHERE name = NEW.category) THEN
+                    INSERT INTO categories (name) VALUES (NEW.category) ON DUPLICATE KEY UPDATE id = id;
+                END IF;
+                SET NEW.category_id = (SELECT id FROM categories WHERE name = NEW.category);
+            ELSE
+                SET NEW.category_id = NULL;
+            END IF;
+        END
+    """,
+    'trg_businesses_category_before_update': """
+        CREATE TRIGGER trg_businesses_category_before_update BEFORE UPDATE ON businesses
+        FOR EACH ROW
+        BEGIN
+            IF NOT (NEW.category <=> OLD.category) THEN
+                IF NEW.category IS NOT NULL AND NEW.category NOT IN ('', 'NULL') THEN
+                    IF NOT EXISTS (SELECT 1 FROM categories WHERE name = NEW.category) THEN
+                        INSERT INTO categories (name) VALUES (NEW.category) ON DUPLICATE KEY UPDATE id = id;
+                    END IF;
+                    SET NEW.category_id = (SELECT id FROM categories WHERE name = NEW.category);
+                ELSE
+                    SET NEW.category_id = NULL;
+                END IF;
+            END IF;
+        END
+    """,
+    'trg_businesses_category_after_insert': """
+        CREATE TRIGGER trg_businesses_category_after_insert AFTER INSERT ON businesses
+        FOR EACH ROW
+        UPDATE categories SET business_count = business_count + 1 WHERE id = NEW.category_id
+    """,
+    'trg_businesses_category_after_update': """
+        CREATE TRIGGER trg_businesses_category_after_update AFTER UPDATE ON businesses
+        FOR EACH ROW
+        BEGIN
+            IF NOT (NEW.category_id <=> OLD.category_id) THEN
+                UPDATE categories SET business_count = business_count - 1 WHERE id = OLD.category_id;
+                UPDATE categories SET business_count = business_count + 1 WHERE id = NEW.category_id;
+            END IF;
+        END
+    """,
+    'trg_businesses_category_after_delete': """
+        CREATE TRIGGER trg_businesses_category_after_delete AFTER DELETE ON businesses
+        FOR EACH ROW
+        UPDATE categories SET business_count = business_count - 1 WHERE id = OLD.category_id
+    """,
+}
+
+def trigger_body(statement):
+    """
+    The part of a CREATE TRIGGER statement after FOR EACH ROW, whitespace
+    collapsed, as it compares with information_schema.TRIGGERS.ACTION_STATEMENT.
+    """
+    return " ".join(statement.split('FOR EACH ROW', 1)[-1].split())
+
+def create_category_triggers(cursor):
+    """
+    Creates whichever category triggers are missing and replaces those whose
+    body differs from CATEGORY_TRIGGERS (installed by an older version).
+    Safe to run on every start. Needs the TRIGGER privilege.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME = 'category_id'
+    """)
+    if cursor.fetchone()[0] == 0:
+        print("businesses.category_id is missing; run migrations/normalize_categories.py")
+        return
+    cursor.execute("""
+        SELECT TRIGGER_NAME, ACTION_STATEMENT FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = 'businesses'
+    """)
+    existing = {name: " ".join(body.split()) for name, body in cursor.fetchall()}
+    for name, statement in CATEGORY_TRIGGERS.items():
+        if name not in existing:
+            cursor.execute(statement)
+            print(f"Created trigger {name}")
+        elif existing[name] != trigger_body(statement):
+            cursor.execute(f"DROP TRIGGER {name}")
+            cursor.execute(statement)
+            print(f"Replaced outdated trigger {name}")
+
+def sync_category_links(cursor):
+    """
+    Re-derives category_id from the category names and recomputes every
+    business_count. Run after bulk rewrites that bypass the triggers or
+    when the counters are suspected to be off.
+    """
+    cursor.execute("""
+        INSERT INTO categories (name)
+        SELECT DISTINCT b.category FROM businesses b
+        WHERE b.category IS NOT NULL AND b.category NOT IN ('', 'NULL')
+        AND NOT EXISTS (SELECT 1 FROM categories c WHERE c.name = b.category)
+    """)
+    cursor.execute("""
+        UPDATE businesses b
+        LEFT JOIN categories c ON c.name = b.category
+        SET b.category_id = c.id
+        WHERE NOT (b.category_id <=> c.id)
+    """)
+    linked = cursor.rowcount
+    cursor.execute("""
+        UPDATE categories c
+        SET c.business_count = (SELECT COUNT(*) FROM businesses b WHERE b.category_id = c.id)
+    """)
+    return linked
+
+def create_categories_table():
+    """
+    Creates the 'categories' table in the database if it doesn't already exist.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to database. Categories table not created.")
+        return
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS categories (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(100) UNIQUE NOT NULL,
+                business_count INT NOT NULL DEFAULT 0,
+                INDEX idx_categories_business_count (business_count)
+            )
+        """)
+        connection.commit()
+        print("Categories table checked/created successfully.")
+    except Error as err:
+        print(f"Error creating categories table: {err}")
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def create_businesses_table():
     """
-    Creates the 'businesses' table in the database if it doesn't already exist.
+    Creates the 'businesses' table in the database if it doesn't already exist,
+    along with the triggers that maintain its category links.
+    Requires the categories table (create_categories_table()).
     """
     connection = get_db_connection()
     if not connection:
         print("Failed to connect to database. Businesses table not created.")
         return
 
+    cursor = connection.cursor()
     try:
-        cursor = connection.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS businesses (
                 id INT AUTO_INCREMENT PRIMARY KEY,
+                import_key CHAR(32) CHARACTER SET ascii NULL,
+                import_owned BOOLEAN NOT NULL DEFAULT FALSE,
                 business_name VARCHAR(255) NOT NULL,
                 category VARCHAR(100),
+                category_id INT NULL,
                 location VARCHAR(255),
                 contact_name VARCHAR(100),
                 tel VARCHAR(20),
@@ -82,15 +484,46 @@ def create_businesses_table():
                 website VARCHAR(255),
                 description TEXT,
                 image_url VARCHAR(255),
+                image_variants JSON NULL,
                 featured BOOLEAN DEFAULT FALSE,
                 date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_businesses_name_id (business_name, id),
+                INDEX idx_businesses_category_id_name_id (category_id, business_name, id),
+                INDEX idx_businesses_featured (featured),
+                INDEX idx_businesses_date_added (date_added),
+                INDEX idx_businesses_category_id_date_added (category_id, date_added),
+                INDEX idx_businesses_updated_at (updated_at),
+                UNIQUE INDEX uq_businesses_import_key (import_key),
+                FULLTEXT INDEX ft_businesses_search (business_name, description, category),
+                CONSTRAINT fk_businesses_category FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL
             )
         """)
         connection.commit()
         print("Businesses table checked/created successfully.")
     except Error as err:
         print(f"Error creating businesses table: {err}")
+
+    # Rows the JSON importer may overwrite and delete; app writes clear it
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME = 'import_owned'
+        """)
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("ALTER TABLE businesses ADD COLUMN import_owned BOOLEAN NOT NULL DEFAULT FALSE")
+            connection.commit()
+            print("Added import_owned column to businesses.")
+    except Error as err:
+        print(f"Error adding import_owned to businesses table: {err}")
+
+    # A separate step: on an existing table the CREATE above reports note 1050,
+    # which raise_on_warnings raises, and the triggers must still be checked
+    try:
+        create_category_triggers(cursor)
+        connection.commit()
+    except Error as err:
+        print(f"Error creating category triggers: {err}")
     finally:
         if connection and connection.is_connected():
             cursor.close()
@@ -0,0 +1,236 @@
+"""
+Server-sent events for the admin dashboard.
+
+Writes publish small events ('application_submitted', 'application_updated',
+'businesses_changed'); every open /api/events stream in every gunicorn
+worker receives them, so admin tabs stop polling and only refetch when
+something changed. Two brokers carry events between publishers and streams:
+
+- memory: in-process only, enough for a single worker (flask run); a
+          warning is printed when WEB_CONCURRENCY says there are more;
+- redis:  a local Redis pub/sub channel. Each worker runs one listener
+          thread that fans the channel out to its own streams, so an event
+          published by any worker reaches all of them. Needs the optional
+          redis package.
+
+Events are not stored. A client that connects, reconnects or falls too far
+behind refetches what it shows, so nothing missed while it was away is lost.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # optional, only needed for EVENT_BROKER=redis
+    redis = None
+
+EVENT_BROKER = os.getenv('EVENT_BROKER', 'memory')  # 'memory' or 'redis'
+EVENT_BROKER_URL = os.getenv('EVENT_BROKER_URL', 'redis://127.0.0.1:6379/0')
+EVENT_CHANNEL = os.getenv('EVENT_CHANNEL', 'marylandbiz:events')
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))  # gunicorn workers (gunicorn reads it too when --workers is not given)
+WEB_THREADS = int(os.getenv('WEB_THREADS', '16'))  # gunicorn --threads per worker
+# Open streams per worker. Each one holds a request thread for up to
+# EVENT_STREAM_MAX_AGE, so the cap stays below WEB_THREADS and leaves most
+# threads to ordinary requests.
+EVENT_MAX_SUBSCRIBERS = int(os.getenv('EVENT_MAX_SUBSCRIBERS', str(max(1, WEB_THREADS // 4))))
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '100'))  # undelivered events before a stream is dropped
+EVENT_STREAM_HEARTBEAT = float(os.getenv('EVENT_STREAM_HEARTBEAT', '15'))  # seconds between keep-alive comments
+EVENT_STREAM_MAX_AGE = float(os.getenv('EVENT_STREAM_MAX_AGE', '300'))  # seconds before a stream is closed; browsers reconnect
+EVENT_RETRY_MS = int(os.getenv('EVENT_RETRY_MS', '5000'))  # reconnect delay sent to browsers
+
+
+def format_event(message):
+    """
+    SSE frame for a broker message ({"id", "event", "data"}).
+    """
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {json.dumps(message['data'], separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    def __init__(self, max_size=EVENT_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.overflowed = False
+
+
+class MemoryBroker:
+    """
+    Hands published events straight to this worker's streams.
+    """
+    name = 'memory'
+    _deliver = None
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, message):
+        if self._deliver is not None:
+            self._deliver(message)
+
+    def stats(self):
+        return {}
+
+
+class RedisBroker:
+    """
+    Publishes to a Redis channel; a daemon thread per worker listens on it
+    and delivers to the worker's streams, reconnecting after errors.
+    """
+    name = 'redis'
+
+    def __init__(self, url=EVENT_BROKER_URL, channel=EVENT_CHANNEL):
+        if redis is None:
+            raise RuntimeError("EVENT_BROKER=redis requires the redis package (pip install redis)")
+        self.url = url
+        self.channel = channel
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._listener = None
+        self.reconnects = 0
+
+    def start(self, deliver):
+        # Started lazily from the first subscription, so the thread belongs to
+        # the gunicorn worker and not to a master process that forks it away
+        if self._listener is None or not self._listener.is_alive():
+            self._deliver = deliver
+            self._listener = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                client = redis.Redis.from_url(self.url, socket_connect_timeout=0.5, health_check_interval=30)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._deliver(json.loads(message['data']))
+            except Exception as err:
+                self.reconnects += 1
+                print(f"Event listener lost the broker, reconnecting: {err}")
+                time.sleep(1)
+
+    def publish(self, message):
+        self._client.publish(self.channel, json.dumps(message, separators=(',', ':')))
+
+    def stats(self):
+        return {
+            'url': self.url.rsplit('@', 1)[-1],
+            'listening': bool(self._listener and self._listener.is_alive()),
+            'reconnects': self.reconnects,
+        }
+
+
+class EventHub:
+    """
+    Fans events out to the streams open in this worker. Publishing never
+    blocks a request: a stream whose queue is full is marked overflowed and
+    closed, and a broker error falls back to delivering in this worker only.
+    """
+
+    def __init__(self, broker, max_subscribers=EVENT_MAX_SUBSCRIBERS, threads=WEB_THREADS):
+        if max_subscribers >= threads:
+            print(f"⚠️  EVENT_MAX_SUBSCRIBERS={max_subscribers} would let streams take every one of the "
+                  f"{threads} request threads; capping it at {max(1, threads - 1)}")
+            max_subscribers = max(1, threads - 1)
+        self.broker = broker
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def publish(self, event, data):
+        message = {'id': str(time.time_ns()), 'event': event, 'data': data}
+        self.published += 1
+        try:
+            self.broker.publish(message)
+        except Exception as err:
+            self.errors += 1
+            print(f"Event publish failed, delivering locally only: {err}")
+            self._deliver(message)
+
+    def _deliver(self, message):
+        frame = format_event(message)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(frame)
+                self.delivered += 1
+            except queue.Full:
+                # The stream ends when it next wakes up; the client reconnects and refetches
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+                self.dropped += 1
+
+    def subscribe(self):
+        """
+        Returns a Subscription, or None when this worker is at max_subscribers.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription()
+            self._subscribers.add(subscription)
+        self.broker.start(self._deliver)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stream(self, subscription, heartbeat=EVENT_STREAM_HEARTBEAT, max_age=EVENT_STREAM_MAX_AGE):
+        """
+        Generator of SSE frames for one subscription. Sends a keep-alive
+        comment when idle so proxies keep the connection and dead clients are
+        noticed, and ends after max_age so each stream frees its worker thread
+        now and then; the browser reconnects on its own.
+        """
+        deadline = time.monotonic() + max_age
+        try:
+            yield f"retry: {EVENT_RETRY_MS}\n: connected\n\n"
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    yield subscription.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        stats = {
+            'broker': self.broker.name,
+            'subscribers': subscribers,
+            'max_subscribers': self.max_subscribers,
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+        stats.update(self.broker.stats())
+        return stats
+
+
+def create_event_hub(broker_name=EVENT_BROKER, workers=WEB_CONCURRENCY):
+    """
+    Builds the hub for EVENT_BROKER. A redis broker that cannot be set up
+    falls back to the in-process one (events then only reach streams in the
+    publishing worker), with a warning when more than one worker runs.
+    """
+    if broker_name == 'redis':
+        try:
+            return EventHub(RedisBroker())
+        except RuntimeError as err:
+            print(f"⚠️  {err}; events will only reach streams in the same worker")
+    if workers > 1:
+        print(f"⚠️  {workers} gunicorn workers share no event broker: admin events only reach streams "
+              f"in the worker that published them. Set EVENT_BROKER=redis.")
+    return EventHub(MemoryBroker())
@@ -0,0 +1,127 @@
+"""
+Cached selection of homepage featured businesses.
+
+Businesses flagged featured are served ordered by name. Only when none is
+featured is a random selection served instead: rather than ORDER BY RAND(),
+which assigns a random value to every row and sorts the whole table, it is
+sampled from a cached pool of ids, and only the chosen rows are fetched by
+primary key.
+The selection itself is cached and rotated on an interval, so most homepage
+hits never reach MySQL. Rotations follow wall-clock windows and the sample
+is seeded with the window number, so every worker serves the same selection.
+"""
+import os
+import random
+import threading
+import time
+
+FEATURED_ROTATION_INTERVAL = float(os.getenv('FEATURED_ROTATION_INTERVAL', '60'))  # seconds a selection is served
+FEATURED_POOL_TTL = float(os.getenv('FEATURED_POOL_TTL', '300'))  # seconds before candidate ids are re-read
+MAX_CACHED_SELECTIONS = 32
+
+
+class FeaturedPool:
+    """
+    Caches the featured ids (by name) and, when there are none, the ids of
+    every business to sample from. Writes in this worker call
+    invalidate(); writes in other gunicorn workers show up once the pool
+    TTL expires.
+    """
+
+    def __init__(self, rotation_interval=FEATURED_ROTATION_INTERVAL, pool_ttl=FEATURED_POOL_TTL):
+        self.rotation_interval = rotation_interval
+        self.pool_ttl = pool_ttl
+        self._lock = threading.Lock()
+        self._featured_ids = []  # ordered by business_name, id
+        self._random_ids = None  # loaded when nothing is featured
+        self._pool_expires = 0.0
+        self._selections = {}   # limit -> (rows, rotation window)
+        self.hits = 0
+        self.misses = 0
+        self.rotations = 0
+
+    def window(self):
+        """
+        Number of the current rotation window.
+        """
+        return int(time.time() // self.rotation_interval)
+
+    def get_cached(self, limit):
+        """
+        Returns the current selection for limit, or None when it must be rotated.
+        """
+        with self._lock:
+            entry = self._selections.get(limit)
+            if entry and entry[1] == self.window():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def rotate(self, cursor, limit):
+        """
+        Builds a new selection of up to limit businesses and caches it: the
+        featured ones by name or, when none is featured, a random sample of
+        all businesses. cursor must be a dictionary cursor.
+        """
+        window = self.window()
+        if self._pool_expires <= time.monotonic():
+            self._load_pool(cursor)
+
+        with self._lock:
+            featured_ids = self._featured_ids
+        if featured_ids:
+            chosen = featured_ids[:limit]
+        else:
+            random_ids = self._load_random_ids(cursor)
+            chosen = random.Random(f"{window}:{limit}").sample(random_ids, min(limit, len(random_ids)))
+
+        rows = []
+        if chosen:
+            placeholders = ", ".join(["%s"] * len(chosen))
+            cursor.execute(f"SELECT * FROM businesses WHERE id IN ({placeholders})", tuple(chosen))
+            position = {business_id: index for index, business_id in enumerate(chosen)}
+            rows = sorted(cursor.fetchall(), key=lambda row: position[row['id']])
+
+        with self._lock:
+            if len(self._selections) >= MAX_CACHED_SELECTIONS and limit not in self._selections:
+                self._selections.clear()
+            self._selections[limit] = (rows, window)
+            self.rotations += 1
+        return rows
+
+    def _load_pool(self, cursor):
+        # Featured rows are few; sorting them here keeps the query on idx_businesses_featured
+        cursor.execute("SELECT id, business_name FROM businesses WHERE featured = TRUE")
+        featured = sorted(cursor.fetchall(), key=lambda row: (row['business_name'], row['id']))
+
+        with self._lock:
+            self._featured_ids = [row['id'] for row in featured]
+            self._random_ids = None
+            self._pool_expires = time.monotonic() + self.pool_ttl
+
+    def _load_random_ids(self, cursor):
+        with self._lock:
+            if self._random_ids is not None:
+                return self._random_ids
+        cursor.execute("SELECT id FROM businesses ORDER BY id")
+        random_ids = [row['id'] for row in cursor.fetchall()]
+        with self._lock:
+            self._random_ids = random_ids
+        return random_ids
+
+    def invalidate(self):
+        with self._lock:
+            self._pool_expires = 0.0
+            self._selections.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'featured': len(self._featured_ids),
+                'random_candidates': len(self._random_ids) if self._random_ids is not None else None,
+                'selections': len(self._selections),
+                'hits': self.hits,
+                'misses': self.misses,
+                'rotations': self.rotations,
+            }
@@ -0,0 +1,184 @@
+"""
+Typo-tolerant search over business names and descriptions.
+
+Every distinct word is broken into character trigrams. A misspelled query
+word ('managment', 'cltothing') finds its candidate words through shared
+trigrams, and the candidates are re-ranked by edit distance, so no query
+ever has to LIKE-scan for each possible misspelling. Kept current like the
+other in-memory indexes: build() at worker start, upsert()/remove() on writes.
+"""
+import re
+import threading
+
+FIELD_WEIGHTS = {
+    'business_name': 2.0,
+    'description': 1.0,
+}
+MIN_TRIGRAM_SIMILARITY = 0.3   # shared / union trigrams needed to be a candidate
+MAX_CANDIDATES_PER_WORD = 30   # candidates re-ranked by edit distance
+
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def trigrams(word):
+    """
+    Character trigrams of a word, padded so that short words and word
+    boundaries still produce trigrams ('cat' -> '  c', ' ca', 'cat', 'at ').
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(word):
+    """
+    Edit budget that grows with word length: 1 up to 4 letters, 2 up to 8, then 3.
+    """
+    if len(word) <= 4:
+        return 1
+    if len(word) <= 8:
+        return 2
+    return 3
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, or limit + 1 once it is certain to
+    exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    Trigram index over the words of names and descriptions.
+    """
+
+    def __init__(self, field_weights=FIELD_WEIGHTS):
+        self.field_weights = field_weights
+        self._lock = threading.RLock()
+        self._trigrams = {}    # trigram -> set of words
+        self._words = {}       # word -> {doc_id: field weight}
+        self._docs = {}        # doc_id -> business row
+        self._doc_words = {}   # doc_id -> set of words, for removal
+        self.ready = False
+
+    # --- Building and incremental updates ---
+
+    def build(self, rows):
+        with self._lock:
+            self._trigrams = {}
+            self._words = {}
+            self._docs = {}
+            self._doc_words = {}
+            for row in rows:
+                self._add(row)
+            self.ready = True
+
+    def upsert(self, row):
+        with self._lock:
+            self._remove(row['id'])
+            self._add(row)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _add(self, row):
+        doc_id = row['id']
+        weights = {}
+        for field, weight in self.field_weights.items():
+            for word in _WORD_RE.findall((row.get(field) or '').casefold()):
+                weights[word] = max(weights.get(word, 0.0), weight)
+
+        for word, weight in weights.items():
+            docs = self._words.get(word)
+            if docs is None:
+                docs = self._words[word] = {}
+                for trigram in trigrams(word):
+                    self._trigrams.setdefault(trigram, set()).add(word)
+            docs[doc_id] = weight
+
+        self._docs[doc_id] = row
+        self._doc_words[doc_id] = set(weights)
+
+    def _remove(self, doc_id):
+        for word in self._doc_words.pop(doc_id, ()):
+            docs = self._words[word]
+            del docs[doc_id]
+            if not docs:
+                del self._words[word]
+                for trigram in trigrams(word):
+                    words = self._trigrams[trigram]
+                    words.discard(word)
+                    if not words:
+                        del self._trigrams[trigram]
+        self._docs.pop(doc_id, None)
+
+    # --- Querying ---
+
+    def _similar_words(self, word):
+        """
+        Returns {indexed word: closeness in (0, 1]} for words within the edit
+        budget of word, found by trigram overlap then checked by edit distance.
+        """
+        query_trigrams = trigrams(word)
+        shared = {}
+        for trigram in query_trigrams:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        scored = []
+        for candidate, count in shared.items():
+            similarity = count / (len(query_trigrams) + len(trigrams(candidate)) - count)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scored.append((similarity, candidate))
+        scored.sort(reverse=True)
+
+        limit = max_edits(word)
+        matches = {}
+        for _, candidate in scored[:MAX_CANDIDATES_PER_WORD]:
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                matches[candidate] = 1 - distance / max(len(word), len(candidate))
+        return matches
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Returns (total, rows). A business scores, for every query word, the
+        closeness of its best-matching word times that word's field weight;
+        businesses matching more query words, more closely, rank first.
+        """
+        words = _WORD_RE.findall((query or '').casefold())
+        if not words:
+            return 0, []
+
+        with self._lock:
+            scores = {}
+            for word in words:
+                best = {}
+                for candidate, closeness in self._similar_words(word).items():
+                    for doc_id, weight in self._words[candidate].items():
+                        best[doc_id] = max(best.get(doc_id, 0.0), closeness * weight)
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+            ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self._docs[doc_id]['business_name'], doc_id))
+            return len(ranked), [self._docs[doc_id] for doc_id in ranked[offset:offset + limit]]
+
+    def stats(self):
+        with self._lock:
+            return {'ready': self.ready, 'documents': len(self._docs), 'words': len(self._words), 'trigrams': len(self._trigrams)}
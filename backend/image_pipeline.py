@@ -0,0 +1,224 @@
+"""
+Image processing for uploaded business images.
+
+Uploads are staged as they arrive and processed later by image_queue.py, so
+decoding, resizing and re-encoding never run on a request thread.
+
+Each upload is written as a set of width variants (IMAGE_VARIANT_WIDTHS) in
+every modern format Pillow can encode (IMAGE_VARIANT_FORMATS, WebP by
+default) plus a JPEG fallback, or PNG for images with transparency. The
+result is stored as image_variants next to image_url:
+
+    {
+        "width": 1080, "height": 720,
+        "sources": [
+            {"type": "image/webp", "srcset": "/uploads/.../3f9a...e1.webp 320w, ..."},
+            {"type": "image/jpeg", "srcset": "/uploads/.../07bc...4d.jpg 320w, ..."}
+        ],
+        "variants": [{"url": ..., "type": ..., "width": 320, "height": 213, "bytes": 14210}, ...]
+    }
+
+"sources" map onto <picture><source type srcset> elements, fallback last;
+image_url is the largest fallback variant, for clients that ignore srcset.
+
+Variant files are named after a hash of their bytes, so a URL never changes
+content and can be cached forever (see serve_business_image in app.py);
+image_store.py writes them and counts their references.
+
+Decoding is bounded: an image over IMAGE_MAX_PIXELS is rejected from its
+header before any pixel is decoded, JPEGs are decoded by libjpeg at 1/2, 1/4
+or 1/8 scale when that is still at least as large as the biggest variant
+(Image.draft), and the full-size bitmap is released as soon as the largest
+variant has been resized from it.
+"""
+import hashlib
+import io
+import os
+import re
+
+from PIL import Image
+
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', '1080'))
+IMAGE_VARIANT_WIDTHS = sorted(int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1080').split(','))
+IMAGE_VARIANT_FORMATS = [name.strip().lower() for name in os.getenv('IMAGE_VARIANT_FORMATS', 'webp').split(',') if name.strip()]  # 'avif' needs a Pillow built with AVIF
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '85'))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', '40000000'))  # width x height; larger uploads are rejected (decompression bombs)
+IMAGE_REDUCING_GAP = float(os.getenv('IMAGE_REDUCING_GAP', '3.0'))  # resize() shrinks by whole factors first while the ratio exceeds this
+
+# Pillow's own guard warns above this and raises above twice it; check_pixels below rejects earlier
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+HASHED_NAME_LENGTH = 32  # hex characters of the SHA-256 of the file's bytes
+HASHED_FILENAME = re.compile(r"^[0-9a-f]{%d}\.[a-z]+$" % HASHED_NAME_LENGTH)
+
+# format name -> (Pillow format, extension, MIME type, save options)
+ENCODINGS = {
+    'avif': ('AVIF', '.avif', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', '.webp', 'image/webp', {'quality': IMAGE_QUALITY, 'method': 4}),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg', {'quality': IMAGE_QUALITY, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', '.png', 'image/png', {'optimize': True}),
+}
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def check_pixels(image):
+    """
+    Raises ImageTooLarge when an opened (not yet decoded) image is over
+    IMAGE_MAX_PIXELS.
+    """
+    pixels = image.width * image.height
+    if pixels > IMAGE_MAX_PIXELS:
+        raise ImageTooLarge(f"{image.width}x{image.height} is {pixels} pixels, the limit is {IMAGE_MAX_PIXELS}")
+
+
+def check_image(path):
+    """
+    Returns the format of the image at path (a file name or a file object
+    positioned at its start), reading only its header.
+    Raises an exception when the file is not an image Pillow can open, and
+    ImageTooLarge when it has more than IMAGE_MAX_PIXELS pixels.
+    """
+    with Image.open(path) as image:
+        check_pixels(image)
+        return image.format
+
+
+def modern_formats():
+    """
+    The configured IMAGE_VARIANT_FORMATS this Pillow build can write.
+    """
+    Image.init()
+    return [name for name in IMAGE_VARIANT_FORMATS if name in ENCODINGS and ENCODINGS[name][0] in Image.SAVE]
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def fit_size(size, width):
+    """
+    (width, height) of an image of the given size scaled down to fit width
+    and IMAGE_MAX_DIMENSION in height. Never upscales.
+    """
+    scale = min(width / size[0], IMAGE_MAX_DIMENSION / size[1], 1)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def decode_bounded(source, mode):
+    """
+    The largest variant of an opened image, in mode, decoded with as little
+    memory as the format allows: JPEGs are decoded straight at a reduced
+    scale, other formats in full. Always a new image, so the caller can
+    close source, and with it the full-size bitmap, right away.
+    """
+    if source.format == 'JPEG':
+        # libjpeg picks the smallest 1/2, 1/4 or 1/8 scale still covering the target
+        source.draft('RGB', fit_size(source.size, IMAGE_VARIANT_WIDTHS[-1]))
+
+    image = source
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        # Palette and other modes cannot be resampled smoothly; convert first
+        image = image.convert(mode)
+    size = fit_size(image.size, IMAGE_VARIANT_WIDTHS[-1])
+    if size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=IMAGE_REDUCING_GAP)
+    if image.mode != mode:
+        image = image.convert(mode)
+    return image.copy() if image is source else image
+
+
+def variant_sizes(image):
+    """
+    Yields the image scaled to each variant width, largest first, each
+    resized from the previous one. image is already the largest variant
+    (see decode_bounded).
+    """
+    current = image
+    previous_width = None
+    for width in reversed(IMAGE_VARIANT_WIDTHS):
+        size = fit_size(current.size, width)
+        if size[0] == previous_width:
+            continue
+        if size != current.size:
+            current = current.resize(size, Image.Resampling.LANCZOS, reducing_gap=IMAGE_REDUCING_GAP)
+        previous_width = size[0]
+        yield current
+
+
+def is_hashed_filename(filename):
+    """
+    True for content-hashed variant names, whose bytes can never change.
+    """
+    return bool(HASHED_FILENAME.match(filename))
+
+
+def hashed_filename(data, ext):
+    """
+    The content-addressed name for a variant's bytes.
+    """
+    return f"{hashlib.sha256(data).hexdigest()[:HASHED_NAME_LENGTH]}{ext}"
+
+
+def process_image(source_path, write, url_prefix):
+    """
+    Encodes the variants of the image at source_path and stores each one with
+    write(data, ext), which returns the file name it was stored under (see
+    ImageStore.write); url_prefix is where those files are served.
+    Returns (image_url, image_variants). Raises ImageTooLarge for images
+    over IMAGE_MAX_PIXELS, before decoding them.
+    """
+    source = Image.open(source_path)
+    try:
+        check_pixels(source)
+        source.seek(0)  # first frame of animated GIF/WebP
+        alpha = has_alpha(source)
+        image = decode_bounded(source, 'RGBA' if alpha else 'RGB')
+    finally:
+        source.close()
+
+    formats = modern_formats() + ['png' if alpha else 'jpeg']
+    variants = []
+    for scaled in variant_sizes(image):
+        for format_name in formats:
+            pil_format, ext, mime_type, options = ENCODINGS[format_name]
+            buffer = io.BytesIO()
+            scaled.save(buffer, pil_format, **options)
+            data = buffer.getvalue()
+            variants.append({
+                'url': f"{url_prefix}{write(data, ext)}",
+                'type': mime_type,
+                'width': scaled.width,
+                'height': scaled.height,
+                'bytes': len(data),
+            })
+
+    variants.sort(key=lambda variant: variant['width'])
+    sources = []
+    for format_name in formats:
+        mime_type = ENCODINGS[format_name][2]
+        srcset = ", ".join(f"{variant['url']} {variant['width']}w" for variant in variants if variant['type'] == mime_type)
+        sources.append({'type': mime_type, 'srcset': srcset})
+
+    fallback = [variant for variant in variants if variant['type'] == ENCODINGS[formats[-1]][2]]
+    largest = fallback[-1]
+    image_variants = {
+        'width': largest['width'],
+        'height': largest['height'],
+        'sources': sources,
+        'variants': variants,
+    }
+    return largest['url'], image_variants
+
+
+def variant_urls(image_url, image_variants):
+    """
+    Every file URL belonging to an image: its variants, or image_url alone
+    for images uploaded before variants existed.
+    """
+    urls = {image_url} if image_url else set()
+    if image_variants:
+        urls.update(variant['url'] for variant in image_variants.get('variants', []))
+    return urls
@@ -0,0 +1,399 @@
+"""
+Durable background queue for image processing.
+
+Upload handlers stage the raw file under uploads/staging and insert a row
+into image_jobs in the same transaction as the application or business that
+will show the image, then return at once. Worker threads in every gunicorn
+worker claim pending jobs, run image_pipeline.process_image() and write the
+resulting image_url and image_variants to the application and/or business
+the job belongs to.
+
+Jobs survive restarts: a job left 'processing' by a worker that died is
+claimed again after IMAGE_JOB_TIMEOUT seconds, and failed jobs are retried
+up to IMAGE_JOB_MAX_ATTEMPTS times, each retry waiting twice as long as the
+last (IMAGE_JOB_RETRY_DELAY seconds before the first). A job whose worker
+died during its final attempt is marked failed. Workers wake up immediately
+for jobs enqueued in their own process and poll every
+IMAGE_QUEUE_POLL_INTERVAL seconds for the rest.
+"""
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+
+from mysql.connector import Error
+
+from db_config import db_cursor, get_db_connection
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))  # threads per gunicorn worker; 0 leaves jobs to other processes
+IMAGE_QUEUE_POLL_INTERVAL = float(os.getenv('IMAGE_QUEUE_POLL_INTERVAL', '2'))  # seconds
+IMAGE_JOB_TIMEOUT = int(os.getenv('IMAGE_JOB_TIMEOUT', '300'))  # seconds before a 'processing' job is assumed lost
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv('IMAGE_JOB_MAX_ATTEMPTS', '3'))
+IMAGE_JOB_RETRY_DELAY = int(os.getenv('IMAGE_JOB_RETRY_DELAY', '30'))  # seconds before the first retry, doubled for each one after
+IMAGE_JOB_RETENTION_DAYS = int(os.getenv('IMAGE_JOB_RETENTION_DAYS', '7'))  # finished jobs are kept this long
+LATENCY_SAMPLES = 500
+
+
+def create_image_jobs_table():
+    """
+    Creates the 'image_jobs' table if it doesn't already exist, and adds the
+    available_at column to tables created before retries were delayed.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to database. Image jobs table not created.")
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_jobs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                staged_path VARCHAR(512) NOT NULL,
+                filename VARCHAR(255) NOT NULL,
+                application_id INT NULL,
+                business_id INT NULL,
+                status ENUM('pending', 'processing', 'done', 'failed') NOT NULL DEFAULT 'pending',
+                attempts INT NOT NULL DEFAULT 0,
+                claim_token CHAR(32) NULL,
+                image_url VARCHAR(255) NULL,
+                image_variants JSON NULL,
+                error VARCHAR(255) NULL,
+                created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+                available_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+                started_at DATETIME(3) NULL,
+                finished_at DATETIME(3) NULL,
+                INDEX idx_image_jobs_status_id (status, id),
+                INDEX idx_image_jobs_application (application_id),
+                INDEX idx_image_jobs_claim (claim_token)
+            )
+        """)
+        connection.commit()
+        print("Image jobs table checked/created successfully.")
+    except Error as err:
+        print(f"Error creating image jobs table: {err}")
+
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'image_jobs' AND COLUMN_NAME = 'available_at'
+        """)
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                ALTER TABLE image_jobs
+                ADD COLUMN available_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) AFTER created_at
+            """)
+            connection.commit()
+            print("Added available_at column to image_jobs.")
+    except Error as err:
+        print(f"Error adding available_at to image jobs table: {err}")
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ImageQueue:
+    """
+    process(staged_path, filename) turns a staged upload into
+    (image_url, image_variants); on_done(job), if given, is called after a
+    job's image was written (job holds id, application_id, business_id,
+    image_url and image_variants). maintenance(), if given, runs with the
+    hourly cleanup of finished jobs.
+    """
+
+    def __init__(self, process, on_done=None, maintenance=None, workers=IMAGE_WORKERS):
+        self.process = process
+        self.on_done = on_done
+        self.maintenance = maintenance
+        self.workers = workers
+        self._threads = []
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._queued = deque(maxlen=LATENCY_SAMPLES)      # seconds from enqueue to claim
+        self._processing = deque(maxlen=LATENCY_SAMPLES)  # seconds spent processing
+        self._last_cleanup = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    # --- Producer side (request handlers) ---
+
+    def enqueue(self, cursor, staged_path, filename, application_id=None, business_id=None):
+        """
+        Inserts a job with the caller's cursor, so it commits together with
+        the row it belongs to. Call notify() after the commit.
+        """
+        cursor.execute("""
+            INSERT INTO image_jobs (staged_path, filename, application_id, business_id)
+            VALUES (%s, %s, %s, %s)
+        """, (staged_path, filename, application_id, business_id))
+        return cursor.lastrowid
+
+    def notify(self):
+        self._wakeup.set()
+
+    def lock_latest_job(self, cursor, application_id):
+        """
+        Locks and returns the newest job for an application (a dictionary
+        cursor is required), or None. Used while approving: a job that is
+        done already carries image_url and image_variants; one that is not
+        can be pointed at the new business with attach_business() before it
+        completes.
+        """
+        cursor.execute("""
+            SELECT id, status, image_url, image_variants FROM image_jobs
+            WHERE application_id = %s ORDER BY id DESC LIMIT 1 FOR UPDATE
+        """, (application_id,))
+        return cursor.fetchone()
+
+    def attach_business(self, cursor, job_id, business_id):
+        cursor.execute("UPDATE image_jobs SET business_id = %s WHERE id = %s", (business_id, job_id))
+
+    # --- Workers ---
+
+    def start(self):
+        """
+        Starts the worker threads once per process. Called from the first
+        request so the threads belong to the gunicorn worker, not the master.
+        """
+        if self.workers <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"image-worker-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = self._claim()
+            except Error as err:
+                print(f"Image queue: failed to claim a job: {err}")
+                job = None
+            if job is None:
+                self._cleanup()
+                self._wakeup.wait(IMAGE_QUEUE_POLL_INTERVAL)
+                continue
+            self._handle(job)
+
+    def _claim(self):
+        token = uuid.uuid4().hex
+        with db_cursor(dictionary=True) as (connection, cursor):
+            self._expire_lost(connection, cursor)
+            cursor.execute("""
+                UPDATE image_jobs
+                SET status = 'processing', claim_token = %s, started_at = NOW(3), attempts = attempts + 1
+                WHERE ((status = 'pending' AND available_at <= NOW(3))
+                       OR (status = 'processing' AND started_at < NOW(3) - INTERVAL %s SECOND))
+                  AND attempts < %s
+                ORDER BY id
+                LIMIT 1
+            """, (token, IMAGE_JOB_TIMEOUT, IMAGE_JOB_MAX_ATTEMPTS))
+            connection.commit()
+            if cursor.rowcount == 0:
+                return None
+            cursor.execute("""
+                SELECT id, staged_path, filename, attempts, claim_token,
+                       TIMESTAMPDIFF(MICROSECOND, created_at, started_at) / 1000000 AS queued_seconds
+                FROM image_jobs WHERE claim_token = %s
+            """, (token,))
+            return cursor.fetchone()
+
+    def _expire_lost(self, connection, cursor):
+        """
+        Marks jobs failed whose worker died during their final attempt; the
+        claim above never picks them up again, so they would otherwise stay
+        'processing' for good.
+        """
+        cursor.execute("""
+            SELECT id, staged_path FROM image_jobs
+            WHERE status = 'processing' AND started_at < NOW(3) - INTERVAL %s SECOND AND attempts >= %s
+        """, (IMAGE_JOB_TIMEOUT, IMAGE_JOB_MAX_ATTEMPTS))
+        lost = cursor.fetchall()
+        if not lost:
+            return
+        placeholders = ", ".join(["%s"] * len(lost))
+        cursor.execute(f"""
+            UPDATE image_jobs SET status = 'failed', error = 'Worker lost during the final attempt', finished_at = NOW(3)
+            WHERE id IN ({placeholders}) AND status = 'processing'
+        """, tuple(job['id'] for job in lost))
+        expired = cursor.rowcount
+        connection.commit()
+        print(f"Image queue: marked {expired} lost job(s) as failed")
+        with self._lock:
+            self.failed += expired
+        for job in lost:
+            self._remove_staged(job)
+
+    def _handle(self, job):
+        started = time.monotonic()
+        try:
+            image_url, image_variants = self.process(job['staged_path'], job['filename'])
+        except Exception as err:
+            self._fail(job, err)
+            return
+
+        try:
+            done = self._complete(job, image_url, image_variants)
+        except Error as err:
+            # The job is claimed again after IMAGE_JOB_TIMEOUT
+            print(f"Image queue: failed to record job {job['id']}: {err}")
+            return
+        if done is None:
+            return
+
+        self._remove_staged(job)
+        with self._lock:
+            self.completed += 1
+            self._queued.append(float(job['queued_seconds'] or 0))
+            self._processing.append(time.monotonic() - started)
+        if self.on_done:
+            try:
+                self.on_done(done)
+            except Exception as err:
+                print(f"Image queue: completion hook failed for job {job['id']}: {err}")
+
+    def _complete(self, job, image_url, image_variants):
+        """
+        Marks the job done and writes the image to its application and
+        business in one transaction. Returns the job, or None when another
+        worker reclaimed it in the meantime.
+        """
+        variants_json = json.dumps(image_variants, separators=(',', ':'))
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute("""
+                UPDATE image_jobs SET status = 'done', image_url = %s, image_variants = %s, error = NULL, finished_at = NOW(3)
+                WHERE id = %s AND claim_token = %s
+            """, (image_url, variants_json, job['id'], job['claim_token']))
+            if cursor.rowcount == 0:
+                connection.rollback()
+                return None
+            # Locking read: sees a business attached by an approval that committed while we worked
+            cursor.execute("SELECT id, application_id, business_id FROM image_jobs WHERE id = %s FOR UPDATE", (job['id'],))
+            done = cursor.fetchone()
+            if done['application_id']:
+                cursor.execute("UPDATE business_applications SET image_url = %s, image_variants = %s WHERE id = %s",
+                               (image_url, variants_json, done['application_id']))
+            if done['business_id']:
+                cursor.execute("UPDATE businesses SET image_url = %s, image_variants = %s WHERE id = %s",
+                               (image_url, variants_json, done['business_id']))
+            connection.commit()
+        done['image_url'] = image_url
+        done['image_variants'] = image_variants
+        return done
+
+    def _fail(self, job, err):
+        final = job['attempts'] >= IMAGE_JOB_MAX_ATTEMPTS
+        retry_delay = IMAGE_JOB_RETRY_DELAY * 2 ** (job['attempts'] - 1)
+        print(f"Image queue: job {job['id']} failed (attempt {job['attempts']}): {err}")
+        try:
+            with db_cursor() as (connection, cursor):
+                cursor.execute("""
+                    UPDATE image_jobs SET status = %s, error = %s, finished_at = IF(%s, NOW(3), NULL),
+                        available_at = NOW(3) + INTERVAL %s SECOND
+                    WHERE id = %s AND claim_token = %s
+                """, ('failed' if final else 'pending', str(err)[:255], final, retry_delay, job['id'], job['claim_token']))
+                connection.commit()
+        except Error as db_err:
+            print(f"Image queue: failed to record failure of job {job['id']}: {db_err}")
+            return
+        with self._lock:
+            if final:
+                self.failed += 1
+            else:
+                self.retried += 1
+        if final:
+            self._remove_staged(job)
+
+    def _remove_staged(self, job):
+        try:
+            os.remove(job['staged_path'])
+        except OSError:
+            pass
+
+    def _cleanup(self):
+        """
+        Deletes finished jobs older than IMAGE_JOB_RETENTION_DAYS and runs
+        maintenance(), at most once an hour.
+        """
+        if time.monotonic() - self._last_cleanup < 3600:
+            return
+        self._last_cleanup = time.monotonic()
+        try:
+            with db_cursor() as (connection, cursor):
+                cursor.execute("""
+                    DELETE FROM image_jobs
+                    WHERE status IN ('done', 'failed') AND finished_at < NOW() - INTERVAL %s DAY
+                """, (IMAGE_JOB_RETENTION_DAYS,))
+                connection.commit()
+        except Error as err:
+            print(f"Image queue: cleanup failed: {err}")
+        if self.maintenance:
+            try:
+                self.maintenance()
+            except Exception as err:
+                print(f"Image queue: maintenance failed: {err}")
+
+    # --- Metrics ---
+
+    def depth(self, cursor=None):
+        """
+        Queue depth across all processes: jobs per status and the age of the
+        oldest pending one. Pass cursor to read it on a connection the caller
+        already holds (the request's), otherwise one is checked out.
+        """
+        if cursor is None:
+            with db_cursor() as (connection, cursor):
+                return self.depth(cursor)
+        cursor.execute("""
+            SELECT status, COUNT(*), TIMESTAMPDIFF(SECOND, MIN(created_at), NOW(3))
+            FROM image_jobs WHERE status IN ('pending', 'processing', 'failed')
+            GROUP BY status
+        """)
+        rows = cursor.fetchall()
+        depth = {'pending': 0, 'processing': 0, 'failed': 0, 'oldest_pending_seconds': None}
+        for status, count, oldest in rows:
+            depth[status] = count
+            if status == 'pending':
+                depth['oldest_pending_seconds'] = oldest
+        return depth
+
+    def stats(self, cursor=None):
+        with self._lock:
+            queued = list(self._queued)
+            processing = list(self._processing)
+            stats = {
+                'workers': len(self._threads) if self._pid == os.getpid() else 0,
+                'completed': self.completed,
+                'failed': self.failed,
+                'retried': self.retried,
+            }
+        for name, samples in (('queued_seconds', queued), ('processing_seconds', processing)):
+            stats[name] = {
+                'avg': round(statistics.mean(samples), 3),
+                'p50': round(percentile(samples, 0.5), 3),
+                'p95': round(percentile(samples, 0.95), 3),
+                'max': round(max(samples), 3),
+            } if samples else None
+        try:
+            stats['depth'] = self.depth(cursor)
+        except Error as err:
+            stats['depth'] = {'error': str(err)}
+        return stats
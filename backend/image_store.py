@@ -0,0 +1,347 @@
+"""
+Content-addressed, deduplicated store for processed business images.
+
+Every variant file is named after the hash of its bytes (image_pipeline)
+and registered in image_blobs with a reference count. Triggers on
+businesses and business_applications keep ref_count equal to the number of
+rows whose image_variants list the file, so an image shared by an
+application, the business approved from it and any re-upload of the same
+logo is stored once, and deleting one of those rows never removes a file
+the others still show. Unreferenced files are deleted by collect_garbage()
+after IMAGE_GC_GRACE seconds.
+
+image_sources remembers the result of processing each distinct upload
+(keyed by the hash of the raw bytes and the variant settings), so a
+duplicate upload skips decoding, re-encoding and disk writes entirely.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from mysql.connector import Error
+
+from db_config import db_cursor, get_db_connection
+from image_pipeline import (
+    IMAGE_MAX_DIMENSION, IMAGE_QUALITY, IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_WIDTHS,
+    hashed_filename, process_image,
+)
+
+IMAGE_GC_GRACE = int(os.getenv('IMAGE_GC_GRACE', '3600'))  # seconds an unreferenced file is kept
+GC_BATCH_SIZE = 500
+
+# Output depends on these; changing one makes earlier uploads count as new
+SETTINGS_FINGERPRINT = json.dumps([IMAGE_VARIANT_WIDTHS, IMAGE_VARIANT_FORMATS, IMAGE_MAX_DIMENSION, IMAGE_QUALITY])
+
+# One file per row of image_variants.variants, matched on the file name at the end of its URL
+VARIANT_FILES = """
+    JSON_TABLE({column}, '$.variants[*]' COLUMNS (url VARCHAR(512) PATH '$.url')) v
+"""
+REF_TRIGGER_TEMPLATES = {
+    'trg_{table}_images_after_insert': """
+        CREATE TRIGGER trg_{table}_images_after_insert AFTER INSERT ON {table}
+        FOR EACH ROW
+        UPDATE image_blobs b JOIN {new_files} ON b.filename = SUBSTRING_INDEX(v.url, '/', -1)
+        SET b.ref_count = b.ref_count + 1
+    """,
+    'trg_{table}_images_after_update': """
+        CREATE TRIGGER trg_{table}_images_after_update AFTER UPDATE ON {table}
+        FOR EACH ROW
+        BEGIN
+            IF NOT (NEW.image_variants <=> OLD.image_variants) THEN
+                UPDATE image_blobs b JOIN {old_files} ON b.filename = SUBSTRING_INDEX(v.url, '/', -1)
+                SET b.ref_count = b.ref_count - 1;
+                UPDATE image_blobs b JOIN {new_files} ON b.filename = SUBSTRING_INDEX(v.url, '/', -1)
+                SET b.ref_count = b.ref_count + 1;
+            END IF;
+        END
+    """,
+    'trg_{table}_images_after_delete': """
+        CREATE TRIGGER trg_{table}_images_after_delete AFTER DELETE ON {table}
+        FOR EACH ROW
+        UPDATE image_blobs b JOIN {old_files} ON b.filename = SUBSTRING_INDEX(v.url, '/', -1)
+        SET b.ref_count = b.ref_count - 1
+    """,
+}
+REFERENCING_TABLES = ('businesses', 'business_applications')
+
+
+def ref_triggers(table):
+    """
+    {trigger name: CREATE TRIGGER statement} for one referencing table.
+    """
+    values = {
+        'table': table,
+        'new_files': VARIANT_FILES.format(column='NEW.image_variants').strip(),
+        'old_files': VARIANT_FILES.format(column='OLD.image_variants').strip(),
+    }
+    return {name.format(**values): statement.format(**values) for name, statement in REF_TRIGGER_TEMPLATES.items()}
+
+
+def create_image_ref_triggers(cursor):
+    """
+    Creates whichever reference-count triggers are missing on the tables that
+    have an image_variants column. Needs the TRIGGER privilege and MySQL 8
+    (JSON_TABLE).
+    """
+    cursor.execute("""
+        SELECT TRIGGER_NAME FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE()
+    """)
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND COLUMN_NAME = 'image_variants'
+    """)
+    tables = {row[0] for row in cursor.fetchall()}
+
+    for table in REFERENCING_TABLES:
+        if table not in tables:
+            continue
+        for name, statement in ref_triggers(table).items():
+            if name not in existing:
+                cursor.execute(statement)
+                print(f"Created trigger {name}")
+
+
+def sync_image_refs(cursor):
+    """
+    Registers every file referenced by a business or application and
+    recomputes every ref_count. Run after bulk rewrites that bypass the
+    triggers or when the counts are suspected to be off. Returns the number
+    of registered files.
+    """
+    references = " UNION ALL ".join(
+        f"SELECT image_variants FROM {table} WHERE image_variants IS NOT NULL" for table in REFERENCING_TABLES
+    )
+    files = f"""
+        SELECT SUBSTRING_INDEX(v.url, '/', -1) AS filename, MAX(v.bytes) AS bytes, COUNT(*) AS refs
+        FROM ({references}) r,
+             JSON_TABLE(r.image_variants, '$.variants[*]' COLUMNS (url VARCHAR(512) PATH '$.url', bytes INT PATH '$.bytes')) v
+        GROUP BY filename
+    """
+    cursor.execute(f"""
+        INSERT INTO image_blobs (filename, bytes)
+        SELECT filename, bytes FROM ({files}) f
+        WHERE NOT EXISTS (SELECT 1 FROM image_blobs b WHERE b.filename = f.filename)
+    """)
+    cursor.execute(f"""
+        UPDATE image_blobs b
+        LEFT JOIN ({files}) f ON f.filename = b.filename
+        SET b.ref_count = IFNULL(f.refs, 0)
+    """)
+    cursor.execute("SELECT COUNT(*) FROM image_blobs")
+    return cursor.fetchone()[0]
+
+
+def create_image_store_tables():
+    """
+    Creates the 'image_blobs' and 'image_sources' tables and the
+    reference-count triggers if they don't already exist.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to database. Image store tables not created.")
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_blobs (
+                filename VARCHAR(64) PRIMARY KEY,
+                bytes INT NOT NULL DEFAULT 0,
+                ref_count INT NOT NULL DEFAULT 0,
+                created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+                updated_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3),
+                INDEX idx_image_blobs_ref_count_updated (ref_count, updated_at)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_sources (
+                source_hash CHAR(64) PRIMARY KEY,
+                image_url VARCHAR(255) NOT NULL,
+                image_variants JSON NOT NULL,
+                created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3)
+            )
+        """)
+        connection.commit()
+        print("Image store tables checked/created successfully.")
+    except Error as err:
+        print(f"Error creating image store tables: {err}")
+
+    # Separate step: raise_on_warnings turns the 'already exists' note above
+    # into an error, which must not skip the triggers on existing tables
+    try:
+        create_image_ref_triggers(cursor)
+        connection.commit()
+    except Error as err:
+        print(f"Error creating image reference triggers: {err}")
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+def source_hash(path):
+    """
+    SHA-256 of a raw upload and the variant settings, read in chunks.
+    """
+    digest = hashlib.sha256(SETTINGS_FINGERPRINT.encode('utf-8'))
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageStore:
+    """
+    Processes staged uploads into dest_dir (served under url_prefix),
+    reusing the stored result for uploads it has seen before.
+    """
+
+    def __init__(self, dest_dir, url_prefix):
+        self.dest_dir = dest_dir
+        self.url_prefix = url_prefix
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.processed = 0
+        self.files_written = 0
+        self.files_shared = 0
+        self.files_collected = 0
+
+    def process(self, source_path):
+        """
+        Returns (image_url, image_variants) for the upload at source_path.
+        """
+        key = source_hash(source_path)
+        stored = self._lookup(key)
+        if stored is not None:
+            with self._lock:
+                self.reused += 1
+            return stored
+
+        image_url, image_variants = process_image(source_path, self.write, self.url_prefix)
+        with db_cursor() as (connection, cursor):
+            cursor.execute("""
+                INSERT INTO image_sources (source_hash, image_url, image_variants) VALUES (%s, %s, %s) AS new
+                ON DUPLICATE KEY UPDATE image_url = new.image_url, image_variants = new.image_variants
+            """, (key, image_url, json.dumps(image_variants, separators=(',', ':'))))
+            connection.commit()
+        with self._lock:
+            self.processed += 1
+        return image_url, image_variants
+
+    def _lookup(self, key):
+        """
+        The stored result for an upload, if every one of its files is still
+        registered. Refreshes their updated_at so collect_garbage() leaves
+        them alone until the job has written its references.
+        """
+        with db_cursor(dictionary=True) as (connection, cursor):
+            cursor.execute("SELECT image_url, image_variants FROM image_sources WHERE source_hash = %s", (key,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            image_variants = json.loads(row['image_variants'])
+            filenames = [os.path.basename(variant['url']) for variant in image_variants['variants']]
+            placeholders = ", ".join(["%s"] * len(filenames))
+            # Locking read: waits for a garbage collection in progress on these files
+            cursor.execute(f"SELECT COUNT(*) AS found FROM image_blobs WHERE filename IN ({placeholders}) FOR UPDATE", tuple(filenames))
+            if cursor.fetchone()['found'] != len(filenames):
+                cursor.execute("DELETE FROM image_sources WHERE source_hash = %s", (key,))
+                connection.commit()
+                return None
+            cursor.execute(f"UPDATE image_blobs SET updated_at = NOW(3) WHERE filename IN ({placeholders})", tuple(filenames))
+            connection.commit()
+        return row['image_url'], image_variants
+
+    def write(self, data, ext):
+        """
+        image_pipeline write hook: registers the file, then writes it unless
+        an identical one is already on disk. Registering first means a
+        concurrent collect_garbage() either finishes deleting the old copy
+        before we look, or sees a fresh updated_at and keeps it.
+        """
+        filename = hashed_filename(data, ext)
+        with db_cursor() as (connection, cursor):
+            cursor.execute("""
+                INSERT INTO image_blobs (filename, bytes) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE updated_at = NOW(3)
+            """, (filename, len(data)))
+            connection.commit()
+
+        filepath = os.path.join(self.dest_dir, filename)
+        if os.path.exists(filepath):
+            with self._lock:
+                self.files_shared += 1
+            return filename
+        temp_path = f"{filepath}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, filepath)
+        with self._lock:
+            self.files_written += 1
+        return filename
+
+    def collect_garbage(self, grace=IMAGE_GC_GRACE):
+        """
+        Deletes files no business or application has referenced for grace
+        seconds. Each file is removed while its row is locked, so a write()
+        or lookup of the same content waits and then re-creates it.
+        Returns the number of files deleted.
+        """
+        with db_cursor() as (connection, cursor):
+            cursor.execute("""
+                SELECT filename FROM image_blobs
+                WHERE ref_count <= 0 AND updated_at < NOW(3) - INTERVAL %s SECOND
+                LIMIT %s
+            """, (grace, GC_BATCH_SIZE))
+            candidates = [row[0] for row in cursor.fetchall()]
+
+            collected = 0
+            for filename in candidates:
+                cursor.execute("""
+                    SELECT filename FROM image_blobs
+                    WHERE filename = %s AND ref_count <= 0 AND updated_at < NOW(3) - INTERVAL %s SECOND
+                    FOR UPDATE
+                """, (filename, grace))
+                if cursor.fetchone() is None:
+                    connection.rollback()
+                    continue
+                try:
+                    os.remove(os.path.join(self.dest_dir, filename))
+                except FileNotFoundError:
+                    pass
+                cursor.execute("DELETE FROM image_blobs WHERE filename = %s", (filename,))
+                connection.commit()
+                collected += 1
+
+        with self._lock:
+            self.files_collected += collected
+        if collected:
+            print(f"Image store: deleted {collected} unreferenced files")
+        return collected
+
+    def stats(self, cursor=None):
+        """
+        Counters for this worker plus totals from image_blobs, read with
+        cursor when given (the request's), otherwise on a pooled connection.
+        """
+        with self._lock:
+            stats = {
+                'uploads_processed': self.processed,
+                'uploads_reused': self.reused,
+                'files_written': self.files_written,
+                'files_shared': self.files_shared,
+                'files_collected': self.files_collected,
+            }
+        try:
+            if cursor is None:
+                with db_cursor() as (connection, cursor):
+                    return self.stats(cursor)
+            cursor.execute("SELECT COUNT(*), IFNULL(SUM(bytes), 0), IFNULL(SUM(ref_count <= 0), 0) FROM image_blobs")
+            files, total_bytes, unreferenced = cursor.fetchone()
+            stats.update({'files': files, 'bytes': int(total_bytes), 'unreferenced': int(unreferenced)})
+        except Error as err:
+            stats['error'] = str(err)
+        return stats
@@ -1,12 +1,63 @@
 import os
+import re
+import sys
 import json
+import time
+import argparse
+import hashlib
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 import mysql.connector
 from mysql.connector import Error
 from db_config import get_db_connection
 
-def import_json_data():
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsed_businesses')
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))  # rows per multi-row INSERT and per commit
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '0')) or None  # parser processes; None = one per CPU
+
+# Scraped columns in INSERT order, with their widths in the businesses table
+IMPORT_COLUMNS = [
+    ('business_name', 255),
+    ('location', 255),
+    ('contact_name', 100),
+    ('tel', 20),
+    ('email', 100),
+    ('description', None),
+    ('website', 255),
+    ('category', 100),
+]
+
+def import_json_data(workers=IMPORT_WORKERS, batch_size=IMPORT_BATCH_SIZE, full=False):
+    """
+    Imports JSON data from the parsed_businesses directory into the MySQL database.
+    Incremental: only files changed since the last run are read (see
+    bulk_import_json_data). Databases without the import key columns fall
+    back to the row-by-row import.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to the database. Exiting.")
+        return False
+    cursor = connection.cursor()
+    try:
+        keyed = has_import_columns(cursor)
+    except Error as err:
+        print(f"Database error: {err}")
+        return False
+    finally:
+        cursor.close()
+        connection.close()
+
+    if not keyed:
+        print("ℹ️  businesses.import_key is missing, importing row by row; run python migrations/add_import_key.py for incremental imports")
+        import_json_data_row_by_row()
+        return True
+    return bulk_import_json_data(workers, batch_size, full)
+
+def import_json_data_row_by_row():
     """
-    Imports JSON data from the parsed_businesses directory into the MySQL database
+    The original import: reads every file and inserts businesses one by one,
+    skipping those whose name and phone already exist. Needs no migration.
     """
     # Connect to the database
     connection = get_db_connection()
@@ -113,5 +164,291 @@ def import_json_data():
             connection.close()
             print("MySQL connection closed.")
 
+def normalize_name(business_name):
+    """
+    Case-, width- and punctuation-insensitive business name.
+    """
+    name = unicodedata.normalize('NFKC', business_name).casefold()
+    return " ".join(re.findall(r"\w+", name))
+
+
+def import_key(business_name, tel):
+    """
+    Identity of a scraped business: its normalized name and the digits of
+    its phone number(s). Stored in businesses.import_key, which is unique.
+    """
+    raw = f"{normalize_name(business_name)}\x1f{re.sub(r'[^0-9]', '', tel or '')}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def page_order(filename):
+    """
+    Sorts page_2.json before page_10.json.
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", filename)]
+
+
+def parse_file(file_path):
+    """
+    Parser process: reads one JSON file into import rows.
+    Returns (filename, content_hash, rows, error); each row is
+    (import_key, values) with values in IMPORT_COLUMNS order, clipped to the
+    column widths. An empty file or [] has no rows.
+    """
+    filename = os.path.basename(file_path)
+    try:
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+        businesses = json.loads(data) if data.strip() else []
+    except (OSError, ValueError) as err:
+        return filename, None, [], str(err)
+    if not isinstance(businesses, list):
+        return filename, content_hash, [], "not a JSON array"
+
+    rows = []
+    for business in businesses:
+        if not isinstance(business, dict) or not (business.get('business_name') or '').strip():
+            continue
+        values = []
+        for column, width in IMPORT_COLUMNS:
+            value = (business.get(column) or '').strip()
+            values.append(value[:width] if width else value)
+        rows.append((import_key(business['business_name'], business.get('tel')), tuple(values)))
+    return filename, content_hash, rows, None
+
+
+def has_import_columns(cursor):
+    """
+    True when businesses has the import_key and import_owned columns.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME IN ('import_key', 'import_owned')
+    """)
+    return cursor.fetchone()[0] == 2
+
+
+def create_import_manifest_table(cursor):
+    """
+    Creates the 'import_manifest' table if it doesn't already exist: one row
+    per parsed_businesses file with the size, mtime and SHA-256 it was last
+    imported at, and the ids of the businesses it produced.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS import_manifest (
+            filename VARCHAR(255) PRIMARY KEY,
+            size BIGINT NOT NULL,
+            mtime_ns BIGINT NOT NULL,
+            content_hash CHAR(64) CHARACTER SET ascii NOT NULL,
+            business_ids JSON NOT NULL,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def scan_files():
+    """
+    {filename: (size, mtime_ns)} of every JSON file in JSON_DIR, in page order.
+    """
+    files = {}
+    for entry in sorted(os.scandir(JSON_DIR), key=lambda entry: page_order(entry.name)):
+        if entry.name.endswith('.json') and entry.is_file():
+            stat = entry.stat()
+            files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def load_manifest(cursor):
+    cursor.execute("SELECT filename, size, mtime_ns, content_hash, business_ids FROM import_manifest")
+    return {
+        filename: {'size': size, 'mtime_ns': mtime_ns, 'content_hash': content_hash, 'business_ids': json.loads(business_ids)}
+        for filename, size, mtime_ns, content_hash, business_ids in cursor.fetchall()
+    }
+
+
+def in_batches(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def upsert_statement(row_count):
+    columns = ", ".join(column for column, width in IMPORT_COLUMNS)
+    placeholders = "(%s, TRUE, " + ", ".join(["%s"] * len(IMPORT_COLUMNS)) + ")"
+    # The key columns (import_key, business_name, tel) are left alone; admin fields are never touched.
+    # Rows created or edited through the app (import_owned = FALSE) keep their values.
+    updates = ", ".join(
+        f"{column} = IF(import_owned, new.{column}, {column})"
+        for column, width in IMPORT_COLUMNS if column not in ('business_name', 'tel')
+    )
+    return f"""
+        INSERT INTO businesses (import_key, import_owned, {columns})
+        VALUES {", ".join([placeholders] * row_count)} AS new
+        ON DUPLICATE KEY UPDATE {updates}
+    """
+
+
+def bulk_import_json_data(workers=IMPORT_WORKERS, batch_size=IMPORT_BATCH_SIZE, full=False):
+    """
+    Set-based, incremental import of the parsed_businesses directory.
+
+    import_manifest remembers the size, mtime, content hash and produced
+    business ids of every file. Files whose size and mtime match are not
+    opened; files that were rewritten with the same content only have their
+    manifest entry touched. The rest are parsed in parallel, deduplicated in
+    memory on import_key and written with multi-row INSERT ... ON DUPLICATE
+    KEY UPDATE against the unique import_key index, committing every
+    batch_size rows. Businesses that a changed or deleted file no longer
+    lists, and that no other file lists, are deleted. full=True re-imports
+    every file regardless of the manifest.
+
+    Only rows with import_owned set are updated or deleted: businesses added
+    or edited through the app match on import_key, so they are not inserted
+    twice, but keep their values.
+
+    Requires the import_key and import_owned columns
+    (python migrations/add_import_key.py).
+    """
+    started = time.perf_counter()
+    files = scan_files()
+
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to the database. Exiting.")
+        return False
+
+    cursor = connection.cursor()
+    try:
+        if not has_import_columns(cursor):
+            print("❌ businesses.import_key or import_owned is missing; run python migrations/add_import_key.py first")
+            return False
+
+        create_import_manifest_table(cursor)
+        manifest = load_manifest(cursor)
+        stale = [
+            filename for filename, (size, mtime_ns) in files.items()
+            if full or filename not in manifest
+            or (manifest[filename]['size'], manifest[filename]['mtime_ns']) != (size, mtime_ns)
+        ]
+        vanished = [filename for filename in manifest if filename not in files]
+        if not stale and not vanished:
+            print(f"✅ {len(files)} files unchanged, nothing to import ({(time.perf_counter() - started) * 1000:.1f} ms)")
+            return True
+
+        results = []
+        if stale:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(parse_file, [os.path.join(JSON_DIR, filename) for filename in stale], chunksize=8))
+
+        rows = {}
+        file_keys = {}
+        duplicates = 0
+        touched = 0
+        for filename, content_hash, file_rows, error in results:
+            size, mtime_ns = files[filename]
+            if error:
+                # Left as it was; the file is retried on the next run
+                print(f"Error reading file {filename}: {error}")
+                continue
+            previous = manifest.get(filename)
+            if not full and previous and previous['content_hash'] == content_hash:
+                cursor.execute("UPDATE import_manifest SET size = %s, mtime_ns = %s WHERE filename = %s", (size, mtime_ns, filename))
+                touched += 1
+                continue
+            file_keys[filename] = (size, mtime_ns, content_hash, [key for key, values in file_rows])
+            for key, values in file_rows:
+                if key in rows:
+                    duplicates += 1
+                    continue
+                rows[key] = values
+        connection.commit()
+        parsed = time.perf_counter()
+        print(
+            f"📄 {len(files) - len(stale)} files unchanged, {touched} rewritten with the same content, "
+            f"{len(file_keys)} changed, {len(vanished)} removed; {len(rows)} businesses to write "
+            f"({duplicates} duplicates dropped), parsed in {parsed - started:.2f}s"
+        )
+
+        cursor.execute("SELECT COUNT(*) FROM businesses")
+        count_before = cursor.fetchone()[0]
+
+        items = list(rows.items())
+        key_ids = {}
+        affected = 0
+        for batch in in_batches(items, batch_size):
+            params = [value for key, values in batch for value in (key,) + values]
+            cursor.execute(upsert_statement(len(batch)), params)
+            affected += cursor.rowcount
+            cursor.execute(
+                f"SELECT import_key, id FROM businesses WHERE import_key IN ({', '.join(['%s'] * len(batch))})",
+                [key for key, values in batch],
+            )
+            key_ids.update(cursor.fetchall())
+            connection.commit()
+
+        categories = sorted({values[-1] for values in rows.values() if values[-1]})
+        if categories:
+            cursor.execute(
+                # A no-op update, not INSERT IGNORE: raise_on_warnings would turn the duplicate-key warning into an error
+                f"INSERT INTO categories (name) VALUES {', '.join(['(%s)'] * len(categories))} ON DUPLICATE KEY UPDATE id = id",
+                categories,
+            )
+
+        # Rows are committed; now record what each file produced and drop what no file lists any more
+        released = set()
+        for filename, (size, mtime_ns, content_hash, keys) in file_keys.items():
+            if filename in manifest:
+                released.update(manifest[filename]['business_ids'])
+            business_ids = sorted({key_ids[key] for key in keys if key in key_ids})
+            cursor.execute("""
+                REPLACE INTO import_manifest (filename, size, mtime_ns, content_hash, business_ids)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (filename, size, mtime_ns, content_hash, json.dumps(business_ids)))
+            manifest[filename] = {'business_ids': business_ids}
+        for filename in vanished:
+            released.update(manifest.pop(filename)['business_ids'])
+            cursor.execute("DELETE FROM import_manifest WHERE filename = %s", (filename,))
+
+        listed = {business_id for entry in manifest.values() for business_id in entry['business_ids']}
+        orphaned = sorted(released - listed)
+        deleted = 0
+        for batch in in_batches(orphaned, batch_size):
+            # Only rows the importer owns; businesses added or edited through the app are kept
+            cursor.execute(
+                f"DELETE FROM businesses WHERE id IN ({', '.join(['%s'] * len(batch))}) AND import_owned",
+                batch,
+            )
+            deleted += cursor.rowcount
+        connection.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM businesses")
+        inserted = cursor.fetchone()[0] - count_before + deleted
+    except Error as err:
+        print(f"Database error: {err}")
+        connection.rollback()
+        return False
+    finally:
+        cursor.close()
+        connection.close()
+
+    finished = time.perf_counter()
+    written = finished - parsed
+    # ON DUPLICATE KEY UPDATE counts 1 per insert and 2 per changed row
+    updated = max(0, affected - inserted) // 2
+    print(f"✅ {inserted} inserted, {updated} updated, {len(rows) - inserted - updated} unchanged, {deleted} deleted; {len(categories)} categories")
+    print(f"⏱️  {len(rows)} rows written in {written:.2f}s ({len(rows) / max(written, 1e-9):.0f} rows/s), {finished - started:.2f}s in total")
+    return True
+
+
 if __name__ == "__main__":
-    import_json_data()
+    parser = argparse.ArgumentParser(description="Import parsed_businesses/*.json into the businesses table")
+    parser.add_argument('--bulk', action='store_true', help="the default; kept so existing commands keep working")
+    parser.add_argument('--row-by-row', action='store_true', help="the original one-insert-per-business import, without the manifest")
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS, help="parser processes (default: one per CPU)")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="rows per INSERT and per commit")
+    parser.add_argument('--full', action='store_true', help="re-import every file even if the manifest says it is unchanged")
+    args = parser.parse_args()
+    if args.row_by_row:
+        import_json_data_row_by_row()
+        sys.exit(0)
+    sys.exit(0 if import_json_data(args.workers, args.batch_size, args.full) else 1)
@@ -0,0 +1,56 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config and rollups
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+from rollups import create_daily_rollups_table, create_rollup_triggers, backfill_rollups
+
+def add_daily_rollups():
+    """
+    Migration script to create the daily_rollups table and its triggers, and
+    to (re)build its contents from businesses and business_applications.
+    Safe to run again at any time to rebuild the rollups from scratch.
+    Requires migrations/normalize_categories.py to have been run.
+    """
+    create_daily_rollups_table()
+
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+        create_rollup_triggers(cursor)
+
+        print("🔄 Backfilling daily rollups...")
+        written = backfill_rollups(cursor)
+        connection.commit()
+        print(f"✅ Wrote {written} rollup rows")
+
+        cursor.execute("SELECT MIN(day), MAX(day), SUM(businesses_added), SUM(applications_received) FROM daily_rollups")
+        first_day, last_day, businesses, applications = cursor.fetchone()
+        print(f"ℹ️  {first_day} to {last_day}: {businesses or 0} businesses, {applications or 0} applications")
+
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add Daily Rollups")
+    print("=" * 60)
+    success = add_daily_rollups()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,65 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+
+# FULLTEXT index used by MATCH ... AGAINST search; the column list must match FULLTEXT_COLUMNS in app.py
+FULLTEXT_INDEXES = [
+    ('ft_businesses_search', 'business_name, description, category'),
+]
+
+def add_fulltext_index():
+    """
+    Migration script to add the FULLTEXT index used by /api/businesses?q= and
+    /api/businesses/search. Without it every search is a LIKE '%term%' scan
+    over the TEXT columns. Words shorter than innodb_ft_min_token_size (3 by
+    default) are not indexed; the app matches those with LIKE.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        for index_name, columns in FULLTEXT_INDEXES:
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'businesses'
+                AND INDEX_NAME = %s
+            """, (index_name,))
+
+            if cursor.fetchone()[0] == 0:
+                print(f"➕ Adding index {index_name} ({columns})...")
+                cursor.execute(f"ALTER TABLE businesses ADD FULLTEXT INDEX {index_name} ({columns})")
+                print(f"✅ Successfully added index {index_name}")
+            else:
+                print(f"ℹ️  Index {index_name} already exists")
+
+        connection.commit()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add FULLTEXT Search Index")
+    print("=" * 60)
+    success = add_fulltext_index()
+    sys.exit(0 if success else 1)
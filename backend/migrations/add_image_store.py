@@ -0,0 +1,58 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config and image_store
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+from image_store import create_image_store_tables, create_image_ref_triggers, sync_image_refs
+
+def add_image_store():
+    """
+    Migration script to create the image_blobs and image_sources tables and
+    the triggers that count references to each stored image file, and to
+    register the files already referenced by businesses and applications.
+    Safe to run again at any time to recount every reference.
+    Requires MySQL 8 and migrations/add_image_variants.py to have been run.
+    """
+    create_image_store_tables()
+
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+        create_image_ref_triggers(cursor)
+
+        print("🔄 Registering stored images and counting references...")
+        files = sync_image_refs(cursor)
+        connection.commit()
+        print(f"✅ {files} image files registered")
+
+        cursor.execute("SELECT COUNT(*), IFNULL(SUM(bytes), 0) FROM image_blobs WHERE ref_count <= 0")
+        unreferenced, unreferenced_bytes = cursor.fetchone()
+        if unreferenced:
+            print(f"ℹ️  {unreferenced} files ({unreferenced_bytes} bytes) are unreferenced and will be deleted by the image queue")
+
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add Image Store")
+    print("=" * 60)
+    success = add_image_store()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,71 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+
+# Tables that store an uploaded image next to its variants
+TABLES = ['businesses', 'business_applications', 'image_jobs']
+
+def add_image_variants():
+    """
+    Migration script to add the image_variants JSON column (the responsive
+    size/format variants written by the image queue) next to image_url.
+    Images uploaded before this keep working through image_url alone.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        for table in TABLES:
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = %s
+            """, (table,))
+            if cursor.fetchone()[0] == 0:
+                print(f"ℹ️  {table} table does not exist yet, skipping...")
+                continue
+
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = %s
+                AND COLUMN_NAME = 'image_variants'
+            """, (table,))
+            if cursor.fetchone()[0] == 0:
+                print(f"➕ Adding image_variants column to {table} table...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN image_variants JSON NULL AFTER image_url")
+                print(f"✅ Successfully added image_variants column to {table} table")
+            else:
+                print(f"ℹ️  image_variants column already exists in {table} table")
+
+        connection.commit()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add image_variants Column")
+    print("=" * 60)
+    success = add_image_variants()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,158 @@
+import mysql.connector
+from mysql.connector import Error
+import json
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+from import_json_to_db import IMPORT_COLUMNS, JSON_DIR, import_key, parse_file, scan_files
+
+BACKFILL_BATCH_SIZE = 1000
+
+def add_import_key():
+    """
+    Migration script to add businesses.import_key, the unique normalized
+    (business_name, tel) key the bulk importer upserts on
+    (python import_json_to_db.py).
+
+    Existing businesses are keyed in id order. When several rows share a key
+    only the oldest gets it; the others keep NULL and are reported, nothing
+    is deleted.
+
+    Also adds businesses.import_owned, which marks the rows the importer may
+    overwrite and delete. Keyed rows are marked only when their scraped
+    columns still equal a record in parsed_businesses, or when an import
+    wrote them last (import_manifest); businesses added or edited through
+    the app stay unmarked. Rows are only ever marked, so reruns are safe.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'businesses'
+            AND COLUMN_NAME = 'import_key'
+        """)
+        if cursor.fetchone()[0] == 0:
+            print("➕ Adding import_key column to businesses table...")
+            cursor.execute("ALTER TABLE businesses ADD COLUMN import_key CHAR(32) CHARACTER SET ascii NULL AFTER id")
+            print("✅ Successfully added import_key column")
+        else:
+            print("ℹ️  import_key column already exists in businesses table")
+
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'businesses'
+            AND INDEX_NAME = 'uq_businesses_import_key'
+        """)
+        if cursor.fetchone()[0] == 0:
+            print("➕ Adding unique index uq_businesses_import_key...")
+            cursor.execute("ALTER TABLE businesses ADD UNIQUE INDEX uq_businesses_import_key (import_key)")
+            print("✅ Successfully added uq_businesses_import_key")
+        else:
+            print("ℹ️  uq_businesses_import_key already exists")
+
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'businesses'
+            AND COLUMN_NAME = 'import_owned'
+        """)
+        if cursor.fetchone()[0] == 0:
+            print("➕ Adding import_owned column to businesses table...")
+            cursor.execute("ALTER TABLE businesses ADD COLUMN import_owned BOOLEAN NOT NULL DEFAULT FALSE AFTER import_key")
+            print("✅ Successfully added import_owned column")
+        else:
+            print("ℹ️  import_owned column already exists in businesses table")
+
+        print("🔑 Keying existing businesses...")
+        cursor.execute("SELECT import_key FROM businesses WHERE import_key IS NOT NULL")
+        taken = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT id, business_name, tel FROM businesses WHERE import_key IS NULL ORDER BY id")
+        updates = []
+        duplicates = []
+        for business_id, business_name, tel in cursor.fetchall():
+            key = import_key(business_name, tel)
+            if key in taken:
+                duplicates.append((business_id, business_name))
+                continue
+            taken.add(key)
+            updates.append((key, business_id))
+
+        for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+            cursor.executemany("UPDATE businesses SET import_key = %s WHERE id = %s", updates[start:start + BACKFILL_BATCH_SIZE])
+            connection.commit()
+        print(f"✅ Keyed {len(updates)} businesses")
+
+        if duplicates:
+            print(f"⚠️  {len(duplicates)} businesses duplicate an older one by name and phone and were left unkeyed:")
+            for business_id, business_name in duplicates[:20]:
+                print(f"   - #{business_id} {business_name}")
+
+        print("🔎 Finding businesses the importer owns...")
+        scraped = {}
+        for filename in scan_files():
+            _, _, rows, error = parse_file(os.path.join(JSON_DIR, filename))
+            for key, values in rows:
+                scraped.setdefault(key, values)
+
+        imported_at = {}
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'import_manifest'
+        """)
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT business_ids, imported_at FROM import_manifest")
+            for business_ids, file_imported_at in cursor.fetchall():
+                for business_id in json.loads(business_ids):
+                    imported_at[business_id] = max(file_imported_at, imported_at.get(business_id, file_imported_at))
+
+        columns = ", ".join(column for column, width in IMPORT_COLUMNS)
+        cursor.execute(f"SELECT id, import_key, updated_at, {columns} FROM businesses WHERE import_key IS NOT NULL AND NOT import_owned")
+        owned = []
+        for business_id, key, updated_at, *values in cursor.fetchall():
+            # Compared the way parse_file cleans them: stripped and clipped to the column width
+            values = tuple((value or '').strip()[:width] if width else (value or '').strip() for value, (column, width) in zip(values, IMPORT_COLUMNS))
+            last_import = imported_at.get(business_id)
+            if scraped.get(key) == values or (last_import and updated_at and updated_at <= last_import):
+                owned.append((business_id,))
+
+        for start in range(0, len(owned), BACKFILL_BATCH_SIZE):
+            cursor.executemany("UPDATE businesses SET import_owned = TRUE WHERE id = %s", owned[start:start + BACKFILL_BATCH_SIZE])
+            connection.commit()
+        print(f"✅ {len(owned)} more businesses are owned by the importer; the others are never overwritten or deleted by it")
+
+        connection.commit()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add businesses.import_key")
+    print("=" * 60)
+    success = add_import_key()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,76 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+
+# (index name, column list) pairs that back keyset pagination on /api/businesses
+PAGINATION_INDEXES = [
+    ('idx_businesses_name_id', 'business_name, id'),
+    ('idx_businesses_category_id_name_id', 'category_id, business_name, id'),
+]
+
+def add_pagination_indexes():
+    """
+    Migration script to add the composite indexes used by cursor pagination.
+    A cursor page seeks with (business_name, id) > (%s, %s) ORDER BY business_name, id,
+    which these indexes serve without a filesort, with or without a category filter.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME = 'category_id'
+        """)
+        has_category_id = cursor.fetchone()[0] > 0
+
+        for index_name, columns in PAGINATION_INDEXES:
+            if 'category_id' in columns and not has_category_id:
+                # normalize_categories.py adds the column and creates this index
+                print(f"ℹ️  Skipping index {index_name}: businesses.category_id is missing, run migrations/normalize_categories.py")
+                continue
+
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = 'businesses'
+                AND INDEX_NAME = %s
+            """, (index_name,))
+
+            if cursor.fetchone()[0] == 0:
+                print(f"➕ Adding index {index_name} ({columns})...")
+                cursor.execute(f"ALTER TABLE businesses ADD INDEX {index_name} ({columns})")
+                print(f"✅ Successfully added index {index_name}")
+            else:
+                print(f"ℹ️  Index {index_name} already exists")
+
+        connection.commit()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add Pagination Indexes")
+    print("=" * 60)
+    success = add_pagination_indexes()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,85 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection
+
+# (table, index name, column list) for the filters and sorts issued by app.py.
+# Category filters sorted by name are already served by idx_businesses_category_id_name_id
+# (add_pagination_indexes.py). The category indexes are on category_id: the indexes on
+# the free-text category column are dropped by normalize_categories.py.
+QUERY_INDEXES = [
+    # Featured pool: WHERE featured = TRUE ORDER BY id (InnoDB appends the primary key)
+    ('businesses', 'idx_businesses_featured', 'featured'),
+    # Monthly growth / new-business counts: date_added ranges, overall and per category
+    ('businesses', 'idx_businesses_date_added', 'date_added'),
+    ('businesses', 'idx_businesses_category_id_date_added', 'category_id, date_added'),
+    # Data version MAX(updated_at) and the search index sync (updated_at >= last sync)
+    ('businesses', 'idx_businesses_updated_at', 'updated_at'),
+    # Admin application lists: WHERE status = %s ORDER BY submitted_at DESC, and unfiltered
+    ('business_applications', 'idx_applications_status_submitted', 'status, submitted_at'),
+    ('business_applications', 'idx_applications_submitted', 'submitted_at'),
+]
+
+def add_query_indexes():
+    """
+    Migration script to add the indexes checked by check_query_plans.py.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME = 'category_id'
+        """)
+        has_category_id = cursor.fetchone()[0] > 0
+
+        for table, index_name, columns in QUERY_INDEXES:
+            if 'category_id' in columns and not has_category_id:
+                # normalize_categories.py adds the column and creates this index
+                print(f"ℹ️  Skipping index {index_name}: businesses.category_id is missing, run migrations/normalize_categories.py")
+                continue
+
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                AND TABLE_NAME = %s
+                AND INDEX_NAME = %s
+            """, (table, index_name))
+
+            if cursor.fetchone()[0] == 0:
+                print(f"➕ Adding index {index_name} on {table} ({columns})...")
+                cursor.execute(f"ALTER TABLE {table} ADD INDEX {index_name} ({columns})")
+                print(f"✅ Successfully added index {index_name}")
+            else:
+                print(f"ℹ️  Index {index_name} already exists")
+
+        connection.commit()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Add Query Indexes")
+    print("=" * 60)
+    success = add_query_indexes()
+    sys.exit(0 if success else 1)
@@ -5,7 +5,7 @@ import os
 
 # Add the parent directory to the Python path so we can import db_config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db_config import get_db_connection
+from db_config import get_db_connection, sync_category_links
 
 def consolidate_categories():
     """
@@ -316,12 +316,11 @@ def consolidate_categories():
         # Step 1: Get all unique new categories from the mapping
         new_categories = set(category_mapping.values())
 
-        # Step 2: Clear existing categories table and insert new consolidated categories
-        print("Clearing existing categories and inserting new consolidated categories...")
-        cursor.execute("DELETE FROM categories")
-
+        # Step 2: Insert the consolidated categories. Old ones are removed once no business
+        # references them (Step 4), since businesses.category_id points at categories.id
+        print("Inserting new consolidated categories...")
         for new_category in sorted(new_categories):
-            cursor.execute("INSERT INTO categories (name) VALUES (%s)", (new_category,))
+            cursor.execute("INSERT INTO categories (name) VALUES (%s) ON DUPLICATE KEY UPDATE id = id", (new_category,))
 
         # Step 3: Update businesses table with new categories
         print("Updating business categories...")
@@ -354,6 +353,16 @@ def consolidate_categories():
                 print(f"  - {cat}")
             print("\nThese categories will remain unchanged. You may want to manually review and update them.")
 
+        # Relink category_id and recount (the triggers already did this row by row), then
+        # drop categories that no business uses any more
+        sync_category_links(cursor)
+        placeholders = ", ".join(["%s"] * len(new_categories))
+        cursor.execute(
+            f"DELETE FROM categories WHERE business_count = 0 AND name NOT IN ({placeholders})",
+            tuple(sorted(new_categories))
+        )
+        print(f"Removed {cursor.rowcount} unused categories")
+
         # Commit all changes
         connection.commit()
 
@@ -373,10 +382,9 @@ def consolidate_categories():
         # Show category distribution
         print(f"\n=== CATEGORY DISTRIBUTION ===")
         cursor.execute("""
-            SELECT category, COUNT(*) as business_count
-            FROM businesses
-            WHERE category IS NOT NULL AND category != ''
-            GROUP BY category
+            SELECT name, business_count
+            FROM categories
+            WHERE business_count > 0
             ORDER BY business_count DESC
         """)
 
@@ -422,7 +430,7 @@ if __name__ == "__main__":
             print("\nConsolidation failed. Please check the error messages above.")
     else:
         print("This script will:")
-        print("1. Replace all existing categories with consolidated ones")
+        print("1. Add the consolidated categories and remove unused ones")
         print("2. Update all business records to use new category names")
         print("3. Show unmapped categories for manual review")
         print()
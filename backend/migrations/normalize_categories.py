@@ -0,0 +1,135 @@
+import mysql.connector
+from mysql.connector import Error
+import sys
+import os
+
+# Add parent directory to path to import db_config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_config import get_db_connection, create_category_triggers, sync_category_links
+
+# Indexes on the free-text category column, superseded by the category_id ones
+OBSOLETE_INDEXES = ['idx_businesses_category_name_id', 'idx_businesses_category_date_added']
+
+CATEGORY_ID_INDEXES = [
+    ('idx_businesses_category_id_name_id', 'category_id, business_name, id'),
+    ('idx_businesses_category_id_date_added', 'category_id, date_added'),
+]
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = %s
+        AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = %s
+        AND INDEX_NAME = %s
+    """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+def normalize_categories():
+    """
+    Migration script to link businesses to categories by id.
+
+    Adds categories.business_count and businesses.category_id (a foreign key to
+    categories.id), backfills both, and installs the triggers that keep them in
+    step with businesses.category, which stays as the display name. Category
+    filters then use the (category_id, business_name, id) index and
+    /api/categories/top reads categories ordered by business_count.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("❌ Failed to connect to database. Migration aborted.")
+        return False
+
+    try:
+        cursor = connection.cursor()
+
+        if not column_exists(cursor, 'categories', 'business_count'):
+            print("➕ Adding business_count column to categories table...")
+            cursor.execute("ALTER TABLE categories ADD COLUMN business_count INT NOT NULL DEFAULT 0")
+            print("✅ Successfully added business_count column")
+        else:
+            print("ℹ️  business_count column already exists")
+
+        if not index_exists(cursor, 'categories', 'idx_categories_business_count'):
+            cursor.execute("ALTER TABLE categories ADD INDEX idx_categories_business_count (business_count)")
+            print("✅ Successfully added index idx_categories_business_count")
+
+        if not column_exists(cursor, 'businesses', 'category_id'):
+            print("➕ Adding category_id column to businesses table...")
+            cursor.execute("ALTER TABLE businesses ADD COLUMN category_id INT NULL AFTER category")
+            print("✅ Successfully added category_id column")
+        else:
+            print("ℹ️  category_id column already exists")
+
+        for index_name, columns in CATEGORY_ID_INDEXES:
+            if not index_exists(cursor, 'businesses', index_name):
+                print(f"➕ Adding index {index_name} ({columns})...")
+                cursor.execute(f"ALTER TABLE businesses ADD INDEX {index_name} ({columns})")
+                print(f"✅ Successfully added index {index_name}")
+            else:
+                print(f"ℹ️  Index {index_name} already exists")
+
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM information_schema.TABLE_CONSTRAINTS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'businesses'
+            AND CONSTRAINT_NAME = 'fk_businesses_category'
+        """)
+        if cursor.fetchone()[0] == 0:
+            print("➕ Adding foreign key fk_businesses_category...")
+            cursor.execute("""
+                ALTER TABLE businesses ADD CONSTRAINT fk_businesses_category
+                FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL
+            """)
+            print("✅ Successfully added foreign key")
+        else:
+            print("ℹ️  Foreign key fk_businesses_category already exists")
+
+        create_category_triggers(cursor)
+
+        print("🔄 Linking businesses to categories and counting...")
+        linked = sync_category_links(cursor)
+        print(f"✅ Linked {linked} businesses")
+
+        for index_name in OBSOLETE_INDEXES:
+            if index_exists(cursor, 'businesses', index_name):
+                cursor.execute(f"ALTER TABLE businesses DROP INDEX {index_name}")
+                print(f"🗑️  Dropped index {index_name}")
+
+        connection.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM businesses WHERE category_id IS NULL")
+        unlinked = cursor.fetchone()[0]
+        if unlinked:
+            print(f"ℹ️  {unlinked} businesses have no category")
+
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Error as err:
+        print(f"❌ Error during migration: {err}")
+        connection.rollback()
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+            print("🔌 Database connection closed.")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 Starting Database Migration: Normalize Categories")
+    print("=" * 60)
+    success = normalize_categories()
+    sys.exit(0 if success else 1)
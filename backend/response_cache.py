@@ -0,0 +1,207 @@
+"""
+Response cache for public read endpoints.
+
+Entries are serialized response bodies tagged with the data they were built
+from ('businesses', 'categories'); a write invalidates its tags and every
+entry carrying them is dropped. Two backends:
+
+- memory: per-worker LRU with a TTL, no setup required;
+- redis:  a local Redis server shared by all gunicorn workers, so an entry
+          built by one worker serves the others and an invalidation from any
+          worker reaches all of them. Needs the optional redis package.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # optional, only needed for RESPONSE_CACHE_BACKEND=redis
+    redis = None
+
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')  # 'memory', 'redis' or 'none'
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '60'))  # seconds; bounds staleness from writes outside the app
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', 'redis://127.0.0.1:6379/0')
+RESPONSE_CACHE_PREFIX = os.getenv('RESPONSE_CACHE_PREFIX', 'marylandbiz:response:')
+
+
+class MemoryBackend:
+    """
+    Least-recently-used entries are evicted once max_entries is reached.
+    """
+    name = 'memory'
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (body, expires, tags)
+        self._tags = {}                 # tag -> set of keys
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._delete(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, body, ttl, tags):
+        with self._lock:
+            self._delete(key)
+            while len(self._entries) >= self.max_entries:
+                self._delete(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (body, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._delete(key)
+
+    def _delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'evictions': self.evictions}
+
+
+class RedisBackend:
+    """
+    Bodies live under prefix + key with a Redis TTL; each tag is a Redis set
+    of the keys built from it, deleted together on invalidation.
+    """
+    name = 'redis'
+
+    def __init__(self, url=RESPONSE_CACHE_URL, prefix=RESPONSE_CACHE_PREFIX):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key, body, ttl, tags):
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, body, ex=max(1, int(ttl)))
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, self.prefix + key)
+            pipe.expire(tag_key, max(1, int(ttl)))
+        pipe.execute()
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe = self._client.pipeline()
+            pipe.smembers(tag_key)
+            pipe.delete(tag_key)
+            keys, _ = pipe.execute()
+            if keys:
+                self._client.delete(*keys)
+
+    def stats(self):
+        return {'url': RESPONSE_CACHE_URL.rsplit('@', 1)[-1]}
+
+
+class ResponseCache:
+    """
+    Front end over a backend: counts hits and misses per endpoint, and turns
+    backend errors into misses so an unreachable cache server never fails a
+    request. Errors are reported to logger (the app's logger when built by
+    create_response_cache from app.py).
+    """
+
+    def __init__(self, backend, ttl=RESPONSE_CACHE_TTL, logger=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._counters = {}   # endpoint -> [hits, misses]
+        self.errors = 0
+
+    def _count(self, endpoint, hit):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, [0, 0])
+            counters[0 if hit else 1] += 1
+
+    def get(self, endpoint, key):
+        if self.backend is None:
+            return None
+        try:
+            body = self.backend.get(key)
+        except Exception as err:
+            self.errors += 1
+            self.logger.error(f"Response cache read failed: {err}")
+            body = None
+        self._count(endpoint, body is not None)
+        return body
+
+    def set(self, key, body, tags, ttl=None):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, body, ttl or self.ttl, tuple(tags))
+        except Exception as err:
+            self.errors += 1
+            self.logger.error(f"Response cache write failed: {err}")
+
+    def invalidate(self, *tags):
+        if self.backend is None:
+            return
+        try:
+            self.backend.invalidate_tags(tags)
+        except Exception as err:
+            self.errors += 1
+            self.logger.error(f"Response cache invalidation failed: {err}")
+
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: {'hits': hits, 'misses': misses} for endpoint, (hits, misses) in self._counters.items()}
+        hits = sum(counters['hits'] for counters in endpoints.values())
+        misses = sum(counters['misses'] for counters in endpoints.values())
+        stats = {
+            'backend': self.backend.name if self.backend else 'none',
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+            'errors': self.errors,
+            'endpoints': endpoints,
+        }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+
+def create_response_cache(backend_name=RESPONSE_CACHE_BACKEND, logger=None):
+    """
+    Builds the cache selected by RESPONSE_CACHE_BACKEND. A redis backend that
+    cannot be set up falls back to the in-process one.
+    """
+    if backend_name == 'none':
+        return ResponseCache(None, logger=logger)
+    if backend_name == 'redis':
+        try:
+            return ResponseCache(RedisBackend(), logger=logger)
+        except RuntimeError as err:
+            (logger or logging.getLogger(__name__)).warning(f"{err}; using the in-process response cache")
+    return ResponseCache(MemoryBackend(), logger=logger)
@@ -0,0 +1,215 @@
+"""
+Daily analytics rollups: businesses added and applications received per day
+and category, in the daily_rollups table.
+
+Triggers keep the table current on every insert (an approved application
+inserts its business, so approvals are counted too); businesses that are
+deleted or change category are moved out of their old bucket, so the
+rollup always matches a GROUP BY over the live tables. backfill_rollups()
+rebuilds it from scratch (python migrations/add_daily_rollups.py).
+
+Analytics endpoints read a date range from here, O(days x categories)
+rows however many businesses there are.
+"""
+import datetime
+
+from mysql.connector import Error
+
+from db_config import get_db_connection
+
+GRANULARITIES = ('day', 'week', 'month')
+MAX_BUCKETS = 1000
+
+# category_id 0 holds rows without a category (NULL cannot be part of the primary key)
+ROLLUP_TRIGGERS = {
+    'businesses': {
+        'trg_businesses_rollup_after_insert': """
+            CREATE TRIGGER trg_businesses_rollup_after_insert AFTER INSERT ON businesses
+            FOR EACH ROW
+            INSERT INTO daily_rollups (day, category_id, businesses_added)
+            VALUES (DATE(NEW.date_added), IFNULL(NEW.category_id, 0), 1)
+            ON DUPLICATE KEY UPDATE businesses_added = businesses_added + 1
+        """,
+        'trg_businesses_rollup_after_update': """
+            CREATE TRIGGER trg_businesses_rollup_after_update AFTER UPDATE ON businesses
+            FOR EACH ROW
+            BEGIN
+                IF NOT (NEW.category_id <=> OLD.category_id) OR DATE(NEW.date_added) <> DATE(OLD.date_added) THEN
+                    UPDATE daily_rollups SET businesses_added = businesses_added - 1
+                    WHERE day = DATE(OLD.date_added) AND category_id = IFNULL(OLD.category_id, 0);
+                    INSERT INTO daily_rollups (day, category_id, businesses_added)
+                    VALUES (DATE(NEW.date_added), IFNULL(NEW.category_id, 0), 1)
+                    ON DUPLICATE KEY UPDATE businesses_added = businesses_added + 1;
+                END IF;
+            END
+        """,
+        'trg_businesses_rollup_after_delete': """
+            CREATE TRIGGER trg_businesses_rollup_after_delete AFTER DELETE ON businesses
+            FOR EACH ROW
+            UPDATE daily_rollups SET businesses_added = businesses_added - 1
+            WHERE day = DATE(OLD.date_added) AND category_id = IFNULL(OLD.category_id, 0)
+        """,
+    },
+    'business_applications': {
+        'trg_applications_rollup_after_insert': """
+            CREATE TRIGGER trg_applications_rollup_after_insert AFTER INSERT ON business_applications
+            FOR EACH ROW
+            INSERT INTO daily_rollups (day, category_id, applications_received)
+            VALUES (DATE(NEW.submitted_at), IFNULL((SELECT id FROM categories WHERE name = NEW.category), 0), 1)
+            ON DUPLICATE KEY UPDATE applications_received = applications_received + 1
+        """,
+    },
+}
+
+
+def create_rollup_triggers(cursor):
+    """
+    Creates whichever rollup triggers are missing on the tables that exist.
+    Needs the TRIGGER privilege.
+    """
+    cursor.execute("""
+        SELECT EVENT_OBJECT_TABLE, TRIGGER_NAME FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE()
+    """)
+    existing = {row[1] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    tables = {row[0] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'businesses' AND COLUMN_NAME = 'category_id'
+    """)
+    if cursor.fetchone()[0] == 0:
+        print("businesses.category_id is missing; run migrations/normalize_categories.py")
+        tables.discard('businesses')
+
+    for table, triggers in ROLLUP_TRIGGERS.items():
+        if table not in tables:
+            continue
+        for name, statement in triggers.items():
+            if name not in existing:
+                cursor.execute(statement)
+                print(f"Created trigger {name}")
+
+
+def create_daily_rollups_table():
+    """
+    Creates the 'daily_rollups' table and its triggers if they don't already exist.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Failed to connect to database. Daily rollups table not created.")
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_rollups (
+                day DATE NOT NULL,
+                category_id INT NOT NULL DEFAULT 0,
+                businesses_added INT NOT NULL DEFAULT 0,
+                applications_received INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, category_id),
+                INDEX idx_daily_rollups_category_day (category_id, day)
+            )
+        """)
+        connection.commit()
+        print("Daily rollups table checked/created successfully.")
+    except Error as err:
+        print(f"Error creating daily rollups table: {err}")
+
+    # Separate step: raise_on_warnings turns the 'already exists' note above
+    # into an error, which must not skip the triggers on an existing table
+    try:
+        create_rollup_triggers(cursor)
+        connection.commit()
+    except Error as err:
+        print(f"Error creating daily rollup triggers: {err}")
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+def backfill_rollups(cursor):
+    """
+    Rebuilds daily_rollups from businesses and business_applications.
+    Returns the number of rollup rows written.
+    """
+    cursor.execute("DELETE FROM daily_rollups")
+    cursor.execute("""
+        INSERT INTO daily_rollups (day, category_id, businesses_added)
+        SELECT DATE(date_added), IFNULL(category_id, 0), COUNT(*)
+        FROM businesses
+        WHERE date_added IS NOT NULL
+        GROUP BY DATE(date_added), IFNULL(category_id, 0)
+    """)
+    written = cursor.rowcount
+    cursor.execute("""
+        INSERT INTO daily_rollups (day, category_id, applications_received)
+        SELECT day, category_id, received FROM (
+            SELECT DATE(a.submitted_at) AS day, IFNULL(c.id, 0) AS category_id, COUNT(*) AS received
+            FROM business_applications a
+            LEFT JOIN categories c ON c.name = a.category
+            GROUP BY DATE(a.submitted_at), IFNULL(c.id, 0)
+        ) AS new
+        ON DUPLICATE KEY UPDATE applications_received = new.received
+    """)
+    return written + cursor.rowcount
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'week':
+        return day + datetime.timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return day + datetime.timedelta(days=1)
+
+
+def query_series(cursor, start, end, granularity='day', category_id=None):
+    """
+    Returns one entry per day/week/month bucket between start and end (dates,
+    inclusive), empty buckets included:
+    [{'period': date, 'businesses_added': n, 'applications_received': m}, ...]
+    Raises ValueError for an unknown granularity or a range that is too long.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    buckets = {}
+    period = bucket_start(start, granularity)
+    while period <= end:
+        buckets[period] = {'period': period, 'businesses_added': 0, 'applications_received': 0}
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f"Range too long: more than {MAX_BUCKETS} {granularity} buckets")
+        period = next_bucket(period, granularity)
+
+    query = """
+        SELECT day, SUM(businesses_added) AS businesses_added, SUM(applications_received) AS applications_received
+        FROM daily_rollups
+        WHERE day BETWEEN %s AND %s
+    """
+    params = [start, end]
+    if category_id is not None:
+        query += " AND category_id = %s"
+        params.append(category_id)
+    query += " GROUP BY day"
+    cursor.execute(query, tuple(params))
+
+    for day, businesses_added, applications_received in cursor.fetchall():
+        bucket = buckets[bucket_start(day, granularity)]
+        bucket['businesses_added'] += int(businesses_added)
+        bucket['applications_received'] += int(applications_received)
+    return list(buckets.values())
@@ -0,0 +1,264 @@
+"""
+In-process inverted index over the businesses table with BM25 ranking.
+
+Each gunicorn worker builds its own index at startup and keeps it current
+incrementally: writes handled by this worker call upsert()/remove() directly,
+and sync() picks up writes made by other workers from the updated_at column.
+"""
+import bisect
+import math
+import os
+import re
+import threading
+import time
+
+# Per-field weights; a term in the name counts three times as much as one in the description
+FIELD_WEIGHTS = {
+    'business_name': 3.0,
+    'category': 2.0,
+    'location': 1.0,
+    'description': 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+SEARCH_INDEX_SYNC_INTERVAL = float(os.getenv('SEARCH_INDEX_SYNC_INTERVAL', '30'))  # seconds
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with'
+))
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def stem(word):
+    """
+    Light suffix-stripping stemmer: folds plurals and -ing/-ed forms so that
+    'plumbers', 'plumbing' and 'plumbed' share a term. It deliberately leaves
+    short words alone rather than over-stem names.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('ing') and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith('ed') and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    if word.endswith('er') and len(word) > 5:
+        word = word[:-2]
+    # 'shipping' -> 'shipp' -> 'ship'
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Case-folds, splits and stems text into index terms.
+    """
+    if not text:
+        return []
+    return [stem(word) for word in _TOKEN_RE.findall(text.casefold()) if word not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25F-style scoring: each field's term frequency and
+    length are scaled by its weight before the usual BM25 formula is applied.
+    Documents are the full business rows, so a search never touches MySQL.
+    """
+
+    def __init__(self, field_weights=FIELD_WEIGHTS, k1=BM25_K1, b=BM25_B):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = {}      # term -> {doc_id: weighted term frequency}
+        self._surface = {}       # unstemmed word -> term, for prefix expansion
+        self._vocab = []         # sorted unstemmed words
+        self._docs = {}          # doc_id -> business row
+        self._doc_terms = {}     # doc_id -> set of terms, for removal
+        self._doc_lengths = {}   # doc_id -> weighted length
+        self._total_length = 0.0
+        self.ready = False
+        self.last_sync = None    # database timestamp of the last full build or sync
+        self._last_sync_check = 0.0
+
+    # --- Building and incremental updates ---
+
+    def build(self, rows, synced_at=None):
+        """
+        Replaces the whole index with rows.
+        """
+        with self._lock:
+            self._postings = {}
+            self._surface = {}
+            self._vocab = []
+            self._docs = {}
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            self._total_length = 0.0
+            for row in rows:
+                self._add(row)
+            self._vocab = sorted(self._surface)
+            self.ready = True
+            self.last_sync = synced_at
+            self._last_sync_check = time.monotonic()
+
+    def upsert(self, row):
+        """
+        Adds a business or replaces its previous version.
+        """
+        with self._lock:
+            self._remove(row['id'])
+            for word in self._add(row):
+                bisect.insort(self._vocab, word)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _add(self, row):
+        """
+        Indexes one row and returns the unstemmed words that are new to the
+        vocabulary. Words are never dropped from the vocabulary; a stale one
+        simply expands to a term with no postings until the next build().
+        """
+        doc_id = row['id']
+        frequencies = {}
+        new_words = []
+        length = 0.0
+        for field, weight in self.field_weights.items():
+            text = row.get(field)
+            if not text:
+                continue
+            words = [word for word in _TOKEN_RE.findall(text.casefold()) if word not in STOPWORDS]
+            length += weight * len(words)
+            for word in words:
+                term = self._surface.get(word)
+                if term is None:
+                    term = self._surface[word] = stem(word)
+                    new_words.append(word)
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+        self._docs[doc_id] = row
+        self._doc_terms[doc_id] = set(frequencies)
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        return new_words
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        del self._docs[doc_id]
+
+    def sync_due(self, interval=SEARCH_INDEX_SYNC_INTERVAL):
+        return self.ready and time.monotonic() - self._last_sync_check >= interval
+
+    def sync(self, cursor):
+        """
+        Applies writes made by other workers since the last sync: rows whose
+        updated_at moved forward are re-indexed and ids missing from the
+        table are dropped. Callers run it when sync_due() says so.
+        Returns (changed_rows, removed_ids) so other indexes can follow along.
+        """
+        self._last_sync_check = time.monotonic()
+
+        cursor.execute("SELECT NOW() as now")
+        synced_at = cursor.fetchone()['now']
+        cursor.execute("SELECT * FROM businesses WHERE updated_at >= %s", (self.last_sync,))
+        changed = cursor.fetchall()
+        cursor.execute("SELECT id FROM businesses")
+        live_ids = {row['id'] for row in cursor.fetchall()}
+
+        with self._lock:
+            for row in changed:
+                self.upsert(row)
+            removed_ids = set(self._docs) - live_ids
+            for doc_id in removed_ids:
+                self._remove(doc_id)
+            self.last_sync = synced_at
+        return changed, removed_ids
+
+    # --- Querying ---
+
+    def _expand_prefix(self, prefix):
+        """
+        Terms of the indexed words that start with prefix.
+        """
+        start = bisect.bisect_left(self._vocab, prefix)
+        expansions = []
+        for word in self._vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not word.startswith(prefix):
+                break
+            expansions.append(self._surface[word])
+        return expansions
+
+    def search(self, query, limit=20, offset=0, prefix_last=True):
+        """
+        Returns (total, rows) for documents containing every query term, best
+        BM25 score first. With prefix_last, the last word also matches any term
+        it is a prefix of, so results update as the user types.
+        """
+        words = [word for word in _TOKEN_RE.findall((query or '').casefold()) if word not in STOPWORDS]
+        if not words:
+            return 0, []
+
+        with self._lock:
+            # Each query word becomes a group of alternative terms
+            groups = [[stem(word)] for word in words]
+            # A trailing space means the last word is complete
+            if prefix_last and query == query.rstrip():
+                last = words[-1]
+                groups[-1] = list(dict.fromkeys([stem(last)] + self._expand_prefix(last)))
+
+            candidates = None
+            for group in groups:
+                matching = set()
+                for term in group:
+                    matching.update(self._postings.get(term, ()))
+                candidates = matching if candidates is None else candidates & matching
+                if not candidates:
+                    return 0, []
+
+            doc_count = len(self._docs)
+            avg_length = self._total_length / doc_count if doc_count else 0.0
+            scores = dict.fromkeys(candidates, 0.0)
+            for group in groups:
+                for term in group:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id in candidates.intersection(postings):
+                        frequency = postings[doc_id]
+                        norm = 1 - self.b + self.b * (self._doc_lengths[doc_id] / avg_length if avg_length else 0)
+                        scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+
+            ranked = sorted(candidates, key=lambda doc_id: (-scores[doc_id], self._docs[doc_id]['business_name'], doc_id))
+            return len(ranked), [self._docs[doc_id] for doc_id in ranked[offset:offset + limit]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'documents': len(self._docs),
+                'terms': len(self._postings),
+                'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+            }
@@ -0,0 +1,115 @@
+"""
+JSON encoding and response compression for the API.
+
+OrjsonProvider replaces Flask's JSON provider, so every jsonify() call
+encodes with orjson when it is installed and the body goes out as bytes
+with no intermediate str. Dates keep the HTTP-date format of Flask's
+default provider ("Tue, 21 Oct 2025 07:28:00 GMT", naive values as UTC), so
+clients see the same payloads. Without orjson it behaves exactly like
+Flask's default.
+
+compress() gzips or brotli-compresses a body for the encoding negotiated in
+app.py; brotli is used only when the optional brotli package is installed.
+"""
+import datetime
+import decimal
+import gzip
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes; smaller bodies go out as-is
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """
+    Same output as werkzeug.http.http_date (what Flask's provider writes for
+    dates), formatted directly instead of through email.utils, which would
+    cost more than encoding the rest of the row.
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return (
+        f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+        f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+def _default(value):
+    """
+    Types orjson does not encode itself, plus dates (passed through with
+    OPT_PASSTHROUGH_DATETIME), converted the way Flask's default provider does.
+    """
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    """
+    # Rows keep their column order; sorting every key of every row costs more than it is worth
+    sort_keys = False
+
+    def _options(self, indent):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self._options(indent)) + b"\n",
+            mimetype=self.mimetype
+        )
+
+
+def compress(body, encoding):
+    """
+    Compresses body with encoding ('br' or 'gzip').
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
@@ -0,0 +1,159 @@
+"""
+In-memory typeahead index over business names, categories and cities.
+
+Completions are looked up by bisecting a sorted array of normalized keys, so
+a suggestion request never touches MySQL. The index is kept current the same
+way as search_index.SearchIndex: build() at worker start, upsert()/remove()
+on writes.
+"""
+import bisect
+import heapq
+import re
+import threading
+
+DEFAULT_SUGGESTION_LIMIT = 8
+FEATURED_POPULARITY = 3  # a featured business ranks like one with three listings
+
+_NORMALIZE_RE = re.compile(r"[^0-9a-z]+")
+# "..., Baltimore, MD 21218" -> "Baltimore"; segments with digits or ending in a street type are addresses
+_CITY_RE = re.compile(r"(?:^|,)\s*([A-Za-z][A-Za-z .'-]*?)\s*,\s*(?:MD|Maryland|VA|Virginia|DC|PA|DE)\b", re.IGNORECASE)
+_STREET_WORDS = frozenset((
+    'ave', 'avenue', 'blvd', 'boulevard', 'ct', 'court', 'dr', 'drive', 'hwy', 'highway', 'lane', 'ln',
+    'pike', 'pkwy', 'parkway', 'rd', 'road', 'st', 'street', 'suite', 'ste', 'way'
+))
+
+
+def normalize(text):
+    """
+    Case-folds text and collapses punctuation and whitespace to single spaces.
+    """
+    return _NORMALIZE_RE.sub(' ', (text or '').casefold()).strip()
+
+
+def parse_cities(location):
+    """
+    Extracts city names from a free-text location. Some listings hold several
+    addresses separated by '|'.
+    """
+    cities = []
+    for address in (location or '').split('|'):
+        for match in _CITY_RE.finditer(address):
+            words = match.group(1).replace('.', ' ').split()
+            if not words or words[-1].lower() in _STREET_WORDS:
+                continue
+            city = ' '.join(words).title()
+            if city not in cities:
+                cities.append(city)
+    return cities
+
+
+class SuggestIndex:
+    """
+    Sorted array of (key, entry) pairs where every word start of an entry's
+    label is a key, so 'plu' completes 'Jim Bush Plumbing'. Entries are
+    ('business', id), ('category', name) and ('city', name); categories and
+    cities are ranked by how many businesses they hold.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []          # sorted (normalized key, entry)
+        self._labels = {}        # entry -> display text
+        self._popularity = {}    # entry -> score
+        self._doc_entries = {}   # business id -> entries it contributes to
+        self.ready = False
+
+    # --- Building and incremental updates ---
+
+    def build(self, rows):
+        with self._lock:
+            self._keys = []
+            self._labels = {}
+            self._popularity = {}
+            self._doc_entries = {}
+            for row in rows:
+                self._add(row, insert_keys=False)
+            self._keys = sorted(
+                (key, entry) for entry, label in self._labels.items() for key in self._keys_for(label)
+            )
+            self.ready = True
+
+    def upsert(self, row):
+        with self._lock:
+            self._remove(row['id'])
+            self._add(row, insert_keys=True)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    @staticmethod
+    def _keys_for(label):
+        words = normalize(label).split(' ')
+        return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+    def _add(self, row, insert_keys):
+        doc_id = row['id']
+        entries = []
+        if row.get('business_name'):
+            entries.append((('business', doc_id), row['business_name'], FEATURED_POPULARITY if row.get('featured') else 1))
+        category = (row.get('category') or '').strip()
+        if category and category != 'NULL':
+            entries.append((('category', category.casefold()), category, 1))
+        for city in parse_cities(row.get('location')):
+            entries.append((('city', city.casefold()), city, 1))
+
+        for entry, label, weight in entries:
+            if entry not in self._labels:
+                self._labels[entry] = label
+                if insert_keys:
+                    for key in self._keys_for(label):
+                        bisect.insort(self._keys, (key, entry))
+            self._popularity[entry] = self._popularity.get(entry, 0) + weight
+        self._doc_entries[doc_id] = [(entry, weight) for entry, _, weight in entries]
+
+    def _remove(self, doc_id):
+        for entry, weight in self._doc_entries.pop(doc_id, ()):
+            self._popularity[entry] -= weight
+            if self._popularity[entry] <= 0:
+                del self._popularity[entry]
+                for key in self._keys_for(self._labels.pop(entry)):
+                    index = bisect.bisect_left(self._keys, (key, entry))
+                    if index < len(self._keys) and self._keys[index] == (key, entry):
+                        del self._keys[index]
+
+    # --- Querying ---
+
+    def suggest(self, prefix, limit=DEFAULT_SUGGESTION_LIMIT):
+        """
+        Returns up to limit completions for prefix, most popular first.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            matches = set()
+            index = bisect.bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+                matches.add(self._keys[index][1])
+                index += 1
+
+            best = heapq.nsmallest(
+                limit, matches,
+                key=lambda entry: (-self._popularity[entry], len(self._labels[entry]), self._labels[entry])
+            )
+            suggestions = []
+            for entry in best:
+                kind, ref = entry
+                suggestion = {"type": kind, "text": self._labels[entry]}
+                if kind == 'business':
+                    suggestion["id"] = ref
+                else:
+                    suggestion["count"] = self._popularity[entry]
+                suggestions.append(suggestion)
+            return suggestions
+
+    def stats(self):
+        with self._lock:
+            return {'ready': self.ready, 'entries': len(self._labels), 'keys': len(self._keys)}
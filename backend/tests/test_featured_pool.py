@@ -0,0 +1,53 @@
+from featured_pool import FeaturedPool
+
+
+class FakeCursor:
+    """
+    Answers the three statements FeaturedPool issues from a list of rows.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def execute(self, query, params=()):
+        if 'featured = TRUE' in query:
+            self.result = [{'id': row['id'], 'business_name': row['business_name']} for row in self.rows if row['featured']]
+        elif query.startswith('SELECT id FROM'):
+            self.result = [{'id': row['id']} for row in self.rows]
+        else:
+            self.result = [row for row in self.rows if row['id'] in params]
+
+    def fetchall(self):
+        return self.result
+
+
+def business(doc_id, name, featured=False):
+    return {'id': doc_id, 'business_name': name, 'featured': featured}
+
+
+def names(rows):
+    return [row['business_name'] for row in rows]
+
+
+ROWS = [business(1, 'Zeta', True), business(2, 'Alpha', True), business(3, 'Mu'), business(4, 'Beta'), business(5, 'Chi')]
+
+
+def test_featured_businesses_are_returned_by_name():
+    pool = FeaturedPool()
+    assert names(pool.rotate(FakeCursor(ROWS), 1)) == ['Alpha']
+    assert names(pool.rotate(FakeCursor(ROWS), 2)) == ['Alpha', 'Zeta']
+
+
+def test_only_featured_businesses_when_fewer_than_limit():
+    pool = FeaturedPool()
+    assert names(pool.rotate(FakeCursor(ROWS), 4)) == ['Alpha', 'Zeta']
+    assert pool.stats()['random_candidates'] is None
+
+
+def test_random_selection_when_nothing_is_featured():
+    rows = [dict(row, featured=False) for row in ROWS]
+    pool = FeaturedPool()
+    selection = pool.rotate(FakeCursor(rows), 3)
+    assert len(selection) == 3 and len({row['id'] for row in selection}) == 3
+    assert len(pool.rotate(FakeCursor(rows), 10)) == 5
@@ -0,0 +1,53 @@
+from fuzzy_index import FuzzyIndex, edit_distance, max_edits, trigrams
+
+
+def business(doc_id, name, description=''):
+    return {'id': doc_id, 'business_name': name, 'description': description}
+
+
+def names(result):
+    total, rows = result
+    return [row['business_name'] for row in rows]
+
+
+def test_trigrams_are_padded():
+    assert trigrams('cat') == {'  c', ' ca', 'cat', 'at '}
+
+
+def test_edit_distance_and_budget():
+    assert edit_distance('managment', 'management', 3) == 1
+    assert edit_distance('kitten', 'sitting', 3) == 3
+    assert edit_distance('kitten', 'sitting', 1) == 2  # limit + 1 once it cannot fit
+    assert [max_edits(word) for word in ('shop', 'clothing', 'management')] == [1, 2, 3]
+
+
+def test_misspelled_words_find_their_business():
+    index = FuzzyIndex()
+    index.build([business(1, 'Property Management Group'), business(2, 'Kids Clothing Boutique')])
+    assert names(index.search('managment')) == ['Property Management Group']
+    assert names(index.search('cltothing')) == ['Kids Clothing Boutique']
+    assert index.search('zzzzqqq') == (0, [])
+
+
+def test_closer_and_name_matches_rank_first():
+    index = FuzzyIndex()
+    index.build([
+        business(1, 'Harbor Bakery', 'Bread and cakes'),
+        business(2, 'Bread Basket'),
+        business(3, 'Breed Kennels'),
+    ])
+    assert names(index.search('bread')) == ['Bread Basket', 'Breed Kennels', 'Harbor Bakery']
+
+
+def test_more_matching_words_rank_first():
+    index = FuzzyIndex()
+    index.build([business(1, 'Annapolis Plumbing'), business(2, 'Baltimore Plumbing')])
+    assert names(index.search('plumbng baltimor')) == ['Baltimore Plumbing', 'Annapolis Plumbing']
+
+
+def test_remove_forgets_words_and_trigrams():
+    index = FuzzyIndex()
+    index.build([business(1, 'Unique Name')])
+    index.remove(1)
+    assert index.search('unique') == (0, [])
+    assert index.stats() == {'ready': True, 'documents': 0, 'words': 0, 'trigrams': 0}
@@ -0,0 +1,90 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import image_pipeline  # noqa: E402
+from image_pipeline import ImageTooLarge, fit_size, hashed_filename, is_hashed_filename, process_image, variant_urls  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    monkeypatch.setattr(image_pipeline, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1080])
+    monkeypatch.setattr(image_pipeline, 'IMAGE_MAX_DIMENSION', 1080)
+    monkeypatch.setattr(image_pipeline, 'IMAGE_VARIANT_FORMATS', ['webp'])
+
+
+def encode(tmp_path, name, image):
+    path = tmp_path / name
+    image.save(path)
+    return str(path)
+
+
+def process(path):
+    """
+    Runs process_image with an in-memory store; returns (image_url, image_variants, files).
+    """
+    files = {}
+
+    def write(data, ext):
+        filename = hashed_filename(data, ext)
+        files[filename] = data
+        return filename
+
+    image_url, image_variants = process_image(path, write, '/uploads/')
+    return image_url, image_variants, files
+
+
+def sizes(image_variants, mime_type):
+    return [(variant['width'], variant['height']) for variant in image_variants['variants'] if variant['type'] == mime_type]
+
+
+def test_fit_size_fits_width_and_height_without_upscaling():
+    assert fit_size((2000, 1000), 640) == (640, 320)
+    assert fit_size((1000, 4000), 1080) == (270, 1080)
+    assert fit_size((200, 100), 640) == (200, 100)
+    assert fit_size((5000, 1), 320) == (320, 1)
+
+
+def test_one_variant_per_width_and_format(tmp_path):
+    path = encode(tmp_path, 'photo.jpg', Image.new('RGB', (2000, 1000), (200, 80, 20)))
+    image_url, image_variants, files = process(path)
+
+    expected = [(320, 160), (640, 320), (1080, 540)]
+    assert sizes(image_variants, 'image/jpeg') == expected
+    if image_pipeline.modern_formats():
+        assert sizes(image_variants, 'image/webp') == expected
+    assert (image_variants['width'], image_variants['height']) == (1080, 540)
+    assert image_url.endswith('.jpg') and image_url == image_variants['variants'][-1]['url']
+    assert image_variants['sources'][-1]['type'] == 'image/jpeg'
+    assert image_variants['sources'][-1]['srcset'].endswith(f"{image_url} 1080w")
+    assert all(is_hashed_filename(filename) for filename in files)
+    assert variant_urls(image_url, image_variants) == {f"/uploads/{filename}" for filename in files}
+
+
+def test_small_and_tall_images_are_not_upscaled_or_duplicated(tmp_path):
+    small = encode(tmp_path, 'small.jpg', Image.new('RGB', (200, 100)))
+    assert sizes(process(small)[1], 'image/jpeg') == [(200, 100)]
+
+    # Bound by IMAGE_MAX_DIMENSION, every width gives the same 270px image
+    tall = encode(tmp_path, 'tall.jpg', Image.new('RGB', (1000, 4000)))
+    assert sizes(process(tall)[1], 'image/jpeg') == [(270, 1080)]
+
+
+def test_transparent_images_fall_back_to_png(tmp_path):
+    path = encode(tmp_path, 'logo.png', Image.new('RGBA', (800, 400), (0, 0, 0, 0)))
+    image_url, image_variants, files = process(path)
+    assert image_url.endswith('.png')
+    assert sizes(image_variants, 'image/png') == [(320, 160), (640, 320), (800, 400)]
+    with Image.open(io.BytesIO(files[image_url.rsplit('/', 1)[1]])) as variant:
+        assert variant.mode == 'RGBA'
+
+
+def test_images_over_the_pixel_limit_are_rejected(tmp_path, monkeypatch):
+    path = encode(tmp_path, 'bomb.png', Image.new('L', (1000, 1000)))
+    monkeypatch.setattr(image_pipeline, 'IMAGE_MAX_PIXELS', 999999)
+    with pytest.raises(ImageTooLarge):
+        image_pipeline.check_image(path)
+    with pytest.raises(ImageTooLarge):
+        process(path)
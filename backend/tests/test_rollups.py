@@ -0,0 +1,74 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+pytest.importorskip("dotenv")
+
+from rollups import MAX_BUCKETS, query_series  # noqa: E402
+
+
+class FakeCursor:
+    """
+    Returns fixed (day, businesses_added, applications_received) rows and
+    records the statement it was given.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.query = None
+        self.params = None
+
+    def execute(self, query, params=()):
+        self.query = query
+        self.params = params
+
+    def fetchall(self):
+        return self.rows
+
+
+def day(month, number):
+    return datetime.date(2024, month, number)
+
+
+def test_daily_series_includes_empty_days():
+    cursor = FakeCursor([(day(1, 2), 3, 1)])
+    series = query_series(cursor, day(1, 1), day(1, 3))
+    assert [entry['period'] for entry in series] == [day(1, 1), day(1, 2), day(1, 3)]
+    assert [entry['businesses_added'] for entry in series] == [0, 3, 0]
+    assert [entry['applications_received'] for entry in series] == [0, 1, 0]
+
+
+def test_weekly_buckets_start_on_monday_and_sum_their_days():
+    # 2024-01-03 is a Wednesday
+    cursor = FakeCursor([(day(1, 3), 1, 0), (day(1, 7), 2, 4), (day(1, 8), 5, 0)])
+    series = query_series(cursor, day(1, 3), day(1, 20), 'week')
+    assert [entry['period'] for entry in series] == [day(1, 1), day(1, 8), day(1, 15)]
+    assert [entry['businesses_added'] for entry in series] == [3, 5, 0]
+    assert [entry['applications_received'] for entry in series] == [4, 0, 0]
+
+
+def test_monthly_buckets_cross_the_year_end():
+    cursor = FakeCursor([])
+    series = query_series(cursor, datetime.date(2023, 11, 15), datetime.date(2024, 2, 1), 'month')
+    assert [entry['period'] for entry in series] == [
+        datetime.date(2023, 11, 1), datetime.date(2023, 12, 1), day(1, 1), day(2, 1),
+    ]
+    assert all(entry['businesses_added'] == 0 for entry in series)
+
+
+def test_category_filter_is_passed_as_a_parameter():
+    cursor = FakeCursor([])
+    query_series(cursor, day(1, 1), day(1, 1), category_id=7)
+    assert 'category_id = %s' in cursor.query
+    assert cursor.params == (day(1, 1), day(1, 1), 7)
+
+
+def test_invalid_ranges_are_rejected():
+    cursor = FakeCursor([])
+    with pytest.raises(ValueError):
+        query_series(cursor, day(1, 1), day(1, 2), 'year')
+    with pytest.raises(ValueError):
+        query_series(cursor, day(1, 2), day(1, 1))
+    with pytest.raises(ValueError):
+        query_series(cursor, day(1, 1), day(1, 1) + datetime.timedelta(days=MAX_BUCKETS))
@@ -0,0 +1,69 @@
+from search_index import SearchIndex, stem, tokenize
+
+
+def business(doc_id, name, category='', location='', description=''):
+    return {'id': doc_id, 'business_name': name, 'category': category, 'location': location, 'description': description}
+
+
+def build(*rows):
+    index = SearchIndex()
+    index.build(rows)
+    return index
+
+
+def ids(result):
+    total, rows = result
+    return [row['id'] for row in rows]
+
+
+def test_stem_folds_plurals_and_verb_forms():
+    assert stem('plumbers') == stem('plumbing') == stem('plumbed') == 'plumb'
+    assert stem('bakeries') == 'bakery'
+    assert stem('shipping') == 'ship'
+    assert stem('bus') == 'bus'
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize('The Bakery of Baltimore') == ['bakery', 'baltimore']
+    assert tokenize(None) == []
+
+
+def test_name_matches_outrank_description_matches():
+    index = build(
+        business(1, 'Harbor Cafe', description='Plumbing supplies sold next door'),
+        business(2, 'Smith Plumbing'),
+    )
+    assert ids(index.search('plumbing ')) == [2, 1]
+
+
+def test_every_query_word_must_match():
+    index = build(
+        business(1, 'Smith Plumbing', location='Baltimore, MD'),
+        business(2, 'Jones Plumbing', location='Annapolis, MD'),
+    )
+    assert ids(index.search('plumbing baltimore ')) == [1]
+    assert index.search('plumbing towson ') == (0, [])
+
+
+def test_last_word_matches_as_prefix_unless_followed_by_space():
+    index = build(business(1, 'Plumbing Pros'), business(2, 'Plum Tree Bakery'))
+    assert sorted(ids(index.search('plu'))) == [1, 2]
+    assert ids(index.search('plum ')) == [2]
+
+
+def test_equal_scores_are_ordered_by_name_and_paged():
+    index = build(business(3, 'Beta Cafe'), business(1, 'Alpha Cafe'), business(2, 'Gamma Cafe'))
+    total, rows = index.search('cafe ', limit=2, offset=1)
+    assert total == 3
+    assert [row['business_name'] for row in rows] == ['Beta Cafe', 'Gamma Cafe']
+
+
+def test_upsert_and_remove_keep_the_index_current():
+    index = build(business(1, 'Smith Plumbing'))
+    index.upsert(business(1, 'Smith Electric'))
+    index.upsert(business(2, 'Jones Plumbing'))
+    assert ids(index.search('plumbing ')) == [2]
+    assert ids(index.search('electric ')) == [1]
+    index.remove(2)
+    assert index.search('plumbing ') == (0, [])
+    assert index.stats()['documents'] == 1
@@ -0,0 +1,58 @@
+from suggest_index import SuggestIndex, normalize, parse_cities
+
+
+def business(doc_id, name, category='', location='', featured=False):
+    return {'id': doc_id, 'business_name': name, 'category': category, 'location': location, 'featured': featured}
+
+
+def texts(suggestions):
+    return [suggestion['text'] for suggestion in suggestions]
+
+
+def test_normalize_collapses_case_and_punctuation():
+    assert normalize("  Joe's  Café-Bar ") == 'joe s caf bar'
+
+
+def test_parse_cities_skips_street_segments():
+    location = '12 Main St, Baltimore, MD 21201 | 4 Elm Rd, Towson, Maryland'
+    assert parse_cities(location) == ['Baltimore', 'Towson']
+    assert parse_cities('100 Pratt Street, MD') == []
+
+
+def test_every_word_start_is_a_prefix():
+    index = SuggestIndex()
+    index.build([business(1, 'Jim Bush Plumbing')])
+    assert texts(index.suggest('plu')) == ['Jim Bush Plumbing']
+    assert texts(index.suggest('bush p')) == ['Jim Bush Plumbing']
+    assert index.suggest('umbing') == []
+    assert index.suggest('  ') == []
+
+
+def test_categories_and_cities_rank_by_business_count():
+    index = SuggestIndex()
+    index.build([
+        business(1, 'Bay Bakery', 'Bakeries', 'Baltimore, MD'),
+        business(2, 'Bread Box', 'Bakeries', 'Baltimore, MD'),
+        business(3, 'Bayside Books', 'Books', 'Bel Air, MD'),
+    ])
+    suggestions = index.suggest('ba')
+    assert suggestions[0] == {'type': 'category', 'text': 'Bakeries', 'count': 2}
+    assert suggestions[1] == {'type': 'city', 'text': 'Baltimore', 'count': 2}
+    assert {'type': 'business', 'text': 'Bay Bakery', 'id': 1} in suggestions
+
+
+def test_featured_businesses_rank_first_and_limit_applies():
+    index = SuggestIndex()
+    index.build([business(1, 'Alpha Cafe'), business(2, 'Zeta Cafe', featured=True), business(3, 'Beta Cafe')])
+    assert texts(index.suggest('cafe', limit=2)) == ['Zeta Cafe', 'Beta Cafe']
+
+
+def test_upsert_and_remove_drop_stale_entries():
+    index = SuggestIndex()
+    index.build([business(1, 'Smith Plumbing', 'Plumbing')])
+    index.upsert(business(1, 'Smith Electric', 'Electricians'))
+    assert index.suggest('plum') == []
+    assert texts(index.suggest('elec')) == ['Electricians', 'Smith Electric']
+    index.remove(1)
+    assert index.suggest('smith') == []
+    assert index.stats()['entries'] == 0
@@ -43,9 +43,22 @@ const BusinessCard = ({ business, index }: BusinessCardProps) => {
     })
   };
 
-  const imageUrl = business.image_url
-    ? (business.image_url.startsWith('http') ? business.image_url : `${API_BASE_URL}${business.image_url}`)
-    : null;
+  const resolveImageUrl = (url: string) => (url.startsWith('http') ? url : `${API_BASE_URL}${url}`);
+
+  const imageUrl = business.image_url ? resolveImageUrl(business.image_url) : null;
+
+  // srcset entries are "url 320w"; the browser picks the smallest one that fills the card
+  const imageSources = (business.image_variants?.sources ?? []).map((source) => ({
+    type: source.type,
+    srcSet: source.srcset
+      .split(', ')
+      .map((entry) => {
+        const [url, width] = entry.split(' ');
+        return `${resolveImageUrl(url)} ${width}`;
+      })
+      .join(', '),
+  }));
+  const imageSizes = "(max-width: 640px) 100vw, (max-width: 1024px) 50vw, 33vw";
 
   return (
     <motion.div
@@ -63,15 +76,23 @@ const BusinessCard = ({ business, index }: BusinessCardProps) => {
       <Card className="overflow-hidden shadow-md h-full flex flex-col group">
         <div className="w-full bg-gray-50 overflow-hidden relative aspect-[4/3]">
           {imageUrl && !imageError ? (
-            <motion.img
-              src={imageUrl}
-              alt={business.business_name}
-              className="w-full h-full object-contain p-4"
-              initial={{ opacity: 0 }}
-              animate={{ opacity: 1 }}
-              transition={{ duration: 0.3 }}
-              onError={() => setImageError(true)}
-            />
+            <picture className="contents">
+              {imageSources.map((source) => (
+                <source key={source.type} type={source.type} srcSet={source.srcSet} sizes={imageSizes} />
+              ))}
+              <motion.img
+                src={imageUrl}
+                alt={business.business_name}
+                width={business.image_variants?.width}
+                height={business.image_variants?.height}
+                loading="lazy"
+                className="w-full h-full object-contain p-4"
+                initial={{ opacity: 0 }}
+                animate={{ opacity: 1 }}
+                transition={{ duration: 0.3 }}
+                onError={() => setImageError(true)}
+              />
+            </picture>
           ) : (
             <motion.div
               className="flex h-full w-full justify-center items-center p-8"
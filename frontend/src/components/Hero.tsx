@@ -19,7 +19,7 @@ import {
 } from "@/components/ui/command";
 import { Search, Check, ChevronsUpDown } from "lucide-react";
 import { useToast } from "@/components/ui/use-toast";
-import { getCategories, Category } from "@/lib/api"; // Import Category type
+import { getCategories, getSuggestions, Category, Suggestion } from "@/lib/api"; // Import Category type
 import { cn } from "@/lib/utils"; // For conditional class names
 
 const Hero = () => {
@@ -28,6 +28,7 @@ const Hero = () => {
     null,
   );
   const [comboboxOpen, setComboboxOpen] = useState(false);
+  const [suggestionsOpen, setSuggestionsOpen] = useState(false);
   const { toast } = useToast();
   const navigate = useNavigate();
 
@@ -83,6 +84,26 @@ const Hero = () => {
     queryFn: getCategories,
   });
 
+  const trimmedSearchTerm = searchTerm.trim();
+  const { data: suggestions = [] } = useQuery<Suggestion[], Error>({
+    queryKey: ["suggest", trimmedSearchTerm],
+    queryFn: () => getSuggestions(trimmedSearchTerm),
+    enabled: trimmedSearchTerm.length >= 2,
+    staleTime: 60 * 1000,
+  });
+
+  const handleSuggestion = (suggestion: Suggestion) => {
+    setSuggestionsOpen(false);
+    const params = new URLSearchParams();
+    if (suggestion.type === "category") {
+      params.append("category", suggestion.text);
+    } else {
+      setSearchTerm(suggestion.text);
+      params.append("q", suggestion.text);
+    }
+    navigate(`/browse?${params.toString()}`);
+  };
+
   const handleSearch = () => {
     if (!searchTerm && !selectedCategory) {
       toast({
@@ -227,15 +248,39 @@ const Hero = () => {
 
           <div className="w-px h-6 sm:h-8 bg-gray-200 mx-1 sm:mx-2" />
 
-          <Input
-            type="text"
-            id="hero-search-input"
-            placeholder="Search..."
-            className="flex-1 bg-gray-100 border-none focus-visible:ring-0 text-black text-sm sm:text-base md:text-lg px-2 sm:px-4 md:px-6 h-10 sm:h-12 md:h-14 font-medium placeholder:text-gray-400 shadow-none rounded-full"
-            value={searchTerm}
-            onChange={(e) => setSearchTerm(e.target.value)}
-            onKeyUp={(e) => e.key === "Enter" && handleSearch()}
-          />
+          <div className="relative flex-1">
+            <Input
+              type="text"
+              id="hero-search-input"
+              placeholder="Search..."
+              autoComplete="off"
+              className="w-full bg-gray-100 border-none focus-visible:ring-0 text-black text-sm sm:text-base md:text-lg px-2 sm:px-4 md:px-6 h-10 sm:h-12 md:h-14 font-medium placeholder:text-gray-400 shadow-none rounded-full"
+              value={searchTerm}
+              onChange={(e) => {
+                setSearchTerm(e.target.value);
+                setSuggestionsOpen(true);
+              }}
+              onBlur={() => setSuggestionsOpen(false)}
+              onKeyUp={(e) => e.key === "Enter" && handleSearch()}
+            />
+            {suggestionsOpen && trimmedSearchTerm.length >= 2 && suggestions.length > 0 && (
+              <ul className="absolute left-0 right-0 top-full mt-2 z-20 bg-white text-black rounded-xl shadow-xl overflow-hidden text-left">
+                {suggestions.map((suggestion) => (
+                  <li
+                    key={`${suggestion.type}-${suggestion.id ?? suggestion.text}`}
+                    className="px-4 py-2 cursor-pointer hover:bg-gray-100 flex justify-between gap-4"
+                    // onMouseDown fires before the input's onBlur closes the list
+                    onMouseDown={() => handleSuggestion(suggestion)}
+                  >
+                    <span className="truncate">{suggestion.text}</span>
+                    <span className="text-xs text-gray-400 capitalize flex-shrink-0">
+                      {suggestion.type}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
 
           <Button
             className="flex-shrink-0 w-10 h-10 sm:w-12 sm:h-12 md:w-auto md:h-14 md:px-8 bg-gradient-to-r from-secondary to-orange-600 hover:from-secondary/90 hover:to-orange-700 text-white rounded-full font-bold p-0 md:p-4 shadow-lg hover:shadow-xl transition-all duration-300 flex items-center justify-center gap-2"
@@ -8,19 +8,22 @@ import BusinessCard from "./BusinessCard";
 import { Business, getBusinesses } from "../lib/api";
 
 const PAGE_SIZE = 75;
+// Columns BusinessCard renders; contact names and timestamps are not fetched
+const CARD_FIELDS: (keyof Business)[] = ["category", "location", "tel", "email", "website", "description", "image_url", "image_variants"];
 
 // Updated fetchBusinesses to accept q and category
+// Pages are fetched with keyset cursors so deep pages cost the same as the first
 const fetchBusinesses = async ({
-  pageParam = 0,
+  pageParam = "",
   q,
   category,
 }: {
-  pageParam?: number;
+  pageParam?: string;
   q: string;
   category: string;
 }) => {
-  const result = await getBusinesses({ limit: PAGE_SIZE, offset: pageParam, q, category });
-  return { ...result, nextPageOffset: pageParam + result.businesses.length };
+  // The scroll view only needs next_cursor, so skip the total count
+  return await getBusinesses({ limit: PAGE_SIZE, cursor: pageParam, q, category, includeTotal: false, fields: CARD_FIELDS });
 };
 
 const Statistics = () => {
@@ -40,13 +43,8 @@ const Statistics = () => {
     queryKey: ['businesses', queryParamCategory, queryParamQ], // Updated queryKey
     queryFn: ({ pageParam }) =>
       fetchBusinesses({ pageParam, q: queryParamQ, category: queryParamCategory }), // Pass q and category
-    getNextPageParam: (lastPage) => {
-      if (lastPage.nextPageOffset >= lastPage.total) {
-        return undefined; // No more pages
-      }
-      return lastPage.nextPageOffset;
-    },
-    initialPageParam: 0,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined, // null when there are no more pages
+    initialPageParam: "",
   });
 
   const observerRef = useRef<IntersectionObserver | null>(null);
@@ -100,7 +98,7 @@ const Statistics = () => {
     );
   }
 
-  const allBusinesses = data?.pages.flatMap((page: { businesses: Business[], total: number, nextPageOffset: number }) => page.businesses) || [];
+  const allBusinesses = data?.pages.flatMap((page: { businesses: Business[], total: number | null, next_cursor: string | null }) => page.businesses) || [];
 
   return (
     <section id="businesses-section" className="py-20 bg-gradient-to-b from-gray-50 to-white">
@@ -3,7 +3,7 @@ import { Link, useNavigate } from "react-router-dom";
 import { Building, Bell, User, Mail } from "lucide-react"; // Removed Menu as it's not used
 import TypewriterText from "../TypewriterText";
 import { useAuth } from "../../components/AuthContext";
-import { API_BASE_URL } from "@/lib/api";
+import { getApplicationCounts, getBusinessApplications, subscribeToAdminEvents } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 import {
@@ -39,22 +39,13 @@ const AdminHeader = () => {
 
   const updateNotifications = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/business-applications`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        credentials: 'include',
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const applications = await response.json();
-      const newItems = applications.filter((app: any) => app.status === 'pending');
-      setNewApplicationsCount(newItems.length);
-      setNewApplicationsList(newItems.sort((a: any, b: any) => new Date(b.submittedAt).getTime() - new Date(a.submittedAt).getTime()));
+      // Only the newest pending applications are listed; the badge shows the full count
+      const [counts, page] = await Promise.all([
+        getApplicationCounts(),
+        getBusinessApplications({ status: 'pending', limit: 10 }),
+      ]);
+      setNewApplicationsCount(counts.pending);
+      setNewApplicationsList(page.applications);
     } catch (e) {
       console.error("Failed to fetch business applications from backend for header", e);
       setNewApplicationsCount(0);
@@ -65,12 +56,15 @@ const AdminHeader = () => {
   useEffect(() => {
     updateNotifications(); // Initial load
 
-    const intervalId = setInterval(() => {
-      updateNotifications(); // Poll every 30 seconds for new applications
-    }, 30000);
+    // Reload only when an application arrives or changes, or after reconnecting
+    const unsubscribe = subscribeToAdminEvents((type) => {
+      if (type !== 'businesses_changed') {
+        updateNotifications();
+      }
+    });
 
     return () => {
-      clearInterval(intervalId);
+      unsubscribe();
     };
   }, []);
 
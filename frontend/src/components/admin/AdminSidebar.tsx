@@ -1,7 +1,7 @@
 import { NavLink } from "react-router-dom";
 import { useState, useEffect } from "react";
 import { LayoutDashboard, Store, BarChart3, Settings, ClipboardList, PlusCircle } from "lucide-react"; // Added ClipboardList, kept PlusCircle for other uses if any
-import { API_BASE_URL } from "@/lib/api";
+import { getApplicationCounts, subscribeToAdminEvents } from "@/lib/api";
 import { Badge } from "@/components/ui/badge";
 
 interface AdminSidebarProps {
@@ -34,21 +34,8 @@ const AdminSidebar = () => {
 
   const updateNotificationCount = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/business-applications`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        credentials: 'include',
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const applications = await response.json();
-      const newItemsCount = applications.filter((app: any) => app.status === 'pending').length;
-      setNewApplicationsCount(newItemsCount);
+      const counts = await getApplicationCounts();
+      setNewApplicationsCount(counts.pending);
     } catch (e) {
       console.error("Failed to fetch business applications from backend for sidebar", e);
       setNewApplicationsCount(0);
@@ -64,12 +51,15 @@ const AdminSidebar = () => {
     updateNotificationCount(); // Initial load
     window.addEventListener('applicationProcessed', handleApplicationProcessed);
 
-    const intervalId = setInterval(() => {
-      updateNotificationCount(); // Poll every 30 seconds for new applications
-    }, 30000);
+    // Reload only when an application arrives or changes, or after reconnecting
+    const unsubscribe = subscribeToAdminEvents((type) => {
+      if (type !== 'businesses_changed') {
+        updateNotificationCount();
+      }
+    });
 
     return () => {
-      clearInterval(intervalId);
+      unsubscribe();
       window.removeEventListener('applicationProcessed', handleApplicationProcessed);
     };
   }, []);
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from "react";
 import { BarChart as BarChartIcon, ClipboardList, PlusSquare, TrendingUp } from "lucide-react";
 import { motion } from "framer-motion";
-import { getBusinesses, getNewBusinessesCount, getBusinessApplications, getTopCategories, getMonthlyGrowth } from "../../lib/api";
+import { getBusinesses, getNewBusinessesCount, getApplicationCounts, getTopCategories, getMonthlyGrowth } from "../../lib/api";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import {
   BarChart,
@@ -107,8 +107,8 @@ const Analytics = () => {
 
     const fetchData = async () => {
       try {
-        const applications = await getBusinessApplications();
-        setPendingApplications(applications.filter(app => app.status === 'pending').length);
+        const counts = await getApplicationCounts();
+        setPendingApplications(counts.pending);
       } catch (error) {
         console.error("Error fetching analytics data:", error);
       } finally {
@@ -1,3 +1,11 @@
+// Size/format variants of a business image; each source maps onto <picture><source>, fallback last
+export type ImageVariants = {
+  width: number;
+  height: number;
+  sources: { type: string; srcset: string }[];
+  variants: { url: string; type: string; width: number; height: number; bytes: number }[];
+};
+
 // Define the Business type
 export type Business = {
   id: string; // or number, depending on your DB's primary key type for businesses
@@ -10,6 +18,7 @@ export type Business = {
   website: string | null;
   description: string | null;
   image_url: string | null; // Added for business images
+  image_variants?: ImageVariants | null; // Resized WebP/fallback copies of image_url, once processed
   status: "pending" | "approved" | "rejected" | string; // string for flexibility if other statuses exist
   featured?: boolean; // Assuming featured is optional or might not always be present
   created_at: string; // Assuming ISO date string
@@ -47,26 +56,45 @@ export type TopCategory = {
 };
 
 // Fetch businesses from the backend
+// Pass `cursor` ("" for the first page, then `next_cursor`) for keyset paging;
+// otherwise `offset` is used. `fields` limits the returned columns
+// (id and business_name are always included).
 export const getBusinesses = async ({
   limit,
-  offset,
+  offset = 0,
+  cursor,
   category,
   q,
+  includeTotal = true,
+  fields,
 }: {
   limit: number;
-  offset: number;
+  offset?: number;
+  cursor?: string;
   category?: string;
   q?: string;
+  includeTotal?: boolean;
+  fields?: (keyof Business)[];
 }) => {
   const params = new URLSearchParams();
   params.append("limit", String(limit));
-  params.append("offset", String(offset));
+  if (cursor !== undefined) {
+    params.append("cursor", cursor);
+  } else {
+    params.append("offset", String(offset));
+  }
   if (category) {
     params.append("category", category);
   }
   if (q) {
     params.append("q", q);
   }
+  if (!includeTotal) {
+    params.append("include_total", "false");
+  }
+  if (fields) {
+    params.append("fields", fields.join(","));
+  }
 
   const response = await fetch(
     `${API_BASE_URL}/api/businesses?${params.toString()}`,
@@ -82,6 +110,29 @@ export const getBusinesses = async ({
   return await response.json();
 };
 
+export type Suggestion = {
+  type: "business" | "category" | "city";
+  text: string;
+  id?: number; // set for businesses
+  count?: number; // number of businesses, for categories and cities
+};
+
+// Fetch typeahead completions for the search box
+export const getSuggestions = async (
+  prefix: string,
+  limit: number = 8,
+): Promise<Suggestion[]> => {
+  const params = new URLSearchParams({ prefix, limit: String(limit) });
+  const response = await fetch(
+    `${API_BASE_URL}/api/businesses/suggest?${params.toString()}`,
+  );
+  if (!response.ok) {
+    throw new Error("Failed to fetch suggestions");
+  }
+  const data = await response.json();
+  return data.suggestions;
+};
+
 // Fetch all categories from the backend
 export const getCategories = async (): Promise<Category[]> => {
   const response = await fetch(`${API_BASE_URL}/api/categories`);
@@ -145,10 +196,53 @@ export const getNewBusinessesCount = async (): Promise<number> => {
   return data.count;
 };
 
-// Function to fetch business applications
-export async function getBusinessApplications(): Promise<any[]> {
+export interface ApplicationCounts {
+  pending: number;
+  approved: number;
+  rejected: number;
+  total: number;
+}
+
+// Function to fetch the number of business applications per status
+export async function getApplicationCounts(): Promise<ApplicationCounts> {
   const response = await fetch(
-    `${API_BASE_URL}/api/business-applications`,
+    `${API_BASE_URL}/api/business-applications/counts`,
+    {
+      method: "GET",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      credentials: "include",
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
+export interface ApplicationsPage {
+  applications: any[];
+  has_more: boolean;
+  next_cursor: string | null;
+}
+
+// Function to fetch one page of business applications, newest first.
+// Pass the previous page's next_cursor to continue.
+export async function getBusinessApplications(options?: {
+  status?: 'pending' | 'approved' | 'rejected';
+  limit?: number;
+  cursor?: string;
+}): Promise<ApplicationsPage> {
+  const params = new URLSearchParams();
+  if (options?.status) params.append("status", options.status);
+  params.append("limit", String(options?.limit ?? 20));
+  if (options?.cursor) params.append("cursor", options.cursor);
+
+  const response = await fetch(
+    `${API_BASE_URL}/api/business-applications?${params.toString()}`,
     {
       method: "GET",
       headers: {
@@ -257,3 +351,65 @@ export const getBusiness = async (id: string): Promise<Business> => {
 
   return await response.json();
 };
+
+// --- Admin Event Stream ---
+
+export type AdminEventType =
+  | "connected"
+  | "application_submitted"
+  | "application_updated"
+  | "businesses_changed";
+
+type AdminEventHandler = (type: AdminEventType, data: any) => void;
+
+const adminEventHandlers = new Set<AdminEventHandler>();
+let adminEventSource: EventSource | null = null;
+let adminEventRetry: ReturnType<typeof setTimeout> | null = null;
+
+const notifyAdminEvent = (type: AdminEventType, data: any) => {
+  adminEventHandlers.forEach((handler) => handler(type, data));
+};
+
+const openAdminEventSource = () => {
+  const source = new EventSource(`${API_BASE_URL}/api/events`, { withCredentials: true });
+
+  // Sent on every (re)connect: events missed while disconnected are not replayed, so refetch
+  source.onopen = () => notifyAdminEvent("connected", null);
+  (["application_submitted", "application_updated", "businesses_changed"] as const).forEach((type) => {
+    source.addEventListener(type, (event) => {
+      notifyAdminEvent(type, JSON.parse((event as MessageEvent).data));
+    });
+  });
+  source.onerror = () => {
+    // The browser retries by itself unless the server refused the stream (401, 503)
+    if (source.readyState === EventSource.CLOSED && adminEventHandlers.size > 0) {
+      adminEventSource = null;
+      adminEventRetry = setTimeout(() => {
+        adminEventRetry = null;
+        if (adminEventHandlers.size > 0) adminEventSource = openAdminEventSource();
+      }, 30000);
+    }
+  };
+  return source;
+};
+
+// Subscribe to admin events pushed by the server. All subscribers in a tab
+// share one connection. Returns the unsubscribe function.
+export function subscribeToAdminEvents(handler: AdminEventHandler): () => void {
+  adminEventHandlers.add(handler);
+  if (!adminEventSource && !adminEventRetry) {
+    adminEventSource = openAdminEventSource();
+  }
+
+  return () => {
+    adminEventHandlers.delete(handler);
+    if (adminEventHandlers.size === 0) {
+      adminEventSource?.close();
+      adminEventSource = null;
+      if (adminEventRetry) {
+        clearTimeout(adminEventRetry);
+        adminEventRetry = null;
+      }
+    }
+  };
+}
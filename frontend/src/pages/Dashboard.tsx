@@ -9,7 +9,7 @@ import {
 import { Building2, ClipboardList, ListPlus } from "lucide-react"; // Removed unused icons BarChart, FileText, CheckSquare
 import BusinessList from "../components/admin/BusinessList"; // Added import for BusinessList
 import { useState, useEffect } from "react"
-import { getBusinesses, getNewBusinessesCount, getBusinessApplications } from "../lib/api"
+import { getBusinesses, getNewBusinessesCount, getApplicationCounts } from "../lib/api"
 
 const Dashboard = () => {
   const [totalBusinesses, setTotalBusinesses] = useState(2376);
@@ -30,8 +30,8 @@ const Dashboard = () => {
         setTotalBusinesses(response.total || 0);
         const count = await getNewBusinessesCount();
         setNewListings(count);
-        const applicationsData = await getBusinessApplications();
-        setPendingApplications(applicationsData.filter(app => app.status === 'pending').length);
+        const counts = await getApplicationCounts();
+        setPendingApplications(counts.pending);
       } catch (err) {
         console.error("Failed to fetch dashboard data:", err);
       } finally {